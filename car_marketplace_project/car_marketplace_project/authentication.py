@@ -0,0 +1,147 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from users.tokens import has_role_claims
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def user_active_key(user_id):
+    return f'auth:active:{user_id}'
+
+
+def active_flag(user_id):
+    return get_user_model().objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).values_list('is_active', flat=True)
+
+
+def is_user_active(user_id):
+    """
+    Whether the user behind a token-claims request still exists and is active. The flag is
+    cached per user for AUTH_USER_ACTIVE_TIMEOUT seconds and dropped by users.signals when
+    the user is saved or deleted, so a deactivation reaches every process within that long.
+    """
+    active = cache.get(user_active_key(user_id))
+    if active is None:
+        active = bool(active_flag(user_id).first()) # No row: deleted
+        cache.set(user_active_key(user_id), active, getattr(settings, 'AUTH_USER_ACTIVE_TIMEOUT', 30))
+    return active
+
+
+async def ais_user_active(user_id):
+    """Async counterpart of is_user_active for aauthenticate."""
+    active = await cache.aget(user_active_key(user_id))
+    if active is None:
+        active = bool(await active_flag(user_id).afirst())
+        await cache.aset(user_active_key(user_id), active, getattr(settings, 'AUTH_USER_ACTIVE_TIMEOUT', 30))
+    return active
+
+
+def check_active(active):
+    if not active:
+        raise exceptions.AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+
+class ClaimsUser(TokenUser):
+    """
+    The requesting user as described by the access token (users.tokens.ROLE_CLAIMS),
+    without a database row. Compares equal to the User instance with the same pk.
+    """
+
+    @cached_property
+    def is_seller(self):
+        return self.token.get('is_seller', False)
+
+    def __eq__(self, other):
+        if isinstance(other, get_user_model()):
+            return str(self.pk) == str(other.pk) # simplejwt issues the id claim as a string
+        return super().__eq__(other)
+
+    __hash__ = TokenUser.__hash__
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that answers read-only requests from the token's role claims.
+
+    GET/HEAD/OPTIONS get a ClaimsUser, which is all that CarViewSet.get_queryset, IsSeller
+    and the inquiry inbox look at. Writes, tokens issued before the role claims existed and
+    views with `use_token_claims = False` (they render the user's own row) load the User.
+    With AUTH_USER_CACHE_TIMEOUT set (only worth it on a shared cache, where dropping the
+    entry on save reaches every process) the row is reused for that long.
+    A ClaimsUser is refused once its user is deactivated or deleted (is_user_active).
+    Claims can lag a role change until the access token expires; writes never do.
+    """
+
+    def authenticate(self, request):
+        self.request = request
+        return super().authenticate(request)
+
+    def use_claims(self, validated_token):
+        view = self.request.parser_context.get('view')
+        return (
+            self.request.method in SAFE_METHODS and has_role_claims(validated_token)
+            and getattr(view, 'use_token_claims', True)
+        )
+
+    def get_user(self, validated_token):
+        if jwt_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        if self.use_claims(validated_token):
+            check_active(is_user_active(validated_token[jwt_settings.USER_ID_CLAIM]))
+            return ClaimsUser(validated_token)
+
+        timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 0)
+        if not timeout:
+            return super().get_user(validated_token)
+        cache_key = user_cache_key(validated_token[jwt_settings.USER_ID_CLAIM])
+        user = cache.get(cache_key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(cache_key, user, timeout)
+        elif not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+
+async def aauthenticate(request, session=False):
+    """
+    JWTAuthentication for plain async views (DRF views are sync only).
+
+    Returns (user, validated token) like BaseAuthentication.authenticate, with no token for
+    a session and (AnonymousUser, None) when no credentials were sent; raises the same
+    InvalidToken / AuthenticationFailed errors as the sync authenticator. With
+    `session=True` a logged-in session is accepted as well. Only reads go through here,
+    so a token with role claims yields a ClaimsUser, checked only against is_user_active.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return (await request.auser() if session else AnonymousUser()), None
+
+    token = authentication.get_validated_token(raw_token)
+    try:
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(_("Token contained no recognizable user identification"))
+    if has_role_claims(token):
+        check_active(await ais_user_active(user_id))
+        return ClaimsUser(token), token
+    user = await get_user_model().objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).afirst()
+    if user is None:
+        raise exceptions.AuthenticationFailed(_("User not found"), code="user_not_found")
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    return user, token
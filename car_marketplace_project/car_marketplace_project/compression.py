@@ -0,0 +1,121 @@
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli # Optional: without it only gzip is offered
+except ImportError:
+    brotli = None
+
+
+def get_encodings():
+    """The content codings this server produces, in its order of preference."""
+    return [encoding for encoding in settings.RESPONSE_COMPRESSION_ENCODINGS if encoding != 'br' or brotli is not None]
+
+
+def encode(content, encoding):
+    level = settings.RESPONSE_COMPRESSION_LEVELS[encoding]
+    if encoding == 'br':
+        return brotli.compress(content, quality=level)
+    return gzip.compress(content, compresslevel=level, mtime=0) # mtime=0: equal bodies, equal bytes
+
+
+def encode_all(content):
+    """Every encoding worth sending for `content`, to be stored alongside it."""
+    if len(content) < settings.RESPONSE_COMPRESSION_MIN_LENGTH:
+        return {}
+    encoded = {encoding: encode(content, encoding) for encoding in get_encodings()}
+    return {encoding: body for encoding, body in encoded.items() if len(body) < len(content)}
+
+
+def is_compressible(response):
+    return (
+        not response.streaming and not response.has_header('Content-Encoding')
+        and response.get('Content-Type', '').split(';')[0].strip() in settings.RESPONSE_COMPRESSION_TYPES
+    )
+
+
+def negotiate(request, encodings):
+    """The encoding from `encodings` the client's Accept-Encoding ranks highest (ties go to the first), or None."""
+    accepted = {}
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_response(request, response, encoded=None):
+    """
+    Swap the body of `response` for the encoding the client prefers: taken from `encoded`
+    (bodies precompressed by encode_all) when given, otherwise compressed now.
+    """
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if encoded is None:
+        encoded = {}
+        if len(response.content) >= settings.RESPONSE_COMPRESSION_MIN_LENGTH:
+            encoding = negotiate(request, get_encodings())
+            if encoding is not None:
+                encoded[encoding] = encode(response.content, encoding)
+    encoding = negotiate(request, list(encoded))
+    if encoding is None or len(encoded[encoding]) >= len(response.content):
+        return response
+    response.content = encoded[encoding]
+    response['Content-Length'] = str(len(response.content))
+    response['Content-Encoding'] = encoding
+    if response.has_header('ETag'):
+        response['ETag'] = variant_etag(response['ETag'], encoding)
+    return response
+
+
+def variant_etag(etag, encoding):
+    """
+    The ETag of the `encoding` variant of a body tagged `etag`. The encoded bytes differ
+    from the identity body, so a strong validator gets the coding appended ("abc" becomes
+    "abc-br") and stays strong; a weak one already allows for it and is left as is.
+    """
+    if encoding is None or not etag.startswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def uncompressed(view):
+    """
+    Keep CompressionMiddleware off `view`'s responses. For bodies carrying secrets (tokens,
+    tickets): compressed alongside attacker-chosen input, their length leaks the secret
+    a byte at a time (BREACH).
+    """
+    view.uncompressed = True
+    return view
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    gzip or brotli for the content types in RESPONSE_COMPRESSION_TYPES, whichever
+    Accept-Encoding prefers. Responses that already have a Content-Encoding are left
+    alone: that is how the anonymous response cache serves its stored encodings
+    (cars.cache), so a cache hit never recompresses. Streams, and views marked
+    `uncompressed`, are not compressed.
+    """
+
+    def process_response(self, request, response):
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and getattr(match.func, 'uncompressed', False):
+            return response
+        if is_compressible(response):
+            compress_response(request, response)
+        return response
@@ -0,0 +1,99 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from cars.cache import ageneration_token, generation_token
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified handling for read actions, computed without serializing anything.
+
+    The validators come from one aggregate over the queryset the action would render:
+    `max(updated_at)` catches edits, `count` catches deletions and rows leaving the
+    filter, and the generations in `validator_generations` cover nested data that lives
+    in other tables (images, brand/model names, seller usernames). A matching
+    If-None-Match returns 304 before any serializer runs.
+
+    Only the ETag carries all of that. Last-Modified is `max(updated_at)` alone, which a
+    deletion, a row leaving the filter or a nested change never moves, so it is sent (and
+    If-Modified-Since honoured) only for `retrieve` of a viewset without validator_generations.
+
+    Keyset-paginated lists are left alone: their pages never COUNT the whole result, and
+    the validator aggregate would put that cost back.
+    """
+    conditional_actions = ('list', 'retrieve')
+    validator_generations = ()
+
+    def get_validator_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_validators(self, request, queryset):
+        stats = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+        token = generation_token(*self.validator_generations) if self.validator_generations else ''
+        return self.build_validators(request, stats, token)
+
+    async def aget_validators(self, request, queryset):
+        stats = await queryset.order_by().aaggregate(last_modified=Max('updated_at'), count=Count('pk'))
+        token = await ageneration_token(*self.validator_generations) if self.validator_generations else ''
+        return self.build_validators(request, stats, token)
+
+    def build_validators(self, request, stats, token):
+        user_key = request.user.pk if request.user.is_authenticated else 'anon'
+        fingerprint = '{}:{}:{}:{}:{}:{}'.format(
+            stats['last_modified'].isoformat() if stats['last_modified'] else '', stats['count'],
+            token, request.accepted_media_type, user_key, request.get_full_path(),
+        )
+        # Weak: the tag identifies the data, not the exact bytes (compression may vary).
+        etag = 'W/' + quote_etag(hashlib.md5(fingerprint.encode('utf-8')).hexdigest())
+        last_modified = None
+        if self.action == 'retrieve' and not self.validator_generations and stats['last_modified']:
+            last_modified = int(stats['last_modified'].timestamp())
+        return stats['count'], etag, last_modified
+
+    def check_not_modified(self, request, queryset):
+        """Return a 304 response if the client's copy is current, else None (and remember the validators)."""
+        return self.not_modified_response(request, *self.get_validators(request, queryset))
+
+    async def acheck_not_modified(self, request, queryset):
+        return self.not_modified_response(request, *await self.aget_validators(request, queryset))
+
+    def not_modified_response(self, request, count, etag, last_modified):
+        if self.action == 'retrieve' and not count:
+            return None # Let the regular handler produce the 404
+        self.response_validators = (etag, last_modified)
+        return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    def list(self, request, *args, **kwargs):
+        is_keyset_request = getattr(self.paginator, 'is_keyset_request', None)
+        if 'list' in self.conditional_actions and not (is_keyset_request and is_keyset_request(request)):
+            not_modified = self.check_not_modified(request, self.get_validator_queryset())
+            if not_modified is not None:
+                return not_modified
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if 'retrieve' in self.conditional_actions:
+            not_modified = self.check_not_modified(request, self.get_validator_queryset())
+            if not_modified is not None:
+                return not_modified
+        return super().retrieve(request, *args, **kwargs)
+
+    def set_validator_headers(self, response):
+        validators = getattr(self, 'response_validators', None)
+        if validators and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = self.set_validator_headers(response)
+        return super().finalize_response(request, response, *args, **kwargs)
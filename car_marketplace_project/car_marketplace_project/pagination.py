@@ -0,0 +1,163 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """
+    PageNumberPagination with an awaitable `apaginate_queryset` for the async read views
+    (cars.async_views): the same pages, links and errors, with COUNT and the page fetch
+    issued through the async ORM.
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount() # cached_property; filled here so page() never queries
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [obj async for obj in self.page.object_list]
+        return self.page.object_list
+
+
+class KeysetPagination(AsyncPageNumberPagination):
+    """
+    Page-number pagination by default, with an opt-in keyset (cursor) mode.
+
+    Clients pass `?pagination=cursor` to switch modes. The cursor is keyed on the active
+    `?ordering=` value (restricted to the view's `ordering_fields`) with `id` as tiebreaker,
+    so every page is a single index range scan of `page_size + 1` rows: no OFFSET and no
+    COUNT(*), however deep the client scrolls. The `count` key is omitted in this mode.
+    """
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    default_keyset_ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def is_keyset_request(self, request):
+        return request.query_params.get(self.mode_query_param) == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_keyset = self.is_keyset_request(request)
+        if not self.use_keyset:
+            return super().paginate_queryset(queryset, request, view)
+        return self.set_keyset_rows(list(self.get_keyset_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.use_keyset = self.is_keyset_request(request)
+        if not self.use_keyset:
+            return await super().apaginate_queryset(queryset, request, view)
+        return self.set_keyset_rows([obj async for obj in self.get_keyset_queryset(queryset, request, view)])
+
+    def get_keyset_queryset(self, queryset, request, view):
+        """The page query: one index range of `page_size + 1` rows after the cursor."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.display_page_controls = False
+        self.ordering = self.get_keyset_ordering(request, view)
+        self.field_name = self.ordering.lstrip('-')
+        self.model_field = queryset.model._meta.get_field(self.field_name)
+        descending = self.ordering.startswith('-')
+
+        self.cursor = cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['reverse'])
+        if cursor:
+            # Walking backwards flips the comparison and the sort, then the page is reversed.
+            lookup = 'gt' if descending == reverse else 'lt'
+            value = self.model_field.to_python(cursor['value'])
+            queryset = queryset.filter(
+                Q(**{f'{self.field_name}__{lookup}': value})
+                | Q(**{self.field_name: value, f'pk__{lookup}': cursor['pk']})
+            )
+        if descending != reverse:
+            queryset = queryset.order_by(f'-{self.field_name}', '-pk')
+        else:
+            queryset = queryset.order_by(self.field_name, 'pk')
+        return queryset[:self.page_size + 1]
+
+    def set_keyset_rows(self, rows):
+        cursor = self.cursor
+        reverse = bool(cursor and cursor['reverse'])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.rows = rows
+        return rows
+
+    def get_keyset_ordering(self, request, view):
+        allowed = getattr(view, 'ordering_fields', None) or []
+        param = request.query_params.get('ordering', '')
+        for term in param.split(','):
+            term = term.strip()
+            if term and term.lstrip('-') in allowed:
+                return term
+        return getattr(view, 'keyset_ordering', self.default_keyset_ordering)
+
+    def encode_cursor(self, obj, reverse):
+        value = self.model_field.value_to_string(obj)
+        payload = json.dumps({'o': self.ordering, 'v': value, 'pk': obj.pk, 'r': int(reverse)})
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if payload['o'] != self.ordering:
+                raise ValueError
+            return {'value': payload['v'], 'pk': int(payload['pk']), 'reverse': bool(payload['r'])}
+        except (TypeError, ValueError, KeyError, binascii.Error, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_cursor_link(self, obj, reverse):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(obj, reverse))
+
+    def get_next_link(self):
+        if not getattr(self, 'use_keyset', False):
+            return super().get_next_link()
+        if not self.has_next or not self.rows:
+            return None
+        return self.get_cursor_link(self.rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not getattr(self, 'use_keyset', False):
+            return super().get_previous_link()
+        if not self.has_previous or not self.rows:
+            return None
+        return self.get_cursor_link(self.rows[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if not self.use_keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['required'] = ['results']
+        return response_schema
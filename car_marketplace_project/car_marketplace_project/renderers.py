@@ -0,0 +1,30 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson # Optional: without it FastJSONRenderer renders through JSONRenderer
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson. Values orjson would write differently from DRF
+    (Decimal, datetime/date/time, lazy strings such as reverse_lazy() URLs, QuerySets) are
+    handed to DRF's own encoder, so the bytes match JSONRenderer's; the one difference is
+    that exponent floats are written 1e16 instead of 1e+16, the same number to any parser.
+    Indented output (`; indent=` in Accept) and anything orjson refuses (integers beyond 64
+    bits, non-string keys) take the stdlib path.
+    """
+    orjson_options = orjson.OPT_PASSTHROUGH_DATETIME if orjson is not None else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or not self.compact or self.ensure_ascii or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(data, default=self.encoder_class().default, option=self.orjson_options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Like JSONRenderer: escape the two line terminators JavaScript string literals reject.
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -14,6 +14,8 @@ import os
 from pathlib import Path
 from datetime import timedelta
 
+from django.conf import global_settings
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 # SECURITY WARNING: keep the secret key used in production secret!
@@ -34,6 +36,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites', 
+    'django.contrib.postgres', # SearchVector / trigram lookups for car search
     'rest_framework',
     'rest_framework_simplejwt',
     'django_filters', 
@@ -45,6 +48,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'car_marketplace_project.compression.CompressionMiddleware', # Before anything that reads or changes the body
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware', # Placed high up, usually after SessionMiddleware
     'django.middleware.common.CommonMiddleware', # Only one instance of CommonMiddleware
@@ -120,6 +124,55 @@ STATIC_ROOT = BASE_DIR / 'staticfiles' # For production deployment
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Cache
+# Local memory by default (per process, fine for a single worker). Point REDIS_URL at any
+# Redis-compatible server so every worker shares cached responses and generation counters.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+RESPONSE_CACHE_TIMEOUT = 600 # Seconds; anonymous catalog responses are also invalidated on writes
+# Seconds a write request's User row is reused (car_marketplace_project.authentication). Only
+# with the shared Redis cache: a per-process cache would keep honouring a deactivated user.
+AUTH_USER_CACHE_TIMEOUT = 60 if os.environ.get('REDIS_URL') else 0
+AUTH_USER_ACTIVE_TIMEOUT = 30 # Seconds a user's is_active flag is reused on the token-claims path
+
+# Response compression (car_marketplace_project.compression): bodies of these types are sent
+# brotli- or gzip-encoded, whichever Accept-Encoding prefers ('br' needs the brotli package).
+# Cached responses keep their encodings next to the body, so a cache hit never recompresses.
+# Views wrapped in compression.uncompressed (tokens, stream tickets) are always sent as is: BREACH.
+RESPONSE_COMPRESSION_ENCODINGS = ['br', 'gzip'] # Preference order on ties
+RESPONSE_COMPRESSION_LEVELS = {'br': 5, 'gzip': 6}
+RESPONSE_COMPRESSION_MIN_LENGTH = 200 # Bytes; shorter bodies are sent as is
+RESPONSE_COMPRESSION_TYPES = ['application/json']
+
+# Car image renditions (cars.images): thumbnails and WebP variants generated after upload
+CAR_IMAGE_VARIANT_SIZES = {
+    'thumb': (320, 240), # List cards
+    'medium': (800, 600), # Detail gallery
+    'large': (1600, 1200), # Zoom / full screen
+}
+CAR_IMAGE_VARIANTS_ASYNC = True # Render in a background thread pool; False renders inline on commit
+CAR_IMAGE_VARIANT_WORKERS = 2
+
+# Serve catalog GETs (car list/detail/compare, brands, models) from the coroutine views in
+# cars.async_views. Enable under ASGI (asgi.py); under WSGI every request would need an event loop.
+CARS_ASYNC_READS = os.environ.get('CARS_ASYNC_READS', '') == '1'
+
+CAR_IMPORT_CHUNK_SIZE = 500 # Feed rows validated and bulk-inserted per transaction (cars.importer)
+CAR_MODERATION_CHUNK_SIZE = 500 # Cars approved/rejected per transaction (cars.moderation)
+CAR_MODERATION_MAX_IDS = 10000 # Per moderation decision request
+CAR_EXPORT_CHUNK_SIZE = 2000 # Rows per cursor fetch and per streamed chunk of /cars/export/ (cars.exporter)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -131,7 +184,7 @@ AUTH_USER_MODEL = 'users.User'
 # Django REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'car_marketplace_project.authentication.ClaimsJWTAuthentication', # JWT; reads trust the role claims
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly', # Default safe read, require auth for write
@@ -141,7 +194,11 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': (
+        'car_marketplace_project.renderers.FastJSONRenderer', # orjson when installed; same bytes as JSONRenderer
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'car_marketplace_project.pagination.AsyncPageNumberPagination', # PageNumberPagination + async variant
     'PAGE_SIZE': 10, # Ensure this matches the PAGE_SIZE in your frontend's main.js
 }
 
@@ -149,7 +206,7 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
-    'BLACKLIST_AFTER_ROTATION': True,
+    'BLACKLIST_AFTER_ROTATION': True, # Rotated tokens are revoked through users.blacklist (TOKEN_BLACKLIST_*)
     'UPDATE_LAST_LOGIN': False, # Consider setting to True for user activity tracking
 
     'ALGORITHM': 'HS256',
@@ -172,10 +229,45 @@ SIMPLE_JWT = {
 
     'JTI_CLAIM': 'jti',
 
+    # Tokens carry is_seller/is_staff (users.tokens) for ClaimsJWTAuthentication
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.RoleTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.RoleTokenRefreshSerializer',
+
     'SLIDING_TOKEN_LIFETIME': timedelta(minutes=5),
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Refresh-token revocation (users.blacklist). DatabaseBlacklist uses users.RevokedToken
+# (clean up with `manage.py purge_revoked_tokens`). CacheBlacklist keeps each jti until the
+# token would have expired anyway, but only the shared Redis cache (REDIS_URL) will do:
+# LocMemCache is per process and culls entries, so a revoked token could be replayed.
+# The Bloom filter answers most lookups for tokens that were never revoked without
+# touching the backend.
+TOKEN_BLACKLIST_BACKEND = os.environ.get(
+    'TOKEN_BLACKLIST_BACKEND',
+    'users.blacklist.CacheBlacklist' if os.environ.get('REDIS_URL') else 'users.blacklist.DatabaseBlacklist',
+)
+TOKEN_BLACKLIST_BLOOM_FILTER = True
+TOKEN_BLACKLIST_BLOOM_BITS = 2 ** 20 # Per expiry window (REFRESH_TOKEN_LIFETIME); under 1% false positives at 100k jtis
+TOKEN_BLACKLIST_BLOOM_HASHES = 7
+
+# Password hashing (users.hashing): registration and the token obtain endpoint hash in a pool of
+# PASSWORD_HASHING_WORKERS processes (0 hashes in the request thread). At most workers + QUEUE
+# hashes run or wait at once; further requests get 429 with Retry-After.
+PASSWORD_HASHING_WORKERS = int(os.environ.get('PASSWORD_HASHING_WORKERS', 2))
+PASSWORD_HASHING_QUEUE = 8
+PASSWORD_HASHING_TIMEOUT = 10 # Seconds a request waits for its hash
+PASSWORD_HASHING_RETRY_AFTER = 1 # Seconds
+AUTHENTICATION_BACKENDS = ['users.backends.PooledModelBackend'] # Logins check passwords in the pool too
+
+# PASSWORD_ARGON2=1 (needs argon2-cffi) hashes new passwords with Argon2 at the cost below;
+# existing PBKDF2 hashes keep working and are upgraded on the next login.
+if os.environ.get('PASSWORD_ARGON2') == '1':
+    PASSWORD_HASHERS = ['users.hashing.TunedArgon2PasswordHasher', *global_settings.PASSWORD_HASHERS]
+ARGON2_TIME_COST = 2
+ARGON2_MEMORY_COST = 19456 # KiB
+ARGON2_PARALLELISM = 1 # The pool already hashes in parallel
+
 # CORS Configuration (Crucial for Frontend Communication)
 # This list must contain the exact URL(s) where your frontend is running.
 # For VS Code Live Server, it's typically http://localhost:5500 or http://127.0.0.1:5500
@@ -187,3 +279,22 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 SITE_ID = 1
+
+# Car search (cars.search.CarSearchFilter)
+CAR_SEARCH_CONFIG = 'english' # PostgreSQL text search configuration
+CAR_SEARCH_TRIGRAM = True # Typo-tolerant brand/model matching via pg_trgm
+CAR_AUTOCOMPLETE_COUNTS_TTL = 300 # Seconds before cars.autocomplete reloads listing counts (picks up other processes' writes)
+
+# Catalog facets (CarViewSet.facets)
+CAR_FACET_PRICE_BUCKET = 100000 # Price histogram bucket width
+CAR_FACET_MILEAGE_BUCKET = 10000 # Mileage histogram bucket width (KM)
+CAR_FACETS_CACHE_TIMEOUT = 300 # Seconds; entries are also invalidated whenever a listing changes
+
+# Inquiry event stream (inquiries.events, /api/inquiries/stream/)
+# The in-process broker only reaches streams held by the same worker process; use the Redis
+# broker (any Redis-compatible server, INQUIRY_EVENTS_REDIS_URL or REDIS_URL) with several workers.
+INQUIRY_EVENTS_BROKER = os.environ.get('INQUIRY_EVENTS_BROKER', 'inquiries.events.InProcessBroker')
+INQUIRY_EVENTS_REDIS_URL = os.environ.get('INQUIRY_EVENTS_REDIS_URL', os.environ.get('REDIS_URL'))
+INQUIRY_EVENTS_HEARTBEAT = 15 # Seconds between keep-alive comments on an idle stream
+INQUIRY_EVENTS_QUEUE_SIZE = 100 # Undelivered events buffered per stream before new ones are dropped
+INQUIRY_EVENTS_TICKET_TIMEOUT = 30 # Seconds a stream ticket (InquiryStreamTicketView) can be redeemed
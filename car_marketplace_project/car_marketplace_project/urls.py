@@ -22,6 +22,8 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
+from .compression import uncompressed
+
 urlpatterns = [
     path('admin/', admin.site.urls),
 
@@ -31,6 +33,6 @@ urlpatterns = [
     path('api/', include('inquiries.urls')), # Make sure this is present for inquiries
 
     # JWT Authentication Endpoints
-    path('api/auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'), # <--- CORRECTED THIS LINE
-    path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/auth/token/', uncompressed(TokenObtainPairView.as_view()), name='token_obtain_pair'), # <--- CORRECTED THIS LINE
+    path('api/auth/token/refresh/', uncompressed(TokenRefreshView.as_view()), name='token_refresh'),
 ]
\ No newline at end of file
@@ -1,8 +1,13 @@
 from django.contrib import admin
 
 # Register your models here.
+from django.conf import settings
 from django.contrib import admin
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from .models import Brand, CarModel, Car, CarImage
+from .moderation import moderate
+from .changelist import AutocompleteFilter, AutocompleteFilterMixin, DecadeListFilter, EstimatedCountPaginator
 from django.utils.html import format_html
 
 class CarImageInline(admin.TabularInline):
@@ -10,18 +15,25 @@ class CarImageInline(admin.TabularInline):
     extra = 1 # Number of empty forms to display
 
 @admin.register(Car)
-class CarAdmin(admin.ModelAdmin):
+class CarAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     list_display = (
         'title', 'brand', 'model', 'price', 'year', 'seller',
         'is_approved', 'created_at', 'view_images_link'
     )
-    list_filter = ('is_approved', 'brand', 'model', 'fuel_type', 'transmission', 'condition', 'year')
+    list_select_related = ('brand', 'model__brand', 'seller') # CarModel.__str__ reads its brand
+    list_filter = (
+        'is_approved', ('brand', AutocompleteFilter), ('model', AutocompleteFilter), ('seller', AutocompleteFilter),
+        'fuel_type', 'transmission', 'condition', DecadeListFilter,
+        ('created_at', admin.DateFieldListFilter), # Fixed ranges from now; no MIN/MAX or distinct dates over the table
+    )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False # Skips a second COUNT(*) over the whole table when filtering
     search_fields = ('title', 'description', 'seller__username', 'brand__name', 'model__name')
-    date_hierarchy = 'created_at'
     ordering = ('-created_at',)
     inlines = [CarImageInline]
     actions = ['approve_selected_cars', 'reject_selected_cars']
     raw_id_fields = ('brand', 'model', 'seller') # For easier selection if many brands/models/users
+    readonly_fields = ('rejected_at',)
 
     fieldsets = (
         (None, {
@@ -35,29 +47,33 @@ class CarAdmin(admin.ModelAdmin):
             'description': 'This car is listed by this user.'
         }),
         ('Approval Status', {
-            'fields': ('is_approved',),
+            'fields': ('is_approved', 'rejected_at'),
             'description': 'Admin approval is required for the car to be visible on the public site.'
         }),
     )
 
+    def get_queryset(self, request):
+        image_count = CarImage.objects.filter(car=OuterRef('pk')).order_by().values('car').annotate(count=Count('pk')).values('count')
+        return super().get_queryset(request).annotate(image_count=Coalesce(Subquery(image_count), 0))
+
+    @admin.display(description="Images", ordering='image_count')
     def view_images_link(self, obj):
-        if obj.images.exists():
+        if obj.image_count:
             return format_html('<a href="{}">View Images ({})</a>',
-                               obj.get_admin_url(), # Placeholder, you might need a custom URL
-                               obj.images.count())
+                               self.get_admin_url(obj), # Placeholder, you might need a custom URL
+                               obj.image_count)
         return "No Images"
-    view_images_link.short_description = "Images"
 
 
     @admin.action(description="Approve selected cars")
     def approve_selected_cars(self, request, queryset):
-        updated_count = queryset.update(is_approved=True)
-        self.message_user(request, f"{updated_count} cars successfully approved.")
+        summary = moderate(queryset.values_list('pk', flat=True), approve=True, chunk_size=settings.CAR_MODERATION_CHUNK_SIZE)
+        self.message_user(request, f"{summary['updated']} cars successfully approved.")
 
     @admin.action(description="Reject selected cars")
     def reject_selected_cars(self, request, queryset):
-        updated_count = queryset.update(is_approved=False)
-        self.message_user(request, f"{updated_count} cars successfully rejected.")
+        summary = moderate(queryset.values_list('pk', flat=True), approve=False, chunk_size=settings.CAR_MODERATION_CHUNK_SIZE)
+        self.message_user(request, f"{summary['updated']} cars successfully rejected.")
 
 # Custom admin site URL for Car images - needs to be handled in frontend/admin
 # This is a conceptual link. For Django admin itself, images are displayed in the inline.
@@ -69,7 +85,15 @@ class CarAdmin(admin.ModelAdmin):
         return f"/admin/cars/car/{obj.id}/change/"
 
 
-admin.site.register(Brand)
-admin.site.register(CarModel)
+@admin.register(Brand)
+class BrandAdmin(admin.ModelAdmin):
+    search_fields = ('name',) # Also serves the autocomplete filters
+
+
+@admin.register(CarModel)
+class CarModelAdmin(admin.ModelAdmin):
+    list_display = ('name', 'brand')
+    list_select_related = ('brand',)
+    search_fields = ('name', 'brand__name')
 # CarImage is managed via Car inline, no need to register separately unless for direct manipulation
 # admin.site.register(CarImage)
\ No newline at end of file
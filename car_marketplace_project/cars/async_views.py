@@ -0,0 +1,155 @@
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from django.utils.decorators import classonlymethod
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from car_marketplace_project import compression
+from car_marketplace_project.authentication import aauthenticate
+from .views import BrandViewSet, CarModelViewSet, CarViewSet
+
+
+class AsyncReadMixin:
+    """
+    Serves a catalog viewset's GET actions from a coroutine, for ASGI deployments.
+
+    Everything but the I/O is the wrapped viewset's own code: querysets, filters,
+    serializers, permissions, pagination links and the anonymous response cache /
+    ETag logic. Queries go through the async ORM (`aget`, `aiterator`, `acount`,
+    `aaggregate`) and cache calls through the async cache API, and the response is
+    rendered here, so Django never has to push the view through `sync_to_async`.
+
+    Routes are wired with `fallback_view` (see cars.urls): any other method on the same
+    URL, such as the writes, is handed to the regular sync viewset.
+    """
+    fallback_view = None
+    # ModelChoiceFilter validation looks the chosen row up, synchronously.
+    sync_filter_params = ('brand', 'model')
+
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        return markcoroutinefunction(super().as_view(actions, **initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.fallback_view is not None and request.method not in ('GET', 'HEAD'):
+            return await sync_to_async(self.fallback_view)(request, *args, **kwargs)
+
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        cache_key = None
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            cache_key = await self.aget_response_cache_key(request)
+            cached = await cache.aget(cache_key) if cache_key else None
+            if cached is not None:
+                response = self.cached_response(request, cached)
+            else:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+                response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        response = self.finalize_response(request, response, *args, **kwargs)
+        await self.arender(response)
+        if cache_key and response.status_code == 200 and not response.has_header('X-Cache'):
+            entry = self.response_cache_entry(response)
+            await cache.aset(cache_key, entry, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 600))
+            compression.compress_response(request, response, entry['encoded'])
+            response['X-Cache'] = 'MISS'
+        self.response = self.as_plain_response(response)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        request.user, request.auth = await aauthenticate(request)
+        self.initial(request, *args, **kwargs)
+
+    def get_response_cache_key(self, request):
+        return None # Looked up by dispatch through the async cache API
+
+    async def arender(self, response):
+        if not hasattr(response, 'render') or response.is_rendered:
+            return
+        if response.accepted_renderer.format == 'json':
+            response.render()
+        else:
+            await sync_to_async(response.render)() # The browsable API builds its forms from the database
+
+    def as_plain_response(self, response):
+        """An already rendered HttpResponse; Django would render a Response in a thread."""
+        if not hasattr(response, 'render'):
+            return response
+        plain = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            plain[header] = value
+        return plain
+
+    async def afilter_queryset(self, queryset):
+        if any(param in self.request.query_params for param in self.sync_filter_params):
+            return await sync_to_async(self.filter_queryset)(queryset)
+        return self.filter_queryset(queryset)
+
+    async def acheck_conditional(self, request, queryset):
+        """ConditionalGetMixin's 304 check, for viewsets that use it."""
+        if self.action not in getattr(self, 'conditional_actions', ()):
+            return None
+        is_keyset_request = getattr(self.paginator, 'is_keyset_request', None)
+        if self.action == 'list' and is_keyset_request and is_keyset_request(request):
+            return None
+        return await self.acheck_not_modified(request, queryset)
+
+    async def list(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        not_modified = await self.acheck_conditional(request, queryset)
+        if not_modified is not None:
+            return not_modified
+
+        if self.paginator is not None:
+            source = self.get_page_source(queryset) if hasattr(self, 'get_page_source') else queryset
+            page = await self.paginator.apaginate_queryset(source, request, view=self)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        rows = [obj async for obj in queryset.aiterator(chunk_size=2000)]
+        return Response(self.get_serializer(rows, many=True).data)
+
+    async def retrieve(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        not_modified = await self.acheck_conditional(request, queryset.filter(**filter_kwargs))
+        if not_modified is not None:
+            return not_modified
+
+        try:
+            instance = await queryset.aget(**filter_kwargs)
+        except queryset.model.DoesNotExist:
+            raise Http404("No %s matches the given query." % queryset.model._meta.object_name)
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(request, instance)
+        return Response(self.get_serializer(instance).data)
+
+
+class AsyncBrandViewSet(AsyncReadMixin, BrandViewSet):
+    pass
+
+
+class AsyncCarModelViewSet(AsyncReadMixin, CarModelViewSet):
+    pass # CarModelViewSet already joins the nested brand, which a coroutine could not lazy-load
+
+
+class AsyncCarViewSet(AsyncReadMixin, CarViewSet):
+    @action(detail=False, methods=['get'])
+    async def compare(self, request):
+        cars = self.get_compare_queryset()
+        not_modified = await self.acheck_not_modified(request, cars)
+        if not_modified is not None:
+            return not_modified
+        # Images are prefetched per chunk, in the same pass as the cars.
+        cars = [car async for car in self.setup_eager_loading(cars).aiterator(chunk_size=100)]
+        return Response(self.get_serializer(cars, many=True).data)
@@ -0,0 +1,196 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Car
+from .taxonomy import get_taxonomy
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+def load_model_counts(model_ids=None):
+    """Approved listings per model id (all models, or just `model_ids`)."""
+    cars = Car.objects.filter(is_approved=True)
+    if model_ids is not None:
+        cars = cars.filter(model_id__in=model_ids)
+    return dict(cars.order_by().values_list('model_id').annotate(count=Count('pk')))
+
+
+class ListingCounts:
+    """Approved listings per model and per brand, with what has been derived from them so far."""
+
+    def __init__(self, model, brand):
+        self.model = model
+        self.brand = brand
+        self.ranked = None # Every target, most listings first; built on first need
+        self.results = {} # (prefix, limit) -> suggestions
+
+    def __getitem__(self, kind):
+        return self.model if kind == 'model' else self.brand
+
+
+class AutocompleteIndex:
+    """
+    Sorted array of normalized keys (brand names, model names and "brand model") over one
+    cars.taxonomy snapshot, searched by prefix with bisect and ranked by approved listings.
+    Counts are per model; a brand's count is the sum of its models'.
+
+    A narrow prefix scans its bisected key range. A wide one (a letter or two can match
+    most keys) walks the targets in rank order instead and stops at `limit` matches.
+    Results are memoized per prefix until the counts change.
+    """
+    max_cached_results = 10000
+
+    def __init__(self, taxonomy, model_counts, loaded_at=None):
+        self.taxonomy = taxonomy
+        self.loaded_at = time.monotonic() if loaded_at is None else loaded_at
+        entries = []
+        self.target_keys = {}
+        for brand in taxonomy.brands.values():
+            key = normalize(brand['name'])
+            entries.append((key, 'brand', brand['id']))
+            self.target_keys[('brand', brand['id'])] = (key,)
+        for model in taxonomy.models.values():
+            brand = taxonomy.brands[model['brand_id']]
+            keys = (normalize(model['name']), normalize(f"{brand['name']} {model['name']}"))
+            entries.extend((key, 'model', model['id']) for key in keys)
+            self.target_keys[('model', model['id'])] = keys
+        entries.sort()
+        self.keys = [key for key, _, _ in entries]
+        self.targets = [(kind, pk) for _, kind, pk in entries]
+        self.set_counts(model_counts)
+
+    def set_counts(self, model_counts):
+        brand_counts = dict.fromkeys(self.taxonomy.brands, 0)
+        for model_id, count in model_counts.items():
+            model = self.taxonomy.models.get(model_id)
+            if model is not None:
+                brand_counts[model['brand_id']] += count
+        # Swapped in whole, so a concurrent search sees either the old or the new counts.
+        self.counts = ListingCounts(model_counts, brand_counts)
+
+    @property
+    def model_counts(self):
+        return self.counts.model
+
+    def update_counts(self, counts, model_ids):
+        """
+        Apply fresh counts for `model_ids`, moving only their entries (and their brands') in
+        the ranking. Callers hold the module lock (recount_models).
+        """
+        old = self.counts
+        model_counts, brand_counts = dict(old.model), dict(old.brand)
+        moved = set()
+        for model_id in model_ids:
+            model = self.taxonomy.models.get(model_id)
+            before, after = old.model.get(model_id, 0), counts.get(model_id, 0)
+            if model is None or before == after:
+                continue
+            model_counts[model_id] = after
+            brand_counts[model['brand_id']] += after - before
+            moved.update((('model', model_id), ('brand', model['brand_id'])))
+        if not moved:
+            return
+        new = ListingCounts(model_counts, brand_counts)
+        if old.ranked is not None:
+            ranked = list(old.ranked)
+            for kind, pk in moved:
+                del ranked[bisect_left(ranked, (-old[kind].get(pk, 0), kind, pk))]
+            for kind, pk in moved:
+                insort(ranked, (-new[kind].get(pk, 0), kind, pk))
+            new.ranked = ranked
+        self.counts = new
+
+    def search(self, query, limit=10):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        counts = self.counts
+        cached = counts.results.get((prefix, limit))
+        if cached is None:
+            start = bisect_left(self.keys, prefix)
+            stop = bisect_left(self.keys, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+            # Scanning costs the range; walking costs about len(keys) * limit / range.
+            if (stop - start) ** 2 > len(self.keys) * limit:
+                ranked = self.walk_ranked(counts, prefix, limit)
+            else:
+                matches = set(self.targets[start:stop])
+                ranked = heapq.nsmallest(limit, ((-counts[kind].get(pk, 0), kind, pk) for kind, pk in matches))
+            cached = [self.describe(kind, pk, -negated) for negated, kind, pk in ranked]
+            if len(counts.results) >= self.max_cached_results:
+                counts.results.clear()
+            counts.results[(prefix, limit)] = cached
+        return cached
+
+    def walk_ranked(self, counts, prefix, limit):
+        if counts.ranked is None:
+            counts.ranked = sorted((-counts[kind].get(pk, 0), kind, pk) for kind, pk in self.target_keys)
+        found = []
+        for entry in counts.ranked:
+            if any(key.startswith(prefix) for key in self.target_keys[entry[1:]]):
+                found.append(entry)
+                if len(found) == limit:
+                    break
+        return found
+
+    def describe(self, kind, pk, listings):
+        if kind == 'brand':
+            return {'type': 'brand', 'id': pk, 'brand_id': pk, 'label': self.taxonomy.brands[pk]['name'], 'listings': listings}
+        model = self.taxonomy.models[pk]
+        brand = self.taxonomy.brands[model['brand_id']]
+        return {
+            'type': 'model', 'id': pk, 'brand_id': brand['id'],
+            'label': f"{brand['name']} {model['name']}", 'listings': listings,
+        }
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_index():
+    """
+    This process's index. A brand/model write (a new taxonomy snapshot) re-sorts the keys
+    and keeps the counts; the counts themselves are reloaded after
+    CAR_AUTOCOMPLETE_COUNTS_TTL seconds, which is how writes made by other processes show up.
+    """
+    global _index
+    taxonomy = get_taxonomy()
+    index = _index
+    ttl = getattr(settings, 'CAR_AUTOCOMPLETE_COUNTS_TTL', 300)
+    if index is None or index.taxonomy is not taxonomy or time.monotonic() - index.loaded_at > ttl:
+        with _lock:
+            index = _index
+            if index is None or time.monotonic() - index.loaded_at > ttl:
+                index = _index = AutocompleteIndex(taxonomy, load_model_counts())
+            elif index.taxonomy is not taxonomy:
+                index = _index = AutocompleteIndex(taxonomy, index.model_counts, index.loaded_at)
+    return index
+
+
+def recount_models(model_ids):
+    """
+    Refresh the counts of `model_ids` in this process's index, if it has one. Read and
+    applied under the index lock, like a reload: update_counts copies the counts it
+    replaces, so two recounts at once would otherwise drop one, or apply an older read last.
+    """
+    if _index is not None and model_ids:
+        with _lock:
+            _index.update_counts(load_model_counts(model_ids), model_ids)
+
+
+def recount_models_on_commit(model_ids):
+    if _index is not None:
+        transaction.on_commit(lambda: recount_models(model_ids))
+
+
+def recount_cars(car_ids):
+    if _index is not None:
+        recount_models(set(Car.objects.filter(pk__in=car_ids).values_list('model_id', flat=True)))
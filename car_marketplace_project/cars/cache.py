@@ -0,0 +1,177 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from car_marketplace_project import compression
+
+# Query parameters that change how a result is paged or sorted, not what it contains.
+NON_FILTER_PARAMS = {'page', 'page_size', 'ordering', 'pagination', 'cursor', 'format'}
+
+
+def generation_key(name):
+    return f'cars:generation:{name}'
+
+
+def get_generations(*names):
+    """
+    Current generation numbers for `names` ('cars', 'car_images', 'brands', 'car_models'),
+    fetched in one round trip. Cache keys embed them, so bumping a generation invalidates
+    every dependent entry at once without enumerating them.
+    """
+    found = cache.get_many([generation_key(name) for name in names])
+    generations = []
+    for name in names:
+        generation = found.get(generation_key(name))
+        if generation is None:
+            # Seed from the clock so an evicted counter never reuses an old generation.
+            generation = int(time.time() * 1000)
+            if not cache.add(generation_key(name), generation, timeout=None):
+                generation = cache.get(generation_key(name), generation)
+        generations.append(generation)
+    return generations
+
+
+async def aget_generations(*names):
+    """Async counterpart of get_generations for the async read views."""
+    found = await cache.aget_many([generation_key(name) for name in names])
+    generations = []
+    for name in names:
+        generation = found.get(generation_key(name))
+        if generation is None:
+            generation = int(time.time() * 1000)
+            if not await cache.aadd(generation_key(name), generation, timeout=None):
+                generation = await cache.aget(generation_key(name), generation)
+        generations.append(generation)
+    return generations
+
+
+def get_generation(name):
+    return get_generations(name)[0]
+
+
+def generation_token(*names):
+    return '.'.join(str(generation) for generation in get_generations(*names))
+
+
+async def ageneration_token(*names):
+    return '.'.join(str(generation) for generation in await aget_generations(*names))
+
+
+def bump_generation(*names):
+    for name in names:
+        try:
+            cache.incr(generation_key(name))
+        except ValueError:
+            cache.set(generation_key(name), int(time.time() * 1000), timeout=None)
+
+
+def bump_generation_on_commit(*names):
+    """Bump once the surrounding transaction commits, so readers never re-cache pre-commit data."""
+    transaction.on_commit(lambda: bump_generation(*names))
+
+
+def normalize_query_params(query_params, ignore=NON_FILTER_PARAMS):
+    """Stable digest of a QueryDict: keys and repeated values sorted, paging/sorting params dropped."""
+    items = sorted(
+        (key, sorted(query_params.getlist(key)))
+        for key in query_params.keys() if key not in ignore
+    )
+    return hashlib.md5(repr(items).encode('utf-8')).hexdigest()
+
+
+def visibility_scope(user):
+    """Which CarViewSet.get_queryset branch a user falls into; part of every cache key."""
+    if user.is_authenticated and user.is_staff:
+        return 'staff'
+    if user.is_authenticated and user.is_seller:
+        return f'seller:{user.pk}'
+    return 'public'
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Caches rendered responses of anonymous GETs for the actions in `response_cache_actions`.
+
+    Guests all see the same approved-only data, so the rendered body is keyed only by the
+    action, the negotiated media type, the full query string and the generations of the
+    models in `response_cache_generations`. A write to any of those models bumps its
+    generation (see cars.signals) and every dependent entry becomes unreachable.
+    Entries also hold the body's gzip/brotli encodings, compressed once when stored.
+    """
+    response_cache_generations = ()
+    response_cache_actions = ('list', 'retrieve')
+
+    def is_response_cacheable(self, request):
+        return (
+            request.method == 'GET' and not request.user.is_authenticated
+            and self.action in self.response_cache_actions and request.accepted_renderer.format == 'json'
+        )
+
+    def format_response_cache_key(self, request, token):
+        variant = hashlib.md5('{} {} {}'.format(
+            request.accepted_media_type, request.path, normalize_query_params(request.query_params, ignore=()),
+        ).encode('utf-8')).hexdigest()
+        return 'cars:response:{}:{}:{}:{}'.format(self.basename, self.action, token, variant)
+
+    def get_response_cache_key(self, request):
+        if not self.is_response_cacheable(request):
+            return None
+        return self.format_response_cache_key(request, generation_token(*self.response_cache_generations))
+
+    async def aget_response_cache_key(self, request):
+        if not self.is_response_cacheable(request):
+            return None
+        return self.format_response_cache_key(request, await ageneration_token(*self.response_cache_generations))
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.response_cache_key = self.get_response_cache_key(request)
+
+    def cached_response(self, request, cached):
+        response = HttpResponse(cached['content'], content_type=cached['content_type'])
+        for header, value in cached['headers'].items():
+            response[header] = value
+        response['X-Cache'] = 'HIT'
+        # Validators were stored with the body, so a revalidation needs no query at all.
+        response = get_conditional_response(
+            request, etag=cached['headers'].get('ETag'),
+            last_modified=parse_http_date_safe(cached['headers'].get('Last-Modified', '')),
+            response=response,
+        )
+        return compression.compress_response(request, response, cached.get('encoded')) # Older entries: compressed now
+
+    def response_cache_entry(self, response):
+        return {
+            'content': response.content, 'content_type': response['Content-Type'],
+            'headers': {header: response[header] for header in ('ETag', 'Last-Modified') if response.has_header(header)},
+            'encoded': compression.encode_all(response.content),
+        }
+
+    def handler_for_cache(self, handler, request, *args, **kwargs):
+        cached = cache.get(self.response_cache_key) if self.response_cache_key else None
+        if cached is not None:
+            return self.cached_response(request, cached)
+        return handler(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        return self.handler_for_cache(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.handler_for_cache(super().retrieve, request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        cache_key = getattr(self, 'response_cache_key', None)
+        if cache_key and response.status_code == 200 and not response.has_header('X-Cache'):
+            response.render()
+            entry = self.response_cache_entry(response)
+            cache.set(cache_key, entry, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 600))
+            compression.compress_response(request, response, entry['encoded'])
+            response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,121 @@
+import csv
+import datetime
+from io import StringIO
+from itertools import islice
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
+
+from car_marketplace_project.renderers import FastJSONRenderer
+from .models import Car
+from .serializers import storage_url
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+EXPORT_CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'jsonl': 'application/x-ndjson'}
+
+# Export column -> Car field. Columns the importer reads keep its names, so an export is a valid feed.
+EXPORT_COLUMNS = {
+    'id': 'id', 'title': 'title', 'brand': 'brand_name', 'model': 'model_name', 'price': 'price',
+    'fuel_type': 'fuel_type', 'year': 'year', 'transmission': 'transmission', 'condition': 'condition',
+    'mileage': 'mileage', 'engine_type': 'engine_type', 'description': 'description',
+    'seller': 'seller_username', 'image': 'primary_image', 'created_at': 'created_at', 'updated_at': 'updated_at',
+}
+
+
+def parse_updated_since(value):
+    """
+    An ISO 8601 datetime, or a date (its midnight); naive values are in TIME_ZONE.
+    Raises ValueError for anything else.
+    """
+    value = value.strip().replace(' ', '+') # An unencoded "+05:30" offset arrives as " 05:30"
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Not an ISO 8601 date or datetime: {value!r}")
+        parsed = datetime.datetime.combine(day, datetime.time())
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+class CarExporter:
+    """
+    Approved cars as CSV or JSON Lines, iterated as encoded chunks of `chunk_size` rows.
+
+    Rows come off one values() iterator (a server-side cursor on PostgreSQL) in
+    updated_at, id order over car_approved_updated_idx, so memory stays flat however many
+    cars there are. Iterate it with `for` under WSGI and `async for` under ASGI, where
+    Django would otherwise collect a sync iterator whole before sending a byte.
+    With `updated_since`, only cars changed at or after it are exported:
+    a mirror passes the last updated_at it saw and upserts by id. Cars that were deleted
+    or unapproved in the meantime are not in a delta; only a full export drops them.
+    """
+
+    def __init__(self, fmt, updated_since=None, request=None, chunk_size=2000):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format {fmt!r}; expected one of {EXPORT_FORMATS}.")
+        self.fmt = fmt
+        self.updated_since = updated_since
+        self.request = request
+        self.chunk_size = chunk_size
+        self.exported = 0
+        self.header_pending = fmt == 'csv'
+        # The same representations as the API: decimal strings and local-time ISO 8601.
+        self.timestamp = serializers.DateTimeField()
+        self.renderer = FastJSONRenderer()
+
+    @property
+    def content_type(self):
+        return EXPORT_CONTENT_TYPES[self.fmt]
+
+    @property
+    def filename(self):
+        suffix = '-since-' + self.updated_since.strftime('%Y%m%dT%H%M%S') if self.updated_since else ''
+        return f"cars{suffix}.{self.fmt}"
+
+    def get_queryset(self):
+        cars = Car.objects.filter(is_approved=True)
+        if self.updated_since is not None:
+            cars = cars.filter(updated_at__gte=self.updated_since)
+        # values(), not values_list(): the latter's iterable runs its query as soon as aiterator()
+        # builds it, in the event loop (SynchronousOnlyOperation).
+        return cars.order_by('updated_at', 'id').values(*EXPORT_COLUMNS.values())
+
+    def format_row(self, values):
+        row = {column: values[field] for column, field in EXPORT_COLUMNS.items()}
+        row['price'] = str(row['price'])
+        row['image'] = storage_url(self.request, row['image']) if row['image'] else None
+        row['created_at'] = self.timestamp.to_representation(row['created_at'])
+        row['updated_at'] = self.timestamp.to_representation(row['updated_at'])
+        return row
+
+    def encode(self, chunk):
+        """One streamed chunk from a list of get_queryset() rows; the CSV header leads the first."""
+        rows = [self.format_row(values) for values in chunk]
+        self.exported += len(rows)
+        if self.fmt == 'jsonl':
+            return b''.join(self.renderer.render(row) + b'\n' for row in rows)
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        if self.header_pending:
+            writer.writerow(EXPORT_COLUMNS)
+            self.header_pending = False
+        writer.writerows(row.values() for row in rows)
+        return buffer.getvalue().encode('utf-8')
+
+    def __iter__(self):
+        values = self.get_queryset().iterator(chunk_size=self.chunk_size)
+        while chunk := list(islice(values, self.chunk_size)):
+            yield self.encode(chunk)
+        if self.header_pending:
+            yield self.encode([]) # No rows: just the header
+
+    async def __aiter__(self):
+        chunk = []
+        async for values in self.get_queryset().aiterator(chunk_size=self.chunk_size):
+            chunk.append(values)
+            if len(chunk) == self.chunk_size:
+                yield self.encode(chunk)
+                chunk = []
+        if chunk or self.header_pending:
+            yield self.encode(chunk)
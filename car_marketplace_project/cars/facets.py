@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F, IntegerField
+from django.db.models.functions import Cast, Floor
+
+from .models import Car
+
+PRICE_BUCKET_SIZE = getattr(settings, 'CAR_FACET_PRICE_BUCKET', 100000)
+MILEAGE_BUCKET_SIZE = getattr(settings, 'CAR_FACET_MILEAGE_BUCKET', 10000)
+
+# Facet name -> columns of the grouping set that produces it.
+FACET_COLUMNS = {
+    'brand': ('brand_id', 'brand_name'),
+    'fuel_type': ('fuel_type',),
+    'transmission': ('transmission',),
+    'condition': ('condition',),
+    'year': ('year',),
+    'price': ('price_bucket',),
+    'mileage': ('mileage_bucket',),
+}
+
+
+def facet_source(queryset):
+    """The filtered rows reduced to the columns that facets group on."""
+    # brand_name is denormalized onto Car, so this stays a single-table scan.
+    return queryset.select_related(None).prefetch_related(None).order_by().annotate(
+        price_bucket=Cast(Floor(F('price') / PRICE_BUCKET_SIZE), IntegerField()),
+        mileage_bucket=Cast(Floor(F('mileage') / MILEAGE_BUCKET_SIZE), IntegerField()),
+    ).values('id', 'brand_id', 'brand_name', 'fuel_type', 'transmission', 'condition', 'year', 'price_bucket', 'mileage_bucket')
+
+
+def grouped_counts(queryset):
+    """Yield (facet, row, count) for every facet of the filtered queryset."""
+    source = facet_source(queryset)
+    if connection.vendor == 'postgresql':
+        # One scan of the filtered rows: GROUPING SETS computes every facet in a single pass.
+        inner_sql, params = source.query.sql_with_params()
+        columns = [column for group in FACET_COLUMNS.values() for column in group]
+        grouping = ', '.join(f"({', '.join(group)})" for group in FACET_COLUMNS.values())
+        grouping_flags = ', '.join(f'GROUPING({group[0]})' for group in FACET_COLUMNS.values())
+        sql = (
+            f"SELECT {', '.join(columns)}, {grouping_flags}, COUNT(*) FROM ({inner_sql}) AS facet_source "
+            f"GROUP BY GROUPING SETS ({grouping})"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            for record in cursor.fetchall():
+                row = dict(zip(columns, record))
+                flags = record[len(columns):-1]
+                facet = list(FACET_COLUMNS)[flags.index(0)] # GROUPING() is 0 for the set's own column
+                yield facet, row, record[-1]
+    else:
+        for facet, group in FACET_COLUMNS.items():
+            for row in source.values(*group).annotate(count=Count('id')).order_by():
+                yield facet, row, row['count']
+
+
+def compute_facets(queryset):
+    labels = {
+        'fuel_type': dict(Car.FUEL_CHOICES),
+        'transmission': dict(Car.TRANSMISSION_CHOICES),
+        'condition': dict(Car.CONDITION_CHOICES),
+    }
+    facets = {facet: [] for facet in FACET_COLUMNS}
+    for facet, row, count in grouped_counts(queryset):
+        if facet == 'brand':
+            facets[facet].append({'value': row['brand_id'], 'label': row['brand_name'], 'count': count})
+        elif facet in labels:
+            value = row[facet]
+            facets[facet].append({'value': value, 'label': labels[facet].get(value, value), 'count': count})
+        elif facet == 'year':
+            facets[facet].append({'value': row['year'], 'count': count})
+        else:
+            size = PRICE_BUCKET_SIZE if facet == 'price' else MILEAGE_BUCKET_SIZE
+            start = int(row[FACET_COLUMNS[facet][0]]) * size
+            facets[facet].append({'min': start, 'max': start + size, 'count': count})
+
+    for facet, entries in facets.items():
+        if facet == 'brand':
+            entries.sort(key=lambda entry: (-entry['count'], entry['label']))
+        elif facet in ('price', 'mileage'):
+            entries.sort(key=lambda entry: entry['min'])
+        elif facet == 'year':
+            entries.sort(key=lambda entry: -entry['value'])
+        else:
+            entries.sort(key=lambda entry: -entry['count'])
+    facets['count'] = sum(entry['count'] for entry in facets['condition'])
+    return facets
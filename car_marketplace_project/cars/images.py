@@ -0,0 +1,108 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .cache import bump_generation
+from .models import Car, CarImage
+from .summaries import refresh_summaries
+
+logger = logging.getLogger(__name__)
+
+# name -> bounding box; each size is written as JPEG and WebP.
+VARIANT_SIZES = getattr(settings, 'CAR_IMAGE_VARIANT_SIZES', {
+    'thumb': (320, 240),
+    'medium': (800, 600),
+    'large': (1600, 1200),
+})
+VARIANT_FORMATS = {
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+}
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'CAR_IMAGE_VARIANT_WORKERS', 2),
+            thread_name_prefix='car-image-variants',
+        )
+    return _executor
+
+
+def render_variants(car_image):
+    """
+    Write every size/format rendition of `car_image.image` to storage.
+    Returns (width, height, variants) ready to be stored on the row.
+    """
+    storage = car_image.image.storage
+    with car_image.image.open('rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+    width, height = original.size
+    if original.mode not in ('RGB', 'L'):
+        original = original.convert('RGB')
+
+    stem = posixpath.splitext(posixpath.basename(car_image.image.name))[0]
+    sizes = {}
+    for name, box in VARIANT_SIZES.items():
+        rendition = original.copy()
+        rendition.thumbnail(box, Image.LANCZOS)
+        entry = {'width': rendition.width, 'height': rendition.height}
+        for fmt, (pil_format, extension, options) in VARIANT_FORMATS.items():
+            buffer = BytesIO()
+            rendition.save(buffer, pil_format, **options)
+            path = f'car_images/variants/{car_image.pk}/{stem}_{name}.{extension}'
+            if storage.exists(path):
+                storage.delete(path)
+            entry[fmt] = storage.save(path, ContentFile(buffer.getvalue()))
+        sizes[name] = entry
+    return width, height, {'source': car_image.image.name, 'sizes': sizes}
+
+
+def generate_variants(image_id):
+    """Render and record the variants of one CarImage. Safe to call from a worker thread."""
+    try:
+        car_image = CarImage.objects.filter(pk=image_id).first()
+        if car_image is None or not car_image.image:
+            return False
+        width, height, variants = render_variants(car_image)
+        # update() so the post_save hook does not schedule us again.
+        CarImage.objects.filter(pk=image_id, image=car_image.image.name).update(
+            width=width, height=height, variants=variants,
+        )
+        refresh_summaries(Car.objects.filter(pk=car_image.car_id), fields=('primary_image', 'primary_image_webp'))
+        bump_generation('car_images')
+        return True
+    except Exception:
+        logger.exception("Could not generate variants for CarImage %s", image_id)
+        return False
+
+
+def _generate_in_worker(image_id):
+    close_old_connections()
+    try:
+        return generate_variants(image_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(car_image):
+    """Generate variants once the upload is committed: in the background, or inline if disabled."""
+    image_id = car_image.pk
+    if getattr(settings, 'CAR_IMAGE_VARIANTS_ASYNC', True):
+        transaction.on_commit(lambda: get_executor().submit(_generate_in_worker, image_id))
+    else:
+        transaction.on_commit(lambda: generate_variants(image_id))
+
+
+def needs_variants(car_image):
+    return bool(car_image.image) and car_image.variants.get('source') != car_image.image.name
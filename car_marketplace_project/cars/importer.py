@@ -0,0 +1,167 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .autocomplete import recount_models_on_commit
+from .cache import bump_generation_on_commit
+from .models import Brand, CarModel, Car
+from .search import refresh_search_vectors
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+
+class CarImportRowSerializer(serializers.ModelSerializer):
+    """
+    Validates one feed row. Brand and model arrive as names and are resolved per chunk by
+    CarImporter, so validating a row never touches the database.
+    """
+    brand = serializers.CharField(max_length=100)
+    model = serializers.CharField(max_length=100)
+
+    class Meta:
+        model = Car
+        fields = [
+            'title', 'brand', 'model', 'price', 'fuel_type', 'year', 'transmission',
+            'condition', 'mileage', 'engine_type', 'description',
+        ]
+
+
+def detect_format(content_type='', filename=''):
+    content_type, filename = (content_type or '').lower(), (filename or '').lower()
+    if 'csv' in content_type or filename.endswith('.csv'):
+        return 'csv'
+    if any(kind in content_type for kind in ('ndjson', 'jsonl', 'json')) or filename.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return None
+
+
+def iter_rows(lines, fmt):
+    """
+    Yield (row_number, dict) from an iterable of text lines, one line at a time.
+    CSV row numbers count the header as row 1; a JSON Lines row is its line number.
+    """
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(lines), start=2):
+            yield number, {key.strip(): value for key, value in row.items() if key is not None}
+    elif fmt == 'jsonl':
+        for number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                row = exc
+            yield number, row
+    else:
+        raise ValueError(f"Unsupported import format {fmt!r}; expected one of {IMPORT_FORMATS}.")
+
+
+def decode_lines(byte_lines, encoding='utf-8'):
+    for line in byte_lines:
+        yield line.decode(encoding) if isinstance(line, bytes) else line
+
+
+class CarImporter:
+    """
+    Streams dealer feed rows into Car with bounded memory.
+
+    Rows are consumed `chunk_size` at a time. For each chunk, rows are validated, brand
+    and model names are resolved with one query each (creating missing ones in bulk),
+    and the valid cars are written with a single bulk_create inside their own
+    transaction. Invalid rows are reported with their row number and never abort the
+    batch; at most `max_errors` error details are kept.
+    """
+
+    def __init__(self, seller, chunk_size=500, approve=False, max_errors=1000):
+        self.seller = seller
+        self.chunk_size = chunk_size
+        self.approve = approve
+        self.max_errors = max_errors
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, rows):
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+        return self.summary()
+
+    def summary(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+    def add_error(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def validate_chunk(self, chunk):
+        valid = []
+        for row_number, row in chunk:
+            if not isinstance(row, dict):
+                self.add_error(row_number, {'non_field_errors': [f"Malformed row: {row}"]})
+                continue
+            serializer = CarImportRowSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((row_number, serializer.validated_data))
+            else:
+                self.add_error(row_number, serializer.errors)
+        return valid
+
+    def resolve_brands(self, names):
+        brands = {brand.name: brand for brand in Brand.objects.filter(name__in=names)}
+        missing = [name for name in names if name not in brands]
+        if missing:
+            Brand.objects.bulk_create([Brand(name=name) for name in missing], ignore_conflicts=True)
+            brands.update((brand.name, brand) for brand in Brand.objects.filter(name__in=missing))
+        return brands
+
+    def resolve_models(self, pairs):
+        brand_ids = {brand_id for brand_id, _ in pairs}
+        names = {name for _, name in pairs}
+        existing = CarModel.objects.filter(brand_id__in=brand_ids, name__in=names)
+        models = {(model.brand_id, model.name): model for model in existing}
+        missing = [pair for pair in pairs if pair not in models]
+        if missing:
+            CarModel.objects.bulk_create(
+                [CarModel(brand_id=brand_id, name=name) for brand_id, name in missing], ignore_conflicts=True,
+            )
+            created = CarModel.objects.filter(brand_id__in={b for b, _ in missing}, name__in={n for _, n in missing})
+            models.update(((model.brand_id, model.name), model) for model in created)
+        return models
+
+    def import_chunk(self, chunk):
+        valid = self.validate_chunk(chunk)
+        if not valid:
+            return
+        with transaction.atomic():
+            brands = self.resolve_brands(sorted({data['brand'] for _, data in valid}))
+            models = self.resolve_models(sorted({(brands[data['brand']].pk, data['model']) for _, data in valid}))
+            cars = []
+            for _, data in valid:
+                brand = brands[data.pop('brand')]
+                model = models[(brand.pk, data.pop('model'))]
+                cars.append(Car(
+                    seller=self.seller, brand=brand, model=model, is_approved=self.approve,
+                    # bulk_create skips the pre_save hook that fills the listing summary.
+                    brand_name=brand.name, model_name=model.name, seller_username=self.seller.username,
+                    **data
+                ))
+            created = Car.objects.bulk_create(cars)
+            refresh_search_vectors(Car.objects.filter(pk__in=[car.pk for car in created]))
+            bump_generation_on_commit('cars', 'brands', 'car_models')
+            if self.approve:
+                recount_models_on_commit({car.model_id for car in created})
+        self.created += len(created)
@@ -0,0 +1,123 @@
+import asyncio
+import statistics
+import time
+import types
+from urllib.parse import urlencode
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import include, path
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from cars import urls as cars_urls
+from cars.models import Car
+from users.models import User
+
+
+def urlconf(name, patterns):
+    module = types.ModuleType(name)
+    module.urlpatterns = [path('api/', include(patterns))]
+    return module
+
+
+STACKS = [
+    ('sync', urlconf('benchmark_sync_urls', cars_urls.sync_urlpatterns)),
+    ('async', urlconf('benchmark_async_urls', cars_urls.async_urlpatterns + cars_urls.sync_urlpatterns)),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the catalog reads (car list/detail/compare, brands, models) through the ASGI "
+        "application, once with the sync viewsets and once with cars.async_views, and reports "
+        "requests/sec, p50 and p99 per endpoint. Runs against the configured database's existing cars."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint and stack.")
+        parser.add_argument('--concurrency', type=int, default=50, help="Requests in flight at once.")
+        parser.add_argument(
+            '--user', help="Username to send a JWT for. Authenticated requests bypass the anonymous "
+                           "response cache, so every request reaches the database.",
+        )
+
+    def get_endpoints(self):
+        cars = list(Car.objects.filter(is_approved=True).order_by('-created_at').values('pk', 'brand_id')[:3])
+        if not cars:
+            raise CommandError("No approved cars to benchmark; import some first (manage.py import_cars).")
+        return [
+            ('car list', '/api/cars/cars/', {}),
+            ('car list (filtered)', '/api/cars/cars/', {'fuel_type': 'petrol', 'ordering': '-price'}),
+            ('car detail', f"/api/cars/cars/{cars[0]['pk']}/", {}),
+            ('car compare', '/api/cars/cars/compare/', {'ids': ','.join(str(car['pk']) for car in cars)}),
+            ('brands', '/api/cars/brands/', {}),
+            ('models', '/api/cars/models/', {'brand': cars[0]['brand_id']}),
+        ]
+
+    def get_headers(self, username):
+        headers = [(b'host', b'localhost')]
+        if username:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f"No user named {username!r}.")
+            token = str(RefreshToken.for_user(user).access_token)
+            headers.append((b'authorization', f'Bearer {token}'.encode()))
+        return headers
+
+    async def request(self, application, url, params, headers):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': url, 'raw_path': url.encode(), 'query_string': urlencode(params).encode(),
+            'root_path': '', 'headers': headers, 'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+        }
+        body = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        finished = asyncio.Event()
+        status = None
+
+        async def receive():
+            if body:
+                return body.pop()
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+
+        start = time.perf_counter()
+        await application(scope, receive, send)
+        finished.set()
+        return status, (time.perf_counter() - start) * 1000
+
+    async def load(self, application, url, params, headers, total, concurrency):
+        results = []
+        remaining = iter(range(total))
+
+        async def worker():
+            for _ in remaining:
+                results.append(await self.request(application, url, params, headers))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return results, time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        endpoints = self.get_endpoints()
+        headers = self.get_headers(options['user'])
+        application = get_asgi_application()
+        total, concurrency = options['requests'], options['concurrency']
+        self.stdout.write(f"{total} requests per endpoint, {concurrency} in flight\n")
+        self.stdout.write(f"{'endpoint':<22}{'stack':<7}{'req/s':>9}{'p50 ms':>10}{'p99 ms':>10}  errors")
+        for label, url, params in endpoints:
+            for stack, module in STACKS:
+                with override_settings(ROOT_URLCONF=module):
+                    asyncio.run(self.load(application, url, params, headers, min(total, 20), concurrency)) # Warm-up
+                    results, elapsed = asyncio.run(self.load(application, url, params, headers, total, concurrency))
+                timings = sorted(timing for _, timing in results)
+                errors = sum(1 for status, _ in results if status not in (200, 304))
+                p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+                self.stdout.write(
+                    f"{label:<22}{stack:<7}{len(results) / elapsed:9.1f}{statistics.median(timings):10.2f}{p99:10.2f}  {errors}"
+                )
@@ -0,0 +1,65 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ListSerializer
+from rest_framework.test import APIRequestFactory
+
+from cars.models import Car
+from cars.serializers import CarListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Times one car list page, fetch through JSON render, at several page sizes: once the "
+        "DRF way (Car instances through ListSerializer) and once the way the list views do it "
+        "(CarListSerializer.get_rows() through RowListSerializer). Reports the median per page and "
+        "fails if the two ever render different bytes. Runs against the configured database's "
+        "approved cars."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,50,100,250,500', help="Comma-separated page sizes.")
+        parser.add_argument('--repeat', type=int, default=50, help="Timed runs per page size and path.")
+
+    def get_paths(self, context):
+        def instances(cars):
+            cars = list(CarListSerializer.setup_eager_loading(cars))
+            return ListSerializer(cars, child=CarListSerializer(), context=context).data
+
+        def rows(cars):
+            rows = list(CarListSerializer.get_rows(cars))
+            return CarListSerializer(rows, many=True, context=context).data
+
+        return [('instances', instances), ('rows', rows)]
+
+    def measure(self, build, cars, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            content = JSONRenderer().render(build(cars))
+            timings.append((time.perf_counter() - start) * 1000)
+        return content, statistics.median(timings)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        available = Car.objects.filter(is_approved=True).count()
+        if available < max(sizes):
+            raise CommandError(f"Only {available} approved cars; the largest page needs {max(sizes)}.")
+        context = {'request': APIRequestFactory().get('/api/cars/cars/', HTTP_HOST='localhost')}
+        paths = self.get_paths(context)
+        self.stdout.write(f"median of {options['repeat']} runs, fetch + serialize + render\n")
+        self.stdout.write(f"{'page size':>9}" + ''.join(f'{label + " ms":>14}' for label, _ in paths) + f"{'speed-up':>10}")
+        for size in sizes:
+            cars = Car.objects.filter(is_approved=True).order_by('-created_at', '-pk')[:size]
+            results = []
+            for _, build in paths:
+                self.measure(build, cars, 3) # Warm-up
+                results.append(self.measure(build, cars, options['repeat']))
+            if len({content for content, _ in results}) != 1:
+                raise CommandError(f"Page size {size}: the paths rendered different bytes.")
+            timings = [timing for _, timing in results]
+            self.stdout.write(
+                f"{size:>9}" + ''.join(f'{timing:14.2f}' for timing in timings) + f"{timings[0] / timings[-1]:9.2f}x"
+            )
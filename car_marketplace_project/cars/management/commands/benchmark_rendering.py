@@ -0,0 +1,69 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from car_marketplace_project import compression
+from car_marketplace_project.renderers import FastJSONRenderer
+from cars.models import Car
+from cars.serializers import CarListSerializer
+from inquiries.models import Inquiry
+from inquiries.serializers import InquiryListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Times rendering car and inquiry list pages with DRF's JSONRenderer and with "
+        "FastJSONRenderer, and reports each page's size as sent plain, gzip- and (with the "
+        "brotli package) brotli-encoded, with the time each encoding takes. That compression "
+        "time is paid once per cached response. Runs against the configured database's rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,100,500', help="Comma-separated page sizes.")
+        parser.add_argument('--repeat', type=int, default=30, help="Timed runs per measurement.")
+
+    def get_pages(self, sizes, context):
+        cars = Car.objects.filter(is_approved=True).order_by('-created_at', '-pk')
+        inquiries = InquiryListSerializer.setup_eager_loading(Inquiry.objects.order_by('-created_at', '-pk'))
+        for size in sizes:
+            rows = list(CarListSerializer.get_rows(cars[:size]))
+            if rows:
+                yield 'car list', len(rows), CarListSerializer(rows, many=True, context=context).data
+            page = list(inquiries[:size])
+            if page:
+                yield 'inquiry list', len(page), InquiryListSerializer(page, many=True, context=context).data
+
+    def measure(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function()
+            timings.append((time.perf_counter() - start) * 1000)
+        return result, statistics.median(timings)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        context = {'request': APIRequestFactory().get('/api/', HTTP_HOST='localhost')}
+        encodings = compression.get_encodings()
+        repeat = options['repeat']
+        self.stdout.write(f"median of {repeat} runs; sizes in KB, times in ms\n")
+        self.stdout.write(
+            f"{'page':<14}{'rows':>6}{'json ms':>9}{'fast ms':>9}{'plain KB':>10}"
+            + ''.join(f'{encoding + " KB":>10}{encoding + " ms":>9}' for encoding in encodings)
+        )
+        pages = list(self.get_pages(sizes, context))
+        if not pages:
+            raise CommandError("No cars or inquiries to render.")
+        for label, rows, data in pages:
+            content, json_ms = self.measure(lambda: JSONRenderer().render(data), repeat)
+            fast_content, fast_ms = self.measure(lambda: FastJSONRenderer().render(data), repeat)
+            if fast_content != content:
+                raise CommandError(f"{label} ({rows} rows): the renderers produced different bytes.")
+            line = f"{label:<14}{rows:>6}{json_ms:9.2f}{fast_ms:9.2f}{len(content) / 1024:10.1f}"
+            for encoding in encodings:
+                encoded, encode_ms = self.measure(lambda: compression.encode(content, encoding), repeat)
+                line += f"{len(encoded) / 1024:10.1f}{encode_ms:9.2f}"
+            self.stdout.write(line)
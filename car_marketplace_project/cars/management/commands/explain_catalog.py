@@ -0,0 +1,95 @@
+from itertools import product
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from cars.models import Car
+from cars.search import search_cars
+
+
+# Ordering values accepted by CarViewSet (OrderingFilter on ordering_fields).
+ORDERINGS = ['price', '-price', 'year', '-year', 'created_at', '-created_at']
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs EXPLAIN on the public catalog query for the standard CarFilter/ordering "
+        "combinations, and on PostgreSQL for ?search= terms, and reports every plan that "
+        "falls back to a sequential scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force-index', action='store_true',
+            help="Disable sequential scans for the session (PostgreSQL) so small dev tables "
+                 "still show whether an index *can* serve each plan.",
+        )
+        parser.add_argument(
+            '--fail-on-seq-scan', action='store_true',
+            help="Exit with an error if any plan contains a sequential scan (for CI).",
+        )
+        parser.add_argument('--verbose-plans', action='store_true', help="Print every plan, not just offenders.")
+        parser.add_argument(
+            '--search', action='append', default=[],
+            help="A ?search= term to explain as well (PostgreSQL; repeatable). Defaults to a brand name with a typo.",
+        )
+
+    def get_filter_sets(self):
+        sample = Car.objects.filter(is_approved=True).values(
+            'brand_id', 'model_id', 'fuel_type', 'transmission', 'condition'
+        ).first() or {'brand_id': 1, 'model_id': 1, 'fuel_type': 'petrol', 'transmission': 'manual', 'condition': 'used'}
+        return [
+            {},
+            {'brand': sample['brand_id']},
+            {'brand': sample['brand_id'], 'model': sample['model_id']},
+            {'fuel_type': sample['fuel_type']},
+            {'fuel_type': sample['fuel_type'], 'transmission': sample['transmission']},
+            {'fuel_type': sample['fuel_type'], 'transmission': sample['transmission'], 'condition': sample['condition']},
+        ]
+
+    def get_search_terms(self, options):
+        if connection.vendor != 'postgresql':
+            return []
+        sample = Car.objects.filter(is_approved=True).values_list('brand_name', flat=True).first() or 'toyota'
+        return options['search'] or [sample[:-1]] # A missing last letter: only the trigram lookup matches
+
+    def is_seq_scan(self, line):
+        if connection.vendor == 'postgresql':
+            return 'Seq Scan' in line
+        if connection.vendor == 'sqlite':
+            return 'SCAN ' in line and 'USING' not in line
+        return 'ALL' in line.split()  # MySQL "type: ALL"
+
+    def handle(self, *args, **options):
+        page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 10)
+        offenders = []
+        with transaction.atomic():
+            if options['force_index'] and connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            queries = [
+                (f"filter={filters or '{}'} ordering={ordering}", Car.objects.filter(is_approved=True, **filters).order_by(ordering))
+                for filters, ordering in product(self.get_filter_sets(), ORDERINGS)
+            ] + [
+                (f"search={term!r}", search_cars(Car.objects.filter(is_approved=True), term))
+                for term in self.get_search_terms(options)
+            ]
+            for label, queryset in queries:
+                plan = queryset[:page_size].explain()
+                seq_lines = [line.strip() for line in plan.splitlines() if self.is_seq_scan(line)]
+                if seq_lines:
+                    offenders.append(label)
+                    self.stdout.write(self.style.WARNING(f"SEQ SCAN  {label}: {'; '.join(seq_lines)}"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"ok        {label}"))
+                if options['verbose_plans']:
+                    self.stdout.write(plan + '\n')
+
+        if offenders:
+            message = f"{len(offenders)} catalog plan(s) use a sequential scan."
+            if options['fail_on_seq_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("All catalog plans are index-served."))
@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cars.exporter import EXPORT_FORMATS, CarExporter, parse_updated_since
+from cars.importer import detect_format
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports approved car listings as CSV or JSON Lines (a file path, or - for stdout), "
+        "streamed from a server-side cursor so memory stays flat at any catalog size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Output file, or - to write to stdout.")
+        parser.add_argument('--format', choices=EXPORT_FORMATS, help="Defaults to the file extension, else csv.")
+        parser.add_argument('--updated-since', help="Only cars changed at or after this ISO 8601 date or datetime.")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Rows per cursor fetch and write.")
+
+    def handle(self, *args, **options):
+        updated_since = None
+        if options['updated_since']:
+            try:
+                updated_since = parse_updated_since(options['updated_since'])
+            except ValueError as exc:
+                raise CommandError(str(exc))
+        fmt = options['format'] or detect_format(filename=options['path']) or 'csv'
+
+        exporter = CarExporter(fmt, updated_since, chunk_size=options['chunk_size'])
+        if options['path'] == '-':
+            for chunk in exporter:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            report = self.stderr # Keep stdout to the export itself
+        else:
+            with open(options['path'], 'wb') as output:
+                for chunk in exporter:
+                    output.write(chunk)
+            report = self.stdout
+        report.write(self.style.SUCCESS(f"Exported {exporter.exported} car(s)."))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from cars.images import generate_variants, needs_variants
+from cars.models import CarImage
+
+
+class Command(BaseCommand):
+    help = "Backfills thumbnail and WebP variants for CarImage rows that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenerate variants even if they are up to date.")
+        parser.add_argument('--car', type=int, action='append', dest='car_ids', help="Only images of this car id (repeatable).")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Rows fetched per database round trip.")
+
+    def handle(self, *args, **options):
+        queryset = CarImage.objects.order_by('pk').only('pk', 'image', 'variants')
+        if options['car_ids']:
+            queryset = queryset.filter(car_id__in=options['car_ids'])
+
+        done = skipped = failed = 0
+        for car_image in queryset.iterator(chunk_size=options['chunk_size']):
+            if not options['force'] and not needs_variants(car_image):
+                skipped += 1
+                continue
+            if generate_variants(car_image.pk):
+                done += 1
+            else:
+                failed += 1
+                self.stderr.write(f"Failed: CarImage {car_image.pk} ({car_image.image.name})")
+            if (done + failed) % 100 == 0:
+                self.stdout.write(f"... {done} generated, {failed} failed")
+
+        self.stdout.write(self.style.SUCCESS(f"{done} image(s) processed, {skipped} already up to date, {failed} failed."))
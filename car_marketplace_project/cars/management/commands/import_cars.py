@@ -0,0 +1,46 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from cars.importer import IMPORT_FORMATS, CarImporter, detect_format, iter_rows
+
+
+class Command(BaseCommand):
+    help = "Imports car listings from a CSV or JSON Lines dealer feed (a file path, or - for stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Feed file, or - to read from stdin.")
+        parser.add_argument('--seller', required=True, help="Username of the seller the listings belong to.")
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help="Defaults to the file extension.")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Rows validated and inserted per transaction.")
+        parser.add_argument('--approve', action='store_true', help="Publish the imported listings immediately.")
+        parser.add_argument('--max-errors', type=int, default=50, help="How many row errors to print.")
+
+    def handle(self, *args, **options):
+        try:
+            seller = get_user_model().objects.get(username=options['seller'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user named {options['seller']!r}.")
+        if not seller.is_seller:
+            raise CommandError(f"{seller.username!r} is not a seller.")
+
+        fmt = options['format'] or detect_format(filename=options['path'])
+        if fmt is None:
+            raise CommandError("Cannot tell the feed format from the file name; pass --format csv|jsonl.")
+
+        importer = CarImporter(
+            seller=seller, chunk_size=options['chunk_size'], approve=options['approve'],
+            max_errors=options['max_errors'],
+        )
+        if options['path'] == '-':
+            summary = importer.run(iter_rows(sys.stdin, fmt))
+        else:
+            with open(options['path'], encoding='utf-8', newline='') as feed:
+                summary = importer.run(iter_rows(feed, fmt))
+
+        for error in summary['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        if summary['errors_truncated']:
+            self.stderr.write(f"... and {summary['failed'] - len(summary['errors'])} more failed row(s).")
+        self.stdout.write(self.style.SUCCESS(f"Imported {summary['created']} car(s); {summary['failed']} row(s) failed."))
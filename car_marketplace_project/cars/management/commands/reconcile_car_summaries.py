@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from cars.models import Car
+from cars.summaries import SUMMARY_FIELDS, drifted, refresh_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Detects Car rows whose denormalized brand/model/seller names or primary image disagree "
+        "with the source tables, and repairs them in bulk with --fix."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Rewrite the drifted rows (default is report only).")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Cars repaired per UPDATE.")
+        parser.add_argument('--show', type=int, default=20, help="How many drifted car ids to list.")
+
+    def handle(self, *args, **options):
+        drift = drifted(Car.objects.all())
+        ids = list(drift.order_by('pk').values_list('pk', flat=True))
+        if not ids:
+            self.stdout.write(self.style.SUCCESS("No drift: every listing summary matches its source rows."))
+            return
+
+        sample = drift.order_by('pk').values('pk', *SUMMARY_FIELDS, *(f'expected_{field}' for field in SUMMARY_FIELDS))
+        for row in sample[:options['show']]:
+            diffs = ', '.join(
+                f"{field}: {row[field]!r} -> {row[f'expected_{field}']!r}"
+                for field in SUMMARY_FIELDS if row[field] != row[f'expected_{field}']
+            )
+            self.stdout.write(f"Car {row['pk']}: {diffs}")
+        self.stdout.write(self.style.WARNING(f"{len(ids)} car(s) have drifted."))
+
+        if options['fix']:
+            fixed = 0
+            for start in range(0, len(ids), options['batch_size']):
+                fixed += refresh_summaries(Car.objects.filter(pk__in=ids[start:start + options['batch_size']]))
+            self.stdout.write(self.style.SUCCESS(f"Repaired {fixed} car(s)."))
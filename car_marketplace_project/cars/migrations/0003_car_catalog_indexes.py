@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+from car_marketplace_project.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False # AddIndexConcurrently
+
+    dependencies = [
+        ('cars', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='car',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['price', 'id'], name='car_approved_price_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='car',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['year', 'id'], name='car_approved_year_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='car',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['created_at', 'id'], name='car_approved_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='car',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['brand', 'model', 'price'], name='car_approved_brand_model_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='car',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['fuel_type', 'transmission', 'condition', 'price'], name='car_approved_specs_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='car',
+            index=models.Index(fields=['seller', 'created_at'], name='car_seller_created_idx'),
+        ),
+    ]
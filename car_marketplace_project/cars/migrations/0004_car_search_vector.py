@@ -0,0 +1,59 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:36
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+from car_marketplace_project.operations import AddIndexConcurrently
+
+
+def populate_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Brand = apps.get_model('cars', 'Brand')
+    CarModel = apps.get_model('cars', 'CarModel')
+    Car = apps.get_model('cars', 'Car')
+    config = getattr(settings, 'CAR_SEARCH_CONFIG', 'english')
+    brand_name = Subquery(Brand.objects.filter(pk=OuterRef('brand_id')).values('name')[:1])
+    model_name = Subquery(CarModel.objects.filter(pk=OuterRef('model_id')).values('name')[:1])
+    Car.objects.update(search_vector=(
+        SearchVector('title', weight='A', config=config)
+        + SearchVector(brand_name, weight='A', config=config)
+        + SearchVector(model_name, weight='A', config=config)
+        + SearchVector('description', weight='C', config=config)
+    ))
+
+
+class Migration(migrations.Migration):
+    atomic = False # AddIndexConcurrently
+
+    dependencies = [
+        ('cars', '0003_car_catalog_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='car',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        AddIndexConcurrently(
+            model_name='brand',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='brand_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='car',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='car_search_vector_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='carmodel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='carmodel_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop, atomic=True),
+    ]
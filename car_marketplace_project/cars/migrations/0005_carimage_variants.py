@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0004_car_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='carimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized JPEG/WebP renditions keyed by size name'),
+        ),
+        migrations.AddField(
+            model_name='carimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:42
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import CharField, F, OuterRef, Subquery, Value
+from django.db.models.fields.json import KT
+from django.db.models.functions import Coalesce
+
+
+def populate_summaries(apps, schema_editor):
+    Brand = apps.get_model('cars', 'Brand')
+    CarModel = apps.get_model('cars', 'CarModel')
+    CarImage = apps.get_model('cars', 'CarImage')
+    Car = apps.get_model('cars', 'Car')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    first_image = CarImage.objects.filter(car=OuterRef('pk')).order_by('id')
+    Car.objects.update(
+        brand_name=Subquery(Brand.objects.filter(pk=OuterRef('brand_id')).values('name')[:1]),
+        model_name=Subquery(CarModel.objects.filter(pk=OuterRef('model_id')).values('name')[:1]),
+        seller_username=Subquery(User.objects.filter(pk=OuterRef('seller_id')).values('username')[:1]),
+        primary_image=Coalesce(
+            Subquery(first_image.annotate(path=Coalesce(KT('variants__sizes__thumb__jpeg'), F('image'), output_field=CharField())).values('path')[:1]),
+            Value(''), output_field=CharField(),
+        ),
+        primary_image_webp=Coalesce(
+            Subquery(first_image.annotate(path=KT('variants__sizes__thumb__webp')).values('path')[:1]),
+            Value(''), output_field=CharField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0005_carimage_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='brand_name',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='car',
+            name='model_name',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='car',
+            name='primary_image',
+            field=models.CharField(blank=True, editable=False, help_text='Thumbnail (or original) of the first image', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='car',
+            name='primary_image_webp',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='car',
+            name='seller_username',
+            field=models.CharField(blank=True, editable=False, max_length=150),
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+from car_marketplace_project.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False # AddIndexConcurrently
+
+    dependencies = [
+        ('cars', '0006_car_listing_summary'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='car',
+            index=models.Index(condition=models.Q(('is_approved', False)), fields=['created_at', 'id'], name='car_pending_created_idx'),
+        ),
+    ]
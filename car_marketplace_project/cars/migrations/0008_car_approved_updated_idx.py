@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+from car_marketplace_project.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False # AddIndexConcurrently
+
+    dependencies = [
+        ('cars', '0007_car_pending_created_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='car',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['updated_at', 'id'], name='car_approved_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+from car_marketplace_project.operations import AddIndexConcurrently, RemoveIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    atomic = False # AddIndexConcurrently
+
+    dependencies = [
+        ('cars', '0008_car_approved_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='rejected_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When a moderator rejected the car', null=True),
+        ),
+        RemoveIndexConcurrently(
+            model_name='car',
+            name='car_pending_created_idx',
+        ),
+        AddIndexConcurrently(
+            model_name='car',
+            index=models.Index(condition=models.Q(('is_approved', False), ('rejected_at__isnull', True)), fields=['created_at', 'id'], name='car_pending_created_idx'),
+        ),
+    ]
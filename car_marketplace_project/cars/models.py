@@ -1,10 +1,17 @@
 from django.db import models
 from django.db import models
 from django.conf import settings # Import settings to reference AUTH_USER_MODEL
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 class Brand(models.Model):
     name = models.CharField(max_length=100, unique=True)
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=['name'], name='brand_name_trgm_idx', opclasses=['gin_trgm_ops']), # Typo-tolerant search
+        ]
+
     def __str__(self):
         return self.name
 
@@ -14,6 +21,9 @@ class CarModel(models.Model):
 
     class Meta:
         unique_together = ('brand', 'name') # Ensures unique model names per brand
+        indexes = [
+            GinIndex(fields=['name'], name='carmodel_name_trgm_idx', opclasses=['gin_trgm_ops']), # Typo-tolerant search
+        ]
 
     def __str__(self):
         return f"{self.brand.name} {self.name}"
@@ -50,8 +60,47 @@ class Car(models.Model):
     engine_type = models.CharField(max_length=100, blank=True, null=True)
     description = models.TextField(blank=True, null=True)
     is_approved = models.BooleanField(default=False, help_text="Approved by admin to be visible on site")
+    # Unapproved cars are pending while this is empty and rejected once a moderator sets it.
+    rejected_at = models.DateTimeField(null=True, blank=True, editable=False, help_text="When a moderator rejected the car")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Weighted title/brand/model/description document, maintained by cars.signals.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Denormalized listing summary so list pages are a single-table scan; kept in sync by
+    # cars.signals and repaired by `manage.py reconcile_car_summaries`.
+    brand_name = models.CharField(max_length=100, blank=True, editable=False)
+    model_name = models.CharField(max_length=100, blank=True, editable=False)
+    seller_username = models.CharField(max_length=150, blank=True, editable=False)
+    primary_image = models.CharField(max_length=255, blank=True, editable=False, help_text="Thumbnail (or original) of the first image")
+    primary_image_webp = models.CharField(max_length=255, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='car_search_vector_idx'),
+            # Public catalog: every anonymous read is `is_approved=True` ordered by one of
+            # CarViewSet.ordering_fields, so these are partial indexes over approved rows only.
+            models.Index(fields=['price', 'id'], condition=models.Q(is_approved=True), name='car_approved_price_idx'),
+            models.Index(fields=['year', 'id'], condition=models.Q(is_approved=True), name='car_approved_year_idx'),
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_approved=True), name='car_approved_created_idx'),
+            # CarFilter narrowing: brand/model drill-down and the spec filters, ordered by price.
+            models.Index(fields=['brand', 'model', 'price'], condition=models.Q(is_approved=True), name='car_approved_brand_model_idx'),
+            models.Index(fields=['fuel_type', 'transmission', 'condition', 'price'], condition=models.Q(is_approved=True), name='car_approved_specs_idx'),
+            # Sellers browse their own listings (approved or not) newest first.
+            models.Index(fields=['seller', 'created_at'], name='car_seller_created_idx'),
+            # Moderation queue: pending (neither approved nor rejected) cars oldest first.
+            models.Index(
+                fields=['created_at', 'id'], condition=models.Q(is_approved=False, rejected_at__isnull=True), name='car_pending_created_idx',
+            ),
+            # Catalog export (cars.exporter): approved cars in updated_at order, from an optional watermark.
+            models.Index(fields=['updated_at', 'id'], condition=models.Q(is_approved=True), name='car_approved_updated_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The model as stored, so cars.signals can recount it when a save moves the car away.
+        instance.loaded_model_id = instance.__dict__.get('model_id')
+        return instance
 
     def __str__(self):
         return f"{self.year} {self.brand.name} {self.model.name} - {self.title}"
@@ -60,6 +109,14 @@ class CarImage(models.Model):
     car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='car_images/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # Filled in by cars.images after upload
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized JPEG/WebP renditions keyed by size name")
+
+    def variant_path(self, size, fmt='jpeg'):
+        """Storage path of a generated rendition, or None if it does not exist (yet)."""
+        return self.variants.get('sizes', {}).get(size, {}).get(fmt)
 
     def __str__(self):
         return f"Image for {self.car.title}"
\ No newline at end of file
@@ -0,0 +1,40 @@
+from itertools import islice
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Car
+
+# Sent once per committed chunk of moderate(), with `car_ids` (the cars whose moderation
+# state changed) and `is_approved`; the per-row post_save never fires for these writes.
+cars_moderated = Signal()
+
+
+def moderate(car_ids, approve, chunk_size=500):
+    """
+    Approve or reject `car_ids`, `chunk_size` rows per transaction, bumping updated_at
+    (so ETags change) and sending cars_moderated after each chunk commits. Rejecting sets
+    rejected_at, which takes a car out of the pending queue; approving clears it. Rows
+    already in the requested state are left alone. Returns counts plus the ids that do not exist.
+    """
+    summary = {'updated': 0, 'unchanged': 0, 'not_found': []}
+    ids = iter(sorted(set(car_ids))) # Sorted so concurrent calls lock rows in the same order
+    while chunk := list(islice(ids, chunk_size)):
+        with transaction.atomic():
+            rows = Car.objects.select_for_update().filter(pk__in=chunk).values_list('pk', 'is_approved', 'rejected_at')
+            states = {pk: (is_approved, rejected_at) for pk, is_approved, rejected_at in rows}
+            changed = [
+                pk for pk, (is_approved, rejected_at) in states.items()
+                if is_approved != approve or (not approve and rejected_at is None) # Pending, to be rejected
+            ]
+            if changed:
+                now = timezone.now()
+                Car.objects.filter(pk__in=changed).update(is_approved=approve, rejected_at=None if approve else now, updated_at=now)
+                transaction.on_commit(
+                    lambda changed=changed: cars_moderated.send(sender=Car, car_ids=changed, is_approved=approve)
+                )
+        summary['updated'] += len(changed)
+        summary['unchanged'] += len(states) - len(changed)
+        summary['not_found'].extend(pk for pk in chunk if pk not in states)
+    return summary
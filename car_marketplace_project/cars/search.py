@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramSimilarity,
+)
+from django.db import connection
+from django.db.models import F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Greatest
+from rest_framework.filters import SearchFilter
+
+from .models import Brand, CarModel
+
+SEARCH_CONFIG = getattr(settings, 'CAR_SEARCH_CONFIG', 'english')
+
+
+def search_vector_expression():
+    """
+    The weighted document stored in `Car.search_vector`.
+
+    Brand and model names come in through subqueries so the same expression works in a
+    plain `UPDATE` (joins are not allowed there), whether for one car or a whole brand.
+    """
+    brand_name = Subquery(Brand.objects.filter(pk=OuterRef('brand_id')).values('name')[:1])
+    model_name = Subquery(CarModel.objects.filter(pk=OuterRef('model_id')).values('name')[:1])
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(brand_name, weight='A', config=SEARCH_CONFIG)
+        + SearchVector(model_name, weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def refresh_search_vectors(queryset):
+    """Recompute `search_vector` for every car in `queryset` with a single UPDATE."""
+    if connection.vendor != 'postgresql':
+        return 0
+    return queryset.update(search_vector=search_vector_expression())
+
+
+def similar_taxonomy_ids(text):
+    """
+    (brand ids, model ids) whose names are trigram-similar to `text`, in one query over the
+    small brand and model tables (brand_name_trgm_idx, carmodel_name_trgm_idx).
+    """
+    brands = Brand.objects.filter(name__trigram_similar=text).annotate(kind=Value('brand')).values_list('kind', 'pk')
+    models = CarModel.objects.filter(name__trigram_similar=text).annotate(kind=Value('model')).values_list('kind', 'pk')
+    ids = {'brand': [], 'model': []}
+    for kind, pk in brands.union(models, all=True):
+        ids[kind].append(pk)
+    return ids['brand'], ids['model']
+
+
+def search_cars(queryset, text):
+    """
+    `queryset` narrowed to cars matching `text` and ordered by relevance (PostgreSQL only).
+
+    The condition only uses columns of the cars table, so it is a BitmapOr of the
+    search_vector GIN index and the brand/model foreign key indexes. Trigram matches on
+    joined brand and model names would make PostgreSQL scan every car instead, so the
+    similar brands and models are looked up first and matched by id.
+    """
+    query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+    rank = SearchRank(F('search_vector'), query)
+    condition = Q(search_vector=query)
+    if getattr(settings, 'CAR_SEARCH_TRIGRAM', False):
+        brand_ids, model_ids = similar_taxonomy_ids(text)
+        condition |= Q(brand_id__in=brand_ids) | Q(model_id__in=model_ids)
+        # The listing summary's copies of the names, so ranking needs no join either.
+        rank = rank + Greatest(TrigramSimilarity('brand_name', text), TrigramSimilarity('model_name', text))
+    return queryset.filter(condition).annotate(search_rank=rank).order_by('-search_rank', '-id')
+
+
+class CarSearchFilter(SearchFilter):
+    """
+    Drop-in replacement for SearchFilter on `?search=` backed by the GIN-indexed
+    `Car.search_vector` and ranked by relevance (search_cars).
+
+    With `CAR_SEARCH_TRIGRAM = True` brand and model names also match by trigram
+    similarity, so "mahindra" finds "Mahindra" and "toyta" finds "Toyota". On databases
+    other than PostgreSQL it falls back to the stock ILIKE search over `search_fields`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms or connection.vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+        # An explicit ?ordering= is applied after us by OrderingFilter and takes precedence.
+        return search_cars(queryset, ' '.join(search_terms))
@@ -1,7 +1,13 @@
 # D:\car_showroom_project\car_marketplace_project\cars\serializers.py
 
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Manager
 from rest_framework import serializers
 from .models import Car, Brand, CarModel, CarImage
+from .taxonomy import get_taxonomy
 from users.serializers import UserProfileSerializer
 
 # Serializers for nested objects (Brand, CarModel, CarImage)
@@ -18,11 +24,29 @@ class CarModelSerializer(serializers.ModelSerializer):
         model = CarModel
         fields = ['id', 'brand', 'brand_id', 'name']
 
+def storage_url(request, path):
+    url = default_storage.url(path)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
 class CarImageSerializer(serializers.ModelSerializer):
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model = CarImage
-        fields = ['id', 'image', 'uploaded_at']
-        read_only_fields = ['uploaded_at']
+        fields = ['id', 'image', 'uploaded_at', 'width', 'height', 'variants']
+        read_only_fields = ['uploaded_at', 'width', 'height']
+
+    def get_variants(self, obj):
+        """Absolute JPEG/WebP URLs and dimensions per size; empty until generated."""
+        request = self.context.get('request')
+        return {
+            name: {
+                'width': entry['width'], 'height': entry['height'],
+                'jpeg': storage_url(request, entry['jpeg']), 'webp': storage_url(request, entry['webp']),
+            }
+            for name, entry in obj.variants.get('sizes', {}).items()
+        }
 
 # General Purpose Car Serializer (for embedding in other serializers)
 class CarSerializer(serializers.ModelSerializer): # <--- RE-ADDED THIS GENERAL PURPOSE SERIALIZER
@@ -42,31 +66,93 @@ class CarSerializer(serializers.ModelSerializer): # <--- RE-ADDED THIS GENERAL P
             'price', 'fuel_type', 'year', 'transmission', 'condition', 'mileage',
             'engine_type', 'description', 'is_approved', 'created_at', 'updated_at', 'images'
         ]
-        read_only_fields = '__all__' # All fields are read-only for this general purpose serializer
+        read_only_fields = fields # All fields are read-only for this general purpose serializer
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load everything the nested representation touches in a fixed number of queries."""
+        return queryset.select_related('brand', 'model__brand', 'seller').prefetch_related('images')
 
 # Specific Car Serializers for cars app's own views (List, Detail, Create/Update)
+class RowListSerializer(serializers.ListSerializer):
+    """
+    many=True rendering without DRF's per-field walk for every row. The child's fields are
+    planned once: plain char/int/bool/choice columns are read straight off the row, method
+    fields call their method, and anything else goes through the field's to_representation,
+    so the output is the same as ListSerializer's. Rows may be model instances or the
+    named tuples of the child's `get_rows()`.
+    """
+    passthrough_fields = (serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.ChoiceField)
+
+    def get_field_getter(self, field):
+        if isinstance(field, serializers.SerializerMethodField):
+            return getattr(self.child, field.method_name)
+        if type(field) in self.passthrough_fields and len(field.source_attrs) == 1:
+            return attrgetter(field.source)
+
+        def get(row):
+            value = field.get_attribute(row)
+            return None if value is None else field.to_representation(value)
+        return get
+
+    def to_representation(self, data):
+        rows = data.all() if isinstance(data, Manager) else data
+        plan = [(field.field_name, self.get_field_getter(field)) for field in self.child._readable_fields]
+        return [{name: get(row) for name, get in plan} for row in rows]
+
+
 class CarListSerializer(serializers.ModelSerializer):
     """
     Serializer for listing cars, with essential information.
+    Reads only Car's own columns: brand/model/seller names and the primary image are denormalized.
     """
-    brand_name = serializers.CharField(source='brand.name', read_only=True)
-    model_name = serializers.CharField(source='model.name', read_only=True)
-    seller_username = serializers.CharField(source='seller.username', read_only=True)
     main_image_url = serializers.SerializerMethodField()
+    main_image_webp_url = serializers.SerializerMethodField()
+
+    columns = (
+        'id', 'title', 'brand_name', 'model_name', 'year', 'price', 'mileage', 'fuel_type',
+        'transmission', 'condition', 'seller_username', 'is_approved', 'primary_image', 'primary_image_webp',
+        'created_at', # Keyset cursors are built from the ordering columns
+    )
 
     class Meta:
         model = Car
         fields = [
             'id', 'title', 'brand_name', 'model_name', 'year', 'price',
             'mileage', 'fuel_type', 'transmission', 'condition',
-            'seller_username', 'is_approved', 'main_image_url'
+            'seller_username', 'is_approved', 'main_image_url', 'main_image_webp_url'
         ]
+        list_serializer_class = RowListSerializer
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Every rendered value lives on the car row itself, so fetch just those columns."""
+        return queryset.only(*cls.columns)
+
+    @classmethod
+    def get_rows(cls, queryset):
+        """The same columns as named tuples, for list pages: no Car instances are built."""
+        return queryset.values_list('pk', *cls.columns, named=True)
 
     def get_main_image_url(self, obj):
-        first_image = obj.images.first()
-        if first_image and first_image.image:
-            return self.context['request'].build_absolute_uri(first_image.image.url)
-        return None
+        # List cards show the thumbnail; the original is only used until variants exist.
+        return storage_url(self.context['request'], obj.primary_image) if obj.primary_image else None
+
+    def get_main_image_webp_url(self, obj):
+        return storage_url(self.context['request'], obj.primary_image_webp) if obj.primary_image_webp else None
+
+
+class ModerationQueueSerializer(CarListSerializer):
+    class Meta(CarListSerializer.Meta):
+        fields = CarListSerializer.Meta.fields + ['created_at']
+
+
+class ModerationDecisionSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False,
+        max_length=getattr(settings, 'CAR_MODERATION_MAX_IDS', 10000),
+    )
+    decision = serializers.ChoiceField(choices=['approve', 'reject'])
 
 class CarDetailSerializer(serializers.ModelSerializer): # <--- REMAINING FOR DETAIL VIEW IN CARS APP
     """
@@ -85,7 +171,29 @@ class CarDetailSerializer(serializers.ModelSerializer): # <--- REMAINING FOR DET
             'price', 'fuel_type', 'year', 'transmission', 'condition', 'mileage',
             'engine_type', 'description', 'is_approved', 'created_at', 'updated_at', 'images'
         ]
-        read_only_fields = '__all__'
+        read_only_fields = fields
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('brand', 'model__brand', 'seller').prefetch_related('images')
+
+
+class TaxonomyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Brand / CarModel primary key checked against cars.taxonomy's in-process snapshot.
+    Ids the snapshot does not know (say, created in this transaction) fall back to the query.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            instance = get_taxonomy().get_instance(self.get_queryset().model, int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if instance is None:
+            return super().to_internal_value(data)
+        return instance
 
 
 class CarCreateUpdateSerializer(serializers.ModelSerializer):
@@ -93,8 +201,8 @@ class CarCreateUpdateSerializer(serializers.ModelSerializer):
     Serializer for creating and updating Car objects in the cars app.
     Allows specifying related objects by their primary keys (IDs).
     """
-    brand_id = serializers.PrimaryKeyRelatedField(queryset=Brand.objects.all(), source='brand', write_only=True)
-    model_id = serializers.PrimaryKeyRelatedField(queryset=CarModel.objects.all(), source='model', write_only=True)
+    brand_id = TaxonomyRelatedField(queryset=Brand.objects.all(), source='brand', write_only=True)
+    model_id = TaxonomyRelatedField(queryset=CarModel.objects.all(), source='model', write_only=True)
 
     class Meta:
         model = Car
@@ -113,4 +221,6 @@ class CarCreateUpdateSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         validated_data.pop('seller', None)
         validated_data.pop('is_approved', None)
+        if instance.rejected_at is not None:
+            validated_data['rejected_at'] = None # An edited rejected car goes back to the moderation queue
         return super().update(instance, validated_data)
\ No newline at end of file
@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .autocomplete import recount_cars, recount_models_on_commit
+from .cache import bump_generation, bump_generation_on_commit
+from .images import needs_variants, schedule_variants
+from .models import Brand, CarModel, Car, CarImage
+from .moderation import cars_moderated
+from .search import refresh_search_vectors
+from .summaries import fill_from_relations, refresh_summaries
+
+
+@receiver(post_save, sender=Car)
+def update_car_search_vector(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_search_vectors(Car.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Brand)
+def update_brand_search_vectors(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        refresh_search_vectors(Car.objects.filter(brand=instance))
+
+
+@receiver(post_save, sender=CarModel)
+def update_model_search_vectors(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        refresh_search_vectors(Car.objects.filter(model=instance))
+
+
+@receiver(pre_save, sender=Car)
+def fill_car_summary(sender, instance, raw=False, **kwargs):
+    if not raw:
+        fill_from_relations(instance)
+
+
+@receiver(post_save, sender=Brand)
+def sync_brand_name(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        Car.objects.filter(brand=instance).exclude(brand_name=instance.name).update(brand_name=instance.name)
+
+
+@receiver(post_save, sender=CarModel)
+def sync_model_name(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        Car.objects.filter(model=instance).exclude(model_name=instance.name).update(model_name=instance.name)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_seller_username(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if not raw and not created and (update_fields is None or 'username' in update_fields):
+        Car.objects.filter(seller=instance).exclude(seller_username=instance.username).update(seller_username=instance.username)
+
+
+@receiver(post_save, sender=CarImage)
+@receiver(post_delete, sender=CarImage)
+def sync_primary_image(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_summaries(Car.objects.filter(pk=instance.car_id), fields=('primary_image', 'primary_image_webp'))
+
+
+@receiver(post_save, sender=CarImage)
+def generate_image_variants(sender, instance, raw=False, **kwargs):
+    if not raw and needs_variants(instance):
+        schedule_variants(instance)
+
+
+# Generation counters behind cars.cache: one per model, bumped on every write.
+GENERATION_FOR_MODEL = {
+    Car: 'cars',
+    CarImage: 'car_images',
+    Brand: 'brands',
+    CarModel: 'car_models',
+}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_cached_responses(sender, raw=False, **kwargs):
+    name = GENERATION_FOR_MODEL.get(sender)
+    if name and not raw:
+        bump_generation_on_commit(name)
+
+
+@receiver(cars_moderated)
+def invalidate_moderated_cars(sender, **kwargs):
+    bump_generation('cars') # Already sent after commit
+
+
+# Approved-listing counts behind the autocomplete ranking (cars.autocomplete).
+@receiver(post_save, sender=Car)
+@receiver(post_delete, sender=Car)
+def recount_autocomplete_model(sender, instance, raw=False, **kwargs):
+    if not raw:
+        # Both the model the car was loaded with and the one it has now, when it moved.
+        recount_models_on_commit({instance.model_id, getattr(instance, 'loaded_model_id', None)} - {None})
+        instance.loaded_model_id = instance.model_id
+
+
+@receiver(cars_moderated)
+def recount_autocomplete_moderated(sender, car_ids, **kwargs):
+    recount_cars(car_ids)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_details(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Listings render seller profiles, inboxes render buyer contacts; logins only touch last_login.
+    if not raw and (update_fields is None or set(update_fields) - {'last_login'}):
+        bump_generation_on_commit(*(('users', 'sellers') if instance.is_seller else ('users',)))
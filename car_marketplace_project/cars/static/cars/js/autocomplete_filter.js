@@ -0,0 +1,15 @@
+'use strict';
+{
+    // Reloads the changelist when a cars.changelist.AutocompleteFilter select changes.
+    // select2 triggers change through jQuery, so listen through django.jQuery too.
+    django.jQuery(document).on('change', 'select[data-filter-param]', function() {
+        const params = new URLSearchParams(window.location.search);
+        params.delete('p');
+        if (this.value) {
+            params.set(this.dataset.filterParam, this.value);
+        } else {
+            params.delete(this.dataset.filterParam);
+        }
+        window.location.search = params.toString();
+    });
+}
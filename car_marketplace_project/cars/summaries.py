@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.db.models import CharField, F, OuterRef, Q, Subquery, Value
+from django.db.models.fields.json import KT
+from django.db.models.functions import Coalesce
+
+from .models import Brand, CarModel, CarImage
+
+SUMMARY_FIELDS = ('brand_name', 'model_name', 'seller_username', 'primary_image', 'primary_image_webp')
+
+
+def expected_summary():
+    """
+    SQL expressions for what each denormalized column of Car should contain.
+
+    The primary image is the first upload (lowest id), rendered as its thumbnail once
+    variants exist and as the original until then.
+    """
+    first_image = CarImage.objects.filter(car=OuterRef('pk')).order_by('id')
+    return {
+        'brand_name': Subquery(Brand.objects.filter(pk=OuterRef('brand_id')).values('name')[:1]),
+        'model_name': Subquery(CarModel.objects.filter(pk=OuterRef('model_id')).values('name')[:1]),
+        'seller_username': Subquery(get_user_model().objects.filter(pk=OuterRef('seller_id')).values('username')[:1]),
+        'primary_image': Coalesce(
+            Subquery(first_image.annotate(path=Coalesce(KT('variants__sizes__thumb__jpeg'), F('image'), output_field=CharField())).values('path')[:1]),
+            Value(''), output_field=CharField(),
+        ),
+        'primary_image_webp': Coalesce(
+            Subquery(first_image.annotate(path=KT('variants__sizes__thumb__webp')).values('path')[:1]),
+            Value(''), output_field=CharField(),
+        ),
+    }
+
+
+def refresh_summaries(queryset, fields=SUMMARY_FIELDS):
+    """Recompute the denormalized columns for every car in `queryset` with a single UPDATE."""
+    expected = expected_summary()
+    return queryset.update(**{field: expected[field] for field in fields})
+
+
+def drifted(queryset):
+    """Cars in `queryset` whose denormalized columns disagree with the source rows."""
+    expected = expected_summary()
+    annotated = queryset.annotate(**{f'expected_{field}': expression for field, expression in expected.items()})
+    mismatch = Q()
+    for field in SUMMARY_FIELDS:
+        mismatch |= ~Q(**{field: F(f'expected_{field}')})
+    return annotated.filter(mismatch)
+
+
+def fill_from_relations(car):
+    """Set the name columns from the related objects before a Car is saved."""
+    if car.brand_id is not None:
+        car.brand_name = car.brand.name
+    if car.model_id is not None:
+        car.model_name = car.model.name
+    if car.seller_id is not None:
+        car.seller_username = car.seller.username
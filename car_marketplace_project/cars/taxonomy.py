@@ -0,0 +1,70 @@
+import hashlib
+import threading
+
+from django.utils.functional import cached_property
+from django.utils.http import quote_etag
+
+from car_marketplace_project.compression import encode_all
+from car_marketplace_project.renderers import FastJSONRenderer
+from .cache import generation_token
+from .models import Brand, CarModel
+
+
+class Taxonomy:
+    """
+    One snapshot of the brand→model tree: the rendered JSON body and its encodings, a
+    strong ETag over those bytes (identical in every process), and id lookups for validation.
+    """
+
+    def __init__(self, token, brands, models):
+        self.token = token
+        self.brands = {brand['id']: brand for brand in brands}
+        self.models = {model['id']: model for model in models}
+        tree = [{**brand, 'models': []} for brand in brands]
+        by_brand = {brand['id']: brand for brand in tree}
+        for model in models:
+            by_brand[model['brand_id']]['models'].append({'id': model['id'], 'name': model['name']})
+        self.content = FastJSONRenderer().render(tree)
+        self.etag = quote_etag(hashlib.sha256(self.content).hexdigest())
+
+    @cached_property
+    def encoded(self):
+        """The body's gzip/brotli encodings, compressed on first use."""
+        return encode_all(self.content)
+
+    @classmethod
+    def load(cls, token):
+        return cls(
+            token,
+            list(Brand.objects.order_by('name', 'id').values('id', 'name')),
+            list(CarModel.objects.order_by('name', 'id').values('id', 'brand_id', 'name')),
+        )
+
+    def get_instance(self, model, pk):
+        """A Brand or CarModel built from the snapshot without a query, or None if unknown."""
+        if model is Brand and pk in self.brands:
+            return Brand.from_db('default', ['id', 'name'], [pk, self.brands[pk]['name']])
+        if model is CarModel and pk in self.models:
+            row = self.models[pk]
+            return CarModel.from_db('default', ['id', 'brand_id', 'name'], [pk, row['brand_id'], row['name']])
+        return None
+
+
+_taxonomy = None
+_lock = threading.Lock()
+
+
+def get_taxonomy():
+    """
+    This process's Taxonomy, rebuilt (two small queries) whenever the 'brands' or
+    'car_models' generation has moved; otherwise one generation lookup and no query.
+    """
+    global _taxonomy
+    token = generation_token('brands', 'car_models') # Read before the rows, so a racing write rebuilds again
+    taxonomy = _taxonomy
+    if taxonomy is None or taxonomy.token != token:
+        with _lock:
+            taxonomy = _taxonomy
+            if taxonomy is None or taxonomy.token != token:
+                taxonomy = _taxonomy = Taxonomy.load(token)
+    return taxonomy
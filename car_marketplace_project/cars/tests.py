@@ -1,3 +1,892 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import warnings
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.test.client import RequestFactory
+from django.urls import include, path, resolve, reverse, reverse_lazy
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ListSerializer
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from car_marketplace_project import compression
+from car_marketplace_project.renderers import FastJSONRenderer
+from users.models import User
+from . import autocomplete, urls as cars_urls
+from .models import Brand, CarModel, Car, CarImage
+from .exporter import EXPORT_COLUMNS
+from .importer import iter_rows
+from .moderation import cars_moderated
+from .search import search_cars
+from .serializers import CarCreateUpdateSerializer, CarListSerializer, ModerationQueueSerializer
+
+# URLconf with the async catalog reads switched on (AsyncCatalogTests).
+urlpatterns = [path('api/', include(cars_urls.async_urlpatterns + cars_urls.sync_urlpatterns))]
+
+
+class CarFixturesMixin:
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    @classmethod
+    def create_cars(cls, count, seller=None, **overrides):
+        seller = seller or User.objects.create_user(username=f'seller{User.objects.count()}', password='pass', is_seller=True)
+        brand, _ = Brand.objects.get_or_create(name='Maruti')
+        car_model, _ = CarModel.objects.get_or_create(brand=brand, name='Swift')
+        cars = []
+        for i in range(count):
+            fields = {
+                'seller': seller, 'title': f'Car {i}', 'brand': brand, 'model': car_model,
+                'price': 500000 + i, 'fuel_type': 'petrol', 'year': 2015 + i % 8,
+                'transmission': 'manual', 'condition': 'used', 'mileage': 1000 * i,
+                'is_approved': True,
+            }
+            fields.update(overrides)
+            car = Car.objects.create(**fields)
+            CarImage.objects.create(car=car, image=f'car_images/{car.pk}_front.jpg')
+            CarImage.objects.create(car=car, image=f'car_images/{car.pk}_back.jpg')
+            cars.append(car)
+        return cars
+
+
+class CarViewSetQueryCountTests(CarFixturesMixin, APITestCase):
+    """The number of queries per action must not depend on how many cars are rendered."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cars = cls.create_cars(10)
+
+    def test_list_query_count(self):
+        # ETag aggregate, COUNT for pagination and the page itself: a single-table scan.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('car-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 10)
+        first = response.data['results'][0]
+        car = Car.objects.get(pk=first['id'])
+        self.assertTrue(first['main_image_url'].endswith(car.images.order_by('id').first().image.url))
+
+    def test_retrieve_query_count(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('car-detail', args=[self.cars[0].pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['images']), 2)
+        self.assertEqual(response.data['model']['brand']['name'], 'Maruti')
+
+    def test_compare_query_count(self):
+        ids = ','.join(str(car.pk) for car in self.cars)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('car-compare'), {'ids': ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 10)
+
+
+class KeysetPaginationTests(CarFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Duplicate prices force the id tiebreaker to do its job.
+        cls.cars = cls.create_cars(25)
+        for car in cls.cars[::2]:
+            Car.objects.filter(pk=car.pk).update(price=700000)
+
+    def walk(self, url, params, link='next'):
+        seen = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen.extend(row['id'] for row in response.data['results'])
+            if not response.data[link]:
+                return seen, response
+            response = self.client.get(response.data[link])
+
+    def test_walks_every_ordering_without_gaps_or_duplicates(self):
+        for ordering in ['price', '-price', 'year', '-year', 'created_at', '-created_at']:
+            field = ordering.lstrip('-')
+            expected = list(
+                Car.objects.order_by(ordering, ('-' if ordering.startswith('-') else '') + 'id')
+                .values_list('id', flat=True)
+            )
+            seen, _ = self.walk(reverse('car-list'), {'pagination': 'cursor', 'ordering': ordering})
+            self.assertEqual(seen, expected, field)
+
+    def test_previous_link_walks_back(self):
+        seen, last_page = self.walk(reverse('car-list'), {'pagination': 'cursor', 'ordering': 'price'})
+        back = [row['id'] for row in last_page.data['results']]
+        response = last_page
+        while response.data['previous']:
+            response = self.client.get(response.data['previous'])
+            back = [row['id'] for row in response.data['results']] + back
+        self.assertEqual(back, seen)
+
+    def test_page_cost_is_constant(self):
+        first = self.client.get(reverse('car-list'), {'pagination': 'cursor', 'ordering': '-price'})
+        with self.assertNumQueries(1):  # page rows (page_size + 1) only; no COUNT, no joins
+            self.client.get(first.data['next'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('car-list'), {'pagination': 'cursor', 'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_number_mode_is_default(self):
+        response = self.client.get(reverse('car-list'))
+        self.assertEqual(response.data['count'], 25)
+
+
+class CarSearchTests(CarFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.swift = cls.create_cars(1, title='Red hatchback, single owner')[0]
+        toyota = Brand.objects.create(name='Toyota')
+        fortuner = CarModel.objects.create(brand=toyota, name='Fortuner')
+        cls.fortuner = cls.create_cars(1, brand=toyota, model=fortuner, title='Family SUV', description='Diesel 4x4')[0]
+
+    def search(self, term):
+        response = self.client.get(reverse('car-list'), {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_matches_title_brand_and_model(self):
+        self.assertEqual(self.search('hatchback'), [self.swift.pk])
+        self.assertEqual(self.search('toyota'), [self.fortuner.pk])
+        self.assertEqual(self.search('fortuner'), [self.fortuner.pk])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text search requires PostgreSQL')
+    def test_vector_follows_brand_rename_and_tolerates_typos(self):
+        brand = self.fortuner.brand
+        brand.name = 'Lexus'
+        brand.save()
+        self.assertEqual(self.search('lexus'), [self.fortuner.pk])
+        self.assertEqual(self.search('fortunr'), [self.fortuner.pk])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text search requires PostgreSQL')
+    @override_settings(CAR_SEARCH_TRIGRAM=True)
+    def test_trigram_search_stays_on_the_cars_table(self):
+        queryset = search_cars(Car.objects.filter(is_approved=True), 'toyta')
+        self.assertEqual(list(queryset.values_list('pk', flat=True)), [self.fortuner.pk])
+        # Brand and model matches come in as ids, so the plan can combine the cars indexes.
+        plan = queryset.explain()
+        self.assertNotIn('cars_brand', plan)
+        self.assertNotIn('cars_carmodel', plan)
+        out = StringIO()
+        call_command('explain_catalog', search=['toyta'], verbose_plans=True, stdout=out)
+        self.assertIn("search='toyta'", out.getvalue())
+
+
+class AnonymousResponseCacheTests(CarFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cars = cls.create_cars(3)
+
+    def test_list_served_from_cache_until_a_write(self):
+        first = self.client.get(reverse('car-list'), {'ordering': 'price'})
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            hit = self.client.get(reverse('car-list'), {'ordering': 'price'})
+        self.assertEqual(hit['X-Cache'], 'HIT')
+        self.assertEqual(hit.content, first.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cars[0].images.order_by('id').first().delete()
+        self.assertEqual(self.client.get(reverse('car-list'), {'ordering': 'price'})['X-Cache'], 'MISS')
+
+    def test_admin_bulk_approval_invalidates(self):
+        from django.contrib.admin.sites import site
+        pending = self.create_cars(1, is_approved=False)[0]
+        self.assertEqual(self.client.get(reverse('car-list')).data['count'], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            site._registry[Car].approve_selected_cars(_MessageRequest(), Car.objects.filter(pk=pending.pk))
+        response = self.client.get(reverse('car-list'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 4)
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.client.force_authenticate(self.cars[0].seller)
+        self.assertFalse(self.client.get(reverse('car-list')).has_header('X-Cache'))
+
+    def test_brand_list_invalidated_by_brand_write(self):
+        self.client.get(reverse('brand-list'))
+        self.assertEqual(self.client.get(reverse('brand-list'))['X-Cache'], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            Brand.objects.create(name='Kia')
+        response = self.client.get(reverse('brand-list'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 2)
+
+
+class ConditionalGetTests(CarFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cars = cls.create_cars(3)
+
+    def test_compare_returns_304_before_serializing(self):
+        url = reverse('car-compare')
+        ids = ','.join(str(car.pk) for car in self.cars)
+        first = self.client.get(url, {'ids': ids})
+        self.assertTrue(first['ETag'].startswith('W/"'))
+        self.assertNotIn('Last-Modified', first) # max(updated_at) cannot see deletions or nested changes
+        with self.assertNumQueries(1):  # only the validator aggregate
+            response = self.client.get(url, {'ids': ids}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+        self.cars[1].save()
+        response = self.client.get(url, {'ids': ids}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since_never_hides_a_deletion(self):
+        first = self.client.get(reverse('car-list'))
+        self.assertNotIn('Last-Modified', first)
+        since = http_date(time.time() + 60)
+        self.cars[2].delete()
+        cache.clear()
+        response = self.client.get(reverse('car-list'), HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual((response.status_code, response.data['count']), (200, 2))
+
+    def test_detail_revalidates_and_404s_normally(self):
+        url = reverse('car-detail', args=[self.cars[0].pk])
+        first = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(reverse('car-detail', args=[0]), HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+    def test_cached_list_revalidates_without_queries(self):
+        first = self.client.get(reverse('car-list'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('car-list'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_deletion_changes_list_etag(self):
+        self.client.force_authenticate(self.cars[0].seller)  # bypass the anonymous response cache
+        first = self.client.get(reverse('car-list'))
+        Car.objects.filter(pk=self.cars[2].pk).delete()
+        self.assertEqual(self.client.get(reverse('car-list'), HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+
+class ImageVariantTests(CarFixturesMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=media_root, CAR_IMAGE_VARIANTS_ASYNC=False)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.car = self.create_cars(1)[0]
+        self.car.images.all().delete()
+
+    def upload(self, size=(2000, 1500)):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'JPEG')
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_generates_variants_served_by_serializers(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = CarImage.objects.create(car=self.car, image=self.upload())
+        image.refresh_from_db()
+        self.assertEqual((image.width, image.height), (2000, 1500))
+        self.assertEqual(image.variants['sizes']['thumb']['width'], 320)
+        self.assertTrue(image.variant_path('thumb', 'webp').endswith('_thumb.webp'))
+
+        row = self.client.get(reverse('car-list')).data['results'][0]
+        self.assertTrue(row['main_image_url'].endswith('_thumb.jpg'))
+        self.assertTrue(row['main_image_webp_url'].endswith('_thumb.webp'))
+        detail = self.client.get(reverse('car-detail', args=[self.car.pk])).data
+        self.assertEqual(detail['images'][0]['variants']['medium']['height'], 600)
+
+    def test_backfill_command(self):
+        with self.settings(CAR_IMAGE_VARIANTS_ASYNC=True):  # nothing runs: on_commit never fires in TestCase
+            image = CarImage.objects.create(car=self.car, image=self.upload((640, 480)))
+        self.assertEqual(image.variants, {})
+        call_command('generate_image_variants', stdout=StringIO())
+        image.refresh_from_db()
+        self.assertEqual(image.variants['sizes']['large']['width'], 640)  # never upscaled
+
+
+class ListingSummaryTests(CarFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.car = cls.create_cars(1)[0]
+
+    def test_summary_follows_related_writes(self):
+        self.car.refresh_from_db()
+        self.assertEqual((self.car.brand_name, self.car.model_name), ('Maruti', 'Swift'))
+        self.assertEqual(self.car.primary_image, self.car.images.order_by('id').first().image.name)
+
+        self.car.brand.name = 'Maruti Suzuki'
+        self.car.brand.save()
+        self.car.seller.username = 'renamed'
+        self.car.seller.save()
+        self.car.images.order_by('id').first().delete()
+        self.car.refresh_from_db()
+        self.assertEqual(self.car.brand_name, 'Maruti Suzuki')
+        self.assertEqual(self.car.seller_username, 'renamed')
+        self.assertTrue(self.car.primary_image.endswith('_back.jpg'))
+
+    def test_reconcile_command_repairs_drift(self):
+        Car.objects.filter(pk=self.car.pk).update(model_name='stale', primary_image='')
+        out = StringIO()
+        call_command('reconcile_car_summaries', stdout=out)
+        self.assertIn('1 car(s) have drifted', out.getvalue())
+        call_command('reconcile_car_summaries', '--fix', stdout=StringIO())
+        self.car.refresh_from_db()
+        self.assertEqual(self.car.model_name, 'Swift')
+        self.assertTrue(self.car.primary_image.endswith('_front.jpg'))
+
+
+class BulkImportTests(CarFixturesMixin, APITestCase):
+    CSV_FEED = (
+        "title,brand,model,price,fuel_type,year,transmission,condition,mileage,engine_type,description\n"
+        "City ZX,Honda,City,900000,petrol,2020,manual,used,12000,1.5 i-VTEC,One owner\n"
+        "Swift VXI,Maruti,Swift,550000,petrol,2019,manual,used,30000,,\n"
+        "Broken,Honda,City,not-a-price,petrol,2020,manual,used,100,,\n"
+        "Nexon EV,Tata,Nexon,1450000,electric,2023,automatic,new,0,,\n"
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='dealer', password='pass', is_seller=True)
+        cls.create_cars(1)  # Maruti Swift already exists
+
+    def test_csv_body_import_reports_row_errors(self):
+        self.client.force_authenticate(self.seller)
+        # One chunk: brands (select/insert/select), models (same), the insert, two savepoint
+        # statements and, on PostgreSQL, the search vector update. Independent of row count.
+        with self.assertNumQueries(10 if connection.vendor == 'postgresql' else 9):
+            response = self.client.post(reverse('car-bulk-import'), self.CSV_FEED, content_type='text/csv')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 4)
+        self.assertIn('price', response.data['errors'][0]['errors'])
+
+        self.assertEqual(Brand.objects.filter(name__in=['Honda', 'Tata', 'Maruti']).count(), 3)
+        self.assertEqual(CarModel.objects.filter(name='Swift').count(), 1)
+        nexon = Car.objects.get(title='Nexon EV')
+        self.assertEqual((nexon.brand_name, nexon.model_name, nexon.seller_username), ('Tata', 'Nexon', 'dealer'))
+        self.assertFalse(nexon.is_approved)
+
+    def test_requires_seller(self):
+        self.client.force_authenticate(User.objects.create_user(username='buyer', password='pass'))
+        response = self.client.post(reverse('car-bulk-import'), self.CSV_FEED, content_type='text/csv')
+        self.assertEqual(response.status_code, 403)
+
+    def test_import_command_jsonl(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as feed:
+            feed.write('{"title": "Creta SX", "brand": "Hyundai", "model": "Creta", "price": "1200000", '
+                       '"fuel_type": "diesel", "year": 2021, "transmission": "automatic", "mileage": 20000}\n')
+            feed.write('not json\n')
+        self.addCleanup(os.remove, feed.name)
+        err = StringIO()
+        call_command('import_cars', feed.name, '--seller', 'dealer', '--approve', '--chunk-size', '1', stdout=StringIO(), stderr=err)
+        self.assertIn('Row 2', err.getvalue())
+        self.assertTrue(Car.objects.get(title='Creta SX').is_approved)
+
+
+class _MessageRequest:
+    """Just enough of a request for ModelAdmin.message_user()."""
+    _messages = type('Messages', (), {'add': lambda self, *args, **kwargs: None})()
+
+
+class CarFacetsTests(CarFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cars = cls.create_cars(6)
+        Car.objects.filter(pk__in=[car.pk for car in cls.cars[:2]]).update(fuel_type='diesel', price=1250000, mileage=45000)
+        cls.pending = cls.create_cars(1, is_approved=False)[0]
+
+    def test_counts_every_facet_for_the_filtered_set(self):
+        response = self.client.get(reverse('car-facets'))
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertEqual(data['count'], 6)
+        self.assertEqual(data['brand'], [{'value': self.cars[0].brand_id, 'label': 'Maruti', 'count': 6}])
+        self.assertEqual(
+            data['fuel_type'],
+            [{'value': 'petrol', 'label': 'Petrol', 'count': 4}, {'value': 'diesel', 'label': 'Diesel', 'count': 2}],
+        )
+        self.assertEqual(data['price'], [
+            {'min': 500000, 'max': 600000, 'count': 4}, {'min': 1200000, 'max': 1300000, 'count': 2},
+        ])
+        self.assertEqual(sum(bucket['count'] for bucket in data['mileage']), 6)
+
+        response = self.client.get(reverse('car-facets'), {'fuel_type': 'diesel'})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['mileage'], [{'min': 40000, 'max': 50000, 'count': 2}])
+
+    def test_cached_until_approval_changes(self):
+        self.client.get(reverse('car-facets'), {'condition': 'used'})
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('car-facets'), {'condition': 'used', 'page': 3})
+        self.assertEqual(response.data['count'], 6)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pending.is_approved = True
+            self.pending.save()
+        response = self.client.get(reverse('car-facets'), {'condition': 'used'})
+        self.assertEqual(response.data['count'], 7)
+
+
+class AsyncCatalogTests(CarFixturesMixin, APITestCase):
+    """cars.async_views must answer exactly like the sync viewsets they wrap."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cars = cls.create_cars(3)
+        cls.pending = cls.create_cars(1, seller=cls.cars[0].seller, is_approved=False)[0]
+        cls.token = str(RefreshToken.for_user(cls.cars[0].seller).access_token)
+
+    @override_settings(RESPONSE_CACHE_TIMEOUT=0) # Both stacks render; neither replays the other's body
+    async def get_both(self, url, data=None, headers=None):
+        sync_response = await sync_to_async(self.client.get)(url, data, headers=headers)
+        with self.settings(ROOT_URLCONF=__name__):
+            async_response = await self.async_client.get(url, data, headers=headers)
+        return sync_response, async_response
+
+    async def test_reads_match_sync_views(self):
+        ids = ','.join(str(car.pk) for car in self.cars)
+        requests = [
+            (reverse('car-list'), {'ordering': 'price'}, None),
+            (reverse('car-list'), {'fuel_type': 'petrol'}, {'Authorization': f'Bearer {self.token}'}),
+            (reverse('car-list'), {'brand': self.cars[0].brand_id, 'pagination': 'cursor'}, None),
+            (reverse('car-detail', args=[self.cars[0].pk]), None, None),
+            (reverse('car-detail', args=[self.pending.pk]), None, None),
+            (reverse('car-compare'), {'ids': ids}, None),
+            (reverse('car-compare'), None, None),
+            (reverse('brand-list'), None, None),
+            (reverse('carmodel-list'), {'brand': self.cars[0].brand_id}, None),
+        ]
+        for url, data, headers in requests:
+            with self.subTest(url=url, data=data):
+                sync_response, async_response = await self.get_both(url, data, headers)
+                self.assertEqual(async_response.status_code, sync_response.status_code)
+                self.assertEqual(async_response.json(), sync_response.json())
+                self.assertEqual(async_response.get('ETag'), sync_response.get('ETag'))
+
+    async def test_cache_and_writes(self):
+        with self.settings(ROOT_URLCONF=__name__):
+            self.assertTrue(iscoroutinefunction(resolve(reverse('car-list')).func))
+            first = await self.async_client.get(reverse('car-list'))
+            self.assertEqual(first['X-Cache'], 'MISS')
+            hit = await self.async_client.get(reverse('car-list'))
+            self.assertEqual(hit['X-Cache'], 'HIT')
+            self.assertEqual(hit.content, first.content)
+            self.assertEqual((await self.async_client.get(reverse('car-list'), headers={'If-None-Match': first['ETag']})).status_code, 304)
+
+            # Writes on the same URL are handed to the sync viewset.
+            self.assertEqual((await self.async_client.post(reverse('car-list'), {})).status_code, 401)
+
+
+class CarAdminChangelistTests(CarFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cars = cls.create_cars(3)
+        cls.admin = User.objects.create_superuser(username='admin', password='pass')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def changelist(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:cars_car_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_queries_do_not_grow_with_rows_or_sellers(self):
+        response, queries = self.changelist()
+        self.assertContains(response, 'View Images (2)', count=3)
+        self.create_cars(5) # A second seller, more rows
+        self.assertEqual(self.changelist()[1], queries)
+
+    def test_created_filter_uses_fixed_ranges(self):
+        with CaptureQueriesContext(connection) as queries:
+            response, _ = self.changelist()
+        self.assertFalse([query for query in queries if 'MIN(' in query['sql'] or 'MAX(' in query['sql'] or 'DISTINCT' in query['sql']])
+        Car.objects.filter(pk=self.cars[0].pk).update(created_at=timezone.now() - datetime.timedelta(days=30))
+        response, _ = self.changelist(created_at__gte=(timezone.now() - datetime.timedelta(days=7)).date())
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_autocomplete_filter(self):
+        other = self.create_cars(2)[0]
+        response, _ = self.changelist(seller__id__exact=other.seller_id)
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertContains(response, f'<option value="{other.seller_id}" selected>{other.seller.username}</option>', html=True)
+        self.assertContains(response, 'cars/js/autocomplete_filter.js')
+
+        url = reverse('admin:autocomplete')
+        results = self.client.get(url, {'app_label': 'cars', 'model_name': 'car', 'field_name': 'seller', 'term': other.seller.username}).json()
+        self.assertEqual([item['id'] for item in results['results']], [str(other.seller_id)])
+
+    def test_decade_filter_and_actions(self):
+        self.assertEqual(self.changelist(decade='2010')[0].context['cl'].result_count, 3) # Years 2015-2017
+        self.assertEqual(self.changelist(decade='2020')[0].context['cl'].result_count, 0)
+
+        self.client.post(reverse('admin:cars_car_changelist'), {
+            'action': 'reject_selected_cars', '_selected_action': [car.pk for car in self.cars],
+        })
+        self.assertFalse(Car.objects.filter(is_approved=True).exists())
+
+
+class ModerationQueueTests(CarFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pending = cls.create_cars(12, is_approved=False)
+        cls.approved = cls.create_cars(1)[0]
+        cls.staff = User.objects.create_user(username='moderator', is_staff=True)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.staff)
+
+    def queue(self):
+        seen, url = [], reverse('moderation-list')
+        while url:
+            data = self.client.get(url).data
+            self.assertNotIn('count', data)
+            seen.extend(car['id'] for car in data['results'])
+            url = data['next']
+        return seen
+
+    def test_queue_is_pending_oldest_first_in_cursor_pages(self):
+        self.assertEqual(self.queue(), [car.pk for car in self.pending]) # Two pages of PAGE_SIZE 10
+
+        self.client.force_authenticate(self.pending[0].seller)
+        self.assertEqual(self.client.get(reverse('moderation-list')).status_code, 403)
+
+    def test_decide_applies_in_chunks_with_one_event_each(self):
+        events = []
+        handler = lambda sender, car_ids, is_approved, **kwargs: events.append((sorted(car_ids), is_approved))
+        cars_moderated.connect(handler)
+        self.addCleanup(cars_moderated.disconnect, handler)
+        stale = Car.objects.get(pk=self.pending[0].pk).updated_at
+
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('car-list')).data['count'], 1) # Cached for anonymous readers
+        self.client.force_authenticate(self.staff)
+        ids = [car.pk for car in self.pending[:3]] + [self.approved.pk, 999999]
+        with self.settings(CAR_MODERATION_CHUNK_SIZE=2), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('moderation-decide'), {'ids': ids, 'decision': 'approve'}, format='json')
+        self.assertEqual(response.data, {'updated': 3, 'unchanged': 1, 'not_found': [999999]})
+        self.assertEqual(events, [(ids[:2], True), ([ids[2]], True)])
+        self.assertGreater(Car.objects.get(pk=self.pending[0].pk).updated_at, stale)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('car-list')).data['count'], 4) # The cached page was invalidated
+
+    def test_rejected_cars_leave_the_queue(self):
+        url, rejected = reverse('moderation-decide'), self.pending[0]
+        response = self.client.post(url, {'ids': [rejected.pk, self.approved.pk], 'decision': 'reject'}, format='json')
+        self.assertEqual(response.data, {'updated': 2, 'unchanged': 0, 'not_found': []})
+        self.assertEqual(self.client.post(url, {'ids': [rejected.pk], 'decision': 'reject'}, format='json').data['unchanged'], 1)
+        self.assertEqual(self.queue(), [car.pk for car in self.pending[1:]])
+
+        self.client.force_authenticate(rejected.seller)
+        self.assertEqual(self.client.patch(reverse('car-detail', args=[rejected.pk]), {'title': 'Fixed'}).status_code, 200)
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.queue()[0], rejected.pk) # Edited, so back in the queue
+
+    def test_decision_is_validated(self):
+        url = reverse('moderation-decide')
+        self.assertEqual(self.client.post(url, {'ids': [], 'decision': 'approve'}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(url, {'ids': [1], 'decision': 'maybe'}, format='json').status_code, 400)
+
+
+class TaxonomyTests(CarFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.car = cls.create_cars(1)[0]
+        cls.city = CarModel.objects.create(brand=Brand.objects.create(name='Honda'), name='City')
+
+    def test_tree_is_rendered_once_per_generation(self):
+        url = reverse('car-taxonomy')
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.json(), [
+            {'id': self.city.brand_id, 'name': 'Honda', 'models': [{'id': self.city.pk, 'name': 'City'}]},
+            {'id': self.car.brand_id, 'name': 'Maruti', 'models': [{'id': self.car.model_id, 'name': 'Swift'}]},
+        ])
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CarModel.objects.create(brand=self.city.brand, name='Amaze')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([model['name'] for model in response.json()[0]['models']], ['Amaze', 'City'])
+
+    def test_encodings_are_tagged_as_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            CarModel.objects.bulk_create(CarModel(brand=self.city.brand, name=f'Model {i}') for i in range(10))
+        url = reverse('car-taxonomy')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], etag[:-1] + '-gzip"') # Still strong, and distinct from the identity body's
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_car_serializer_validates_ids_from_the_snapshot(self):
+        data = {
+            'title': 'City VX', 'brand_id': self.city.brand_id, 'model_id': self.city.pk, 'price': 900000,
+            'fuel_type': 'petrol', 'year': 2020, 'transmission': 'manual', 'condition': 'used', 'mileage': 100,
+        }
+        self.client.get(reverse('car-taxonomy')) # Builds the snapshot
+        with self.assertNumQueries(0):
+            serializer = CarCreateUpdateSerializer(data=data)
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['model'].name, 'City')
+
+        serializer = CarCreateUpdateSerializer(data={**data, 'brand_id': 999999})
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['brand_id'][0].code, 'does_not_exist')
+
+
+class AutocompleteTests(CarFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.swift = cls.create_cars(2)[0].model
+        honda = Brand.objects.create(name='Honda')
+        cls.city = CarModel.objects.create(brand=honda, name='City')
+        cls.civic = CarModel.objects.create(brand=honda, name='Civic')
+        cls.create_cars(1, brand=honda, model=cls.civic)
+
+    def suggest(self, q, **params):
+        return self.client.get(reverse('car-autocomplete'), {'q': q, **params}).data['results']
+
+    def test_prefixes_rank_by_approved_listings(self):
+        self.assertEqual([item['label'] for item in self.suggest('HON')], ['Honda', 'Honda Civic', 'Honda City'])
+        self.assertEqual([(item['label'], item['listings']) for item in self.suggest('honda c')], [('Honda Civic', 1), ('Honda City', 0)])
+        self.assertEqual([item['type'] for item in self.suggest('maruti')], ['brand', 'model']) # Brand ties its only model at 2
+        self.assertEqual(self.suggest('sw')[0], {'type': 'model', 'id': self.swift.pk, 'brand_id': self.swift.brand_id, 'label': 'Maruti Swift', 'listings': 2})
+        self.assertEqual(self.suggest('c', limit=1)[0]['label'], 'Honda Civic')
+        self.assertEqual(self.suggest('  '), [])
+
+    def test_writes_update_the_index_without_reads_hitting_the_database(self):
+        self.suggest('c')
+        with self.assertNumQueries(0):
+            self.suggest('ci')
+
+        civic = Car.objects.get(model=self.civic)
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(2):
+                Car.objects.create(
+                    seller=civic.seller, title='City', brand=self.city.brand, model=self.city, price=1, fuel_type='petrol',
+                    year=2020, transmission='manual', mileage=1, is_approved=True,
+                )
+        self.assertEqual([item['label'] for item in self.suggest('honda ci')], ['Honda City', 'Honda Civic'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            civic.model = self.city
+            civic.save()
+        self.assertEqual([(item['label'], item['listings']) for item in self.suggest('honda ci')], [('Honda City', 3), ('Honda Civic', 0)])
+        with self.captureOnCommitCallbacks(execute=True):
+            civic.delete()
+        self.assertEqual(self.suggest('honda city')[0]['listings'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CarModel.objects.create(brand=self.city.brand, name='Jazz')
+        self.assertEqual(self.suggest('jaz')[0]['label'], 'Honda Jazz')
+
+    def test_concurrent_recounts_apply_in_read_order(self):
+        self.suggest('sw') # Builds the index
+        self.addCleanup(setattr, autocomplete, '_index', None) # Its counts are made up
+        reads = iter([{self.swift.pk: 1}, {self.swift.pk: 3}]) # A stale count, then the current one
+        first_read, release = threading.Event(), threading.Event()
+
+        def load_model_counts(model_ids):
+            counts = next(reads)
+            if not first_read.is_set():
+                first_read.set()
+                release.wait(5)
+            return counts
+
+        with mock.patch.object(autocomplete, 'load_model_counts', side_effect=load_model_counts):
+            stale = threading.Thread(target=autocomplete.recount_models, args=[{self.swift.pk}])
+            stale.start()
+            first_read.wait(5)
+            current = threading.Thread(target=autocomplete.recount_models, args=[{self.swift.pk}])
+            current.start()
+            current.join(0.2) # Waits for the stale recount instead of overtaking it
+            release.set()
+            stale.join()
+            current.join()
+        self.assertEqual(self.suggest('sw')[0]['listings'], 3)
+
+
+class RowListSerializerTests(CarFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_cars(3)
+        cls.create_cars(1, condition='new', is_approved=False, primary_image='', primary_image_webp='')
+
+    def test_rows_render_the_same_bytes_as_instances(self):
+        context = {'request': APIRequestFactory().get('/api/cars/cars/')}
+        for serializer_class in (CarListSerializer, ModerationQueueSerializer):
+            cars = serializer_class.setup_eager_loading(Car.objects.order_by('pk'))
+            expected = JSONRenderer().render(ListSerializer(cars, child=serializer_class(), context=context).data)
+            for source in (cars, serializer_class.get_rows(cars)):
+                self.assertEqual(JSONRenderer().render(serializer_class(source, many=True, context=context).data), expected)
+
+    def test_list_pages_come_from_rows(self):
+        with self.assertNumQueries(3): # Validators, COUNT, page
+            response = self.client.get(reverse('car-list'))
+        self.assertEqual(response.data['count'], 3)
+        self.assertTrue(response.data['results'][0]['main_image_url'].startswith('http://testserver/'))
+
+
+class ResponseCompressionTests(CarFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cars = cls.create_cars(3)
+
+    def test_fast_renderer_matches_json_renderer(self):
+        data = {
+            'price': Decimal('512345.50'), 'url': reverse_lazy('car-list'), 'text': 'a\u2028b\u2029 é',
+            'at': datetime.datetime(2024, 5, 1, 10, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2024, 5, 1), 'ids': Car.objects.order_by('pk').values_list('pk', flat=True),
+            'big': 2 ** 70, 'nested': [{'none': None, 'flag': True, 'ratio': 0.25}],
+        }
+        for media_type in (None, 'application/json; indent=4'):
+            self.assertEqual(FastJSONRenderer().render(data, media_type), JSONRenderer().render(data, media_type))
+
+    def test_negotiation_follows_quality_then_server_preference(self):
+        def negotiate(accept_encoding):
+            return compression.negotiate(RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding), ['br', 'gzip'])
+        self.assertEqual(negotiate('gzip, deflate, br'), 'br')
+        self.assertEqual(negotiate('gzip;q=0.8, br;q=0.5'), 'gzip')
+        self.assertEqual(negotiate('br;q=0, *'), 'gzip')
+        self.assertIsNone(negotiate('identity'))
+        self.assertIsNone(negotiate(''))
+
+    def test_cache_hits_serve_the_stored_encodings(self):
+        identity = self.client.get(reverse('car-list'))
+        self.assertIn('Accept-Encoding', identity['Vary'])
+        self.assertFalse(identity.has_header('Content-Encoding'))
+        cache.clear()
+
+        first = self.client.get(reverse('car-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual((first['X-Cache'], first['Content-Encoding']), ('MISS', 'gzip'))
+        self.assertEqual(gzip.decompress(first.content), identity.content)
+        self.assertTrue(first['ETag'].startswith('W/"'))
+
+        with mock.patch.object(compression, 'encode', side_effect=AssertionError('recompressed')):
+            for encoding in compression.get_encodings():
+                hit = self.client.get(reverse('car-list'), HTTP_ACCEPT_ENCODING=encoding)
+                self.assertEqual((hit['X-Cache'], hit['Content-Encoding']), ('HIT', encoding))
+            plain = self.client.get(reverse('car-list'), HTTP_ACCEPT_ENCODING='gzip;q=0')
+            self.assertEqual(plain.content, identity.content)
+            revalidated = self.client.get(reverse('car-list'), HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(revalidated.status_code, 304)
+
+    def test_uncached_responses_are_compressed_by_the_middleware(self):
+        self.client.force_authenticate(self.cars[0].seller)
+        response = self.client.get(reverse('car-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.client.get(reverse('car-list')).content)
+
+    def test_secret_bearing_responses_are_not_compressed(self):
+        self.cars[0].seller.set_password('pass')
+        self.cars[0].seller.save()
+        response = self.client.post(
+            reverse('token_obtain_pair'), {'username': self.cars[0].seller.username, 'password': 'pass'},
+            HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(response.content), settings.RESPONSE_COMPRESSION_MIN_LENGTH)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        refreshed = self.client.post(reverse('token_refresh'), {'refresh': response.data['refresh']}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(refreshed.has_header('Content-Encoding'))
+
+
+class CarExportTests(CarFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cars = cls.create_cars(5)
+        cls.create_cars(1, is_approved=False)
+
+    def export(self, **params):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            response = self.client.get(reverse('car-export'), params)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.streaming)
+            content = b''.join(response.streaming_content).decode('utf-8')
+        # Django warns (and buffers the whole body) when it has to convert between sync and async iterators.
+        self.assertFalse([warning for warning in caught if 'StreamingHttpResponse' in str(warning.message)])
+        return response, content
+
+    def test_requires_authentication_and_valid_params(self):
+        self.assertEqual(self.client.get(reverse('car-export')).status_code, 401)
+        self.client.force_authenticate(self.cars[0].seller)
+        self.assertEqual(self.client.get(reverse('car-export'), {'output': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('car-export'), {'updated_since': 'yesterday'}).status_code, 400)
+
+    @override_settings(CAR_EXPORT_CHUNK_SIZE=2)
+    def test_csv_streams_every_approved_car_in_chunks(self):
+        self.client.force_authenticate(self.cars[0].seller)
+        response, content = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(len(list(self.client.get(reverse('car-export')).streaming_content)), 3)
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual([int(row['id']) for row in rows], [car.pk for car in self.cars])
+        self.assertEqual((rows[0]['brand'], rows[0]['model'], rows[0]['price']), ('Maruti', 'Swift', '500000.00'))
+        # Every row is a valid bulk-import feed row.
+        self.assertEqual(sum(1 for _ in iter_rows(content.splitlines(), 'csv')), 5)
+
+    def test_jsonl_delta_since_a_watermark(self):
+        self.client.force_authenticate(self.cars[0].seller)
+        _, content = self.export(output='jsonl')
+        watermark = json.loads(content.splitlines()[-1])['updated_at']
+        Car.objects.filter(pk=self.cars[1].pk).update(title='Repriced', updated_at=timezone.now() + datetime.timedelta(seconds=1))
+
+        response, content = self.export(output='jsonl', updated_since=watermark)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line)['title'] for line in content.splitlines()], ['Car 4', 'Repriced'])
+
+        tomorrow = (timezone.localdate() + datetime.timedelta(days=1)).isoformat()
+        self.assertEqual(self.export(updated_since=tomorrow)[1].splitlines(), [','.join(EXPORT_COLUMNS)]) # Header only
+
+    async def test_streams_asynchronously_under_asgi(self):
+        token = str(RefreshToken.for_user(self.cars[0].seller).access_token)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            response = await self.async_client.get(
+                reverse('car-export'), {'output': 'jsonl'}, headers={'Authorization': f'Bearer {token}'},
+            )
+            self.assertTrue(response.is_async)
+            content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertFalse([warning for warning in caught if 'StreamingHttpResponse' in str(warning.message)])
+        self.assertEqual([json.loads(line)['id'] for line in content.splitlines()], [car.pk for car in self.cars])
+
+    def test_command_writes_the_same_rows(self):
+        path = os.path.join(tempfile.mkdtemp(), 'cars.jsonl')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        out = StringIO()
+        call_command('export_cars', path, stdout=out)
+        self.assertIn('Exported 5 car(s)', out.getvalue())
+        with open(path, encoding='utf-8') as export:
+            self.assertEqual([json.loads(line)['id'] for line in export], [car.pk for car in self.cars])
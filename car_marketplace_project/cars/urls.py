@@ -1,8 +1,10 @@
 # D:\car_showroom_project\car_marketplace_project\cars\urls.py
 
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BrandViewSet, CarModelViewSet, CarViewSet
+from .async_views import AsyncBrandViewSet, AsyncCarModelViewSet, AsyncCarViewSet
+from .views import BrandViewSet, CarModelViewSet, CarViewSet, ModerationQueueViewSet, TaxonomyView, AutocompleteView, CarExportView
 
 router = DefaultRouter()
 # Adjusted to match frontend's /api/cars/brands/ request
@@ -11,7 +13,37 @@ router.register(r'cars/brands', BrandViewSet, basename='brand')
 router.register(r'cars/models', CarModelViewSet, basename='carmodel')
 # CRITICAL FIX: Adjusted to match frontend's /api/cars/cars/ request for the main car list
 router.register(r'cars/cars', CarViewSet, basename='car')
+router.register(r'cars/moderation', ModerationQueueViewSet, basename='moderation')
 
-urlpatterns = [
+# The router's sync view per route name; the async read views hand every other method to it.
+router_views = {}
+for pattern in router.urls:
+    router_views.setdefault(pattern.name, pattern.callback)
+
+
+def async_read(route, viewset, action, name, detail=False):
+    view = viewset.as_view(
+        {'get': action}, basename=name.rsplit('-', 1)[0], detail=detail, fallback_view=router_views[name],
+    )
+    return path(route, view, name=name)
+
+
+# Same URLs and names as the router; listed first, they take over the GETs.
+async_urlpatterns = [
+    async_read('cars/brands/', AsyncBrandViewSet, 'list', 'brand-list'),
+    async_read('cars/brands/<int:pk>/', AsyncBrandViewSet, 'retrieve', 'brand-detail', detail=True),
+    async_read('cars/models/', AsyncCarModelViewSet, 'list', 'carmodel-list'),
+    async_read('cars/models/<int:pk>/', AsyncCarModelViewSet, 'retrieve', 'carmodel-detail', detail=True),
+    async_read('cars/cars/', AsyncCarViewSet, 'list', 'car-list'),
+    async_read('cars/cars/compare/', AsyncCarViewSet, 'compare', 'car-compare'),
+    async_read('cars/cars/<int:pk>/', AsyncCarViewSet, 'retrieve', 'car-detail', detail=True),
+]
+
+sync_urlpatterns = [
+    path('cars/taxonomy/', TaxonomyView.as_view(), name='car-taxonomy'),
+    path('cars/autocomplete/', AutocompleteView.as_view(), name='car-autocomplete'),
+    path('cars/export/', CarExportView.as_view(), name='car-export'),
     path('', include(router.urls)),
-]
\ No newline at end of file
+]
+
+urlpatterns = (async_urlpatterns if getattr(settings, 'CARS_ASYNC_READS', False) else []) + sync_urlpatterns
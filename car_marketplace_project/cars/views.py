@@ -3,38 +3,139 @@ from django.shortcuts import render
 # Create your views here.
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework import permissions
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
 from django.db.models import Q # For OR queries
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.filters import OrderingFilter
 
 from .models import Brand, CarModel, Car, CarImage
 from .serializers import (
     BrandSerializer, CarModelSerializer,
     CarListSerializer, CarDetailSerializer, CarCreateUpdateSerializer,
-    CarImageSerializer
+    CarImageSerializer, ModerationDecisionSerializer, ModerationQueueSerializer
 )
 from users.permissions import IsSeller, IsOwnerOrAdmin
+from car_marketplace_project import compression
+from car_marketplace_project.conditional import ConditionalGetMixin
+from car_marketplace_project.pagination import KeysetPagination
+from .cache import AnonymousResponseCacheMixin, generation_token, normalize_query_params, visibility_scope
+from .facets import compute_facets
+from .exporter import EXPORT_FORMATS, CarExporter, parse_updated_since
+from .importer import CarImporter, decode_lines, detect_format, iter_rows
 from .filters import CarFilter
+from .moderation import moderate
+from .taxonomy import get_taxonomy
+from .autocomplete import get_index
+from .search import CarSearchFilter
 
-class BrandViewSet(viewsets.ReadOnlyModelViewSet):
+class BrandViewSet(AnonymousResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
+    response_cache_generations = ('brands',)
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
     permission_classes = [permissions.AllowAny]
     search_fields = ['name']
     ordering_fields = ['name']
 
-class CarModelViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = CarModel.objects.all()
+class CarModelViewSet(AnonymousResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
+    response_cache_generations = ('brands', 'car_models')
+    queryset = CarModel.objects.select_related('brand') # CarModelSerializer nests the brand
     serializer_class = CarModelSerializer
     permission_classes = [permissions.AllowAny]
     filterset_fields = ['brand'] # Filter models by brand ID
     search_fields = ['name']
     ordering_fields = ['name']
 
-class CarViewSet(viewsets.ModelViewSet):
-    filter_class = CarFilter # Using custom filterset
+class TaxonomyView(APIView):
+    """
+    The whole brand→model tree for dropdowns, in one response:
+    [{"id", "name", "models": [{"id", "name"}]}], ordered by name.
+
+    The body is rendered, and gzip/brotli encoded, once per process and generation
+    (cars.taxonomy) and sent as is, with a strong ETag over its bytes; If-None-Match gets
+    a 304. Each encoding is tagged as its own variant (compression.variant_etag).
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = [] # Public data; skip decoding any token
+
+    def get(self, request):
+        taxonomy = get_taxonomy()
+        encoding = compression.negotiate(request, list(taxonomy.encoded))
+        etag = compression.variant_etag(taxonomy.etag, encoding)
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            patch_vary_headers(response, ('Accept-Encoding',))
+            response['ETag'] = etag
+            return response
+        response = HttpResponse(taxonomy.content, content_type='application/json')
+        response['ETag'] = taxonomy.etag
+        return compression.compress_response(request, response, taxonomy.encoded)
+
+
+class AutocompleteView(APIView):
+    """
+    Brand and model suggestions for the search box: `?q=` is matched as a prefix of brand
+    names, model names and "brand model", ranked by approved listings. Answered from the
+    in-process index in cars.autocomplete, without a query. `?limit=` caps the results (10, at most 25).
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    max_limit = 25
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), self.max_limit)
+        except ValueError:
+            raise ParseError("limit must be an integer.")
+        return Response({'results': get_index().search(request.query_params.get('q', ''), limit)})
+
+
+class CarExportView(APIView):
+    """
+    Every approved car as CSV (default) or JSON Lines (`?output=jsonl`), streamed in
+    updated_at order through cars.exporter, for partners and analytics that mirror the
+    catalog instead of paging through it. `?updated_since=` (ISO 8601) exports only the
+    cars changed since then. The columns are a valid dealer feed for bulk-import.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        fmt = request.query_params.get('output', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            raise ParseError(f"output must be one of: {', '.join(EXPORT_FORMATS)}.")
+        updated_since = request.query_params.get('updated_since')
+        if updated_since:
+            try:
+                updated_since = parse_updated_since(updated_since)
+            except ValueError:
+                raise ParseError("updated_since must be an ISO 8601 date or datetime.")
+        exporter = CarExporter(
+            fmt, updated_since or None, request=request, chunk_size=getattr(settings, 'CAR_EXPORT_CHUNK_SIZE', 2000),
+        )
+        # Django serves whichever kind of iterator it gets; a sync one under ASGI would be read whole first.
+        chunks = aiter(exporter) if isinstance(request._request, ASGIRequest) else iter(exporter)
+        response = StreamingHttpResponse(chunks, content_type=exporter.content_type)
+        response['Content-Disposition'] = f'attachment; filename="{exporter.filename}"'
+        return response
+
+
+class CarViewSet(AnonymousResponseCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    response_cache_generations = ('cars', 'car_images', 'brands', 'car_models', 'sellers')
+    response_cache_actions = ('list',) # Detail embeds the seller's full profile; not cached
+    conditional_actions = ('list', 'retrieve', 'compare')
+    validator_generations = ('car_images', 'brands', 'car_models', 'sellers') # Nested data outside Car.updated_at
+    filter_backends = [DjangoFilterBackend, CarSearchFilter, OrderingFilter] # Full-text ?search= on PostgreSQL
+    filterset_class = CarFilter # Using custom filterset
     search_fields = ['title', 'description', 'brand__name', 'model__name']
     ordering_fields = ['price', 'year', 'created_at']
+    pagination_class = KeysetPagination # ?pagination=cursor for constant-cost deep paging
 
     def get_queryset(self):
         """
@@ -44,21 +145,40 @@ class CarViewSet(viewsets.ModelViewSet):
         """
         user = self.request.user
         if user.is_authenticated and user.is_staff:
-            return Car.objects.all()
+            queryset = Car.objects.all()
         elif user.is_authenticated and user.is_seller:
-            return Car.objects.filter(Q(is_approved=True) | Q(seller=user)).distinct()
+            # Single-table OR: no duplicates possible, so no DISTINCT over every column.
+            queryset = Car.objects.filter(Q(is_approved=True) | Q(seller_id=user.pk))
         else:
-            return Car.objects.filter(is_approved=True)
+            queryset = Car.objects.filter(is_approved=True)
+        return self.setup_eager_loading(queryset.defer('search_vector'))
+
+    def setup_eager_loading(self, queryset):
+        # Each read serializer knows which relations it renders; let it pick the joins/prefetches.
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'setup_eager_loading'):
+            queryset = serializer_class.setup_eager_loading(queryset)
+        return queryset
+
+    def get_page_source(self, queryset):
+        """What list pages are cut from: the list serializer's column rows, not Car instances."""
+        serializer_class = self.get_serializer_class()
+        if self.action == 'list' and hasattr(serializer_class, 'get_rows'):
+            return serializer_class.get_rows(queryset)
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        return super().paginate_queryset(self.get_page_source(queryset))
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return CarCreateUpdateSerializer
-        elif self.action == 'retrieve':
+        elif self.action in ['retrieve', 'compare']:
             return CarDetailSerializer
         return CarListSerializer # Default for list
 
     def get_permissions(self):
-        if self.action in ['create']:
+        if self.action in ['create', 'bulk_import']:
             # Only authenticated sellers can create cars
             self.permission_classes = [permissions.IsAuthenticated, IsSeller]
         elif self.action in ['update', 'partial_update', 'destroy']:
@@ -75,16 +195,104 @@ class CarViewSet(viewsets.ModelViewSet):
             raise permissions.PermissionDenied("Only sellers can add cars.")
         serializer.save(seller=self.request.user)
 
-    @action(detail=False, methods=['get'])
-    def compare(self, request):
-        car_ids = request.query_params.get('ids')
+    def get_compare_queryset(self):
+        car_ids = self.request.query_params.get('ids')
         if not car_ids:
-            return Response({"detail": "Please provide car IDs for comparison (e.g., ?ids=1,2,3)."}, status=status.HTTP_400_BAD_REQUEST)
+            raise ParseError("Please provide car IDs for comparison (e.g., ?ids=1,2,3).")
 
         ids = [int(x) for x in car_ids.split(',') if x.strip().isdigit()]
         if not ids:
-            return Response({"detail": "Invalid car IDs provided."}, status=status.HTTP_400_BAD_REQUEST)
+            raise ParseError("Invalid car IDs provided.")
+        return Car.objects.filter(id__in=ids, is_approved=True)
+
+    @action(detail=False, methods=['get'])
+    def compare(self, request):
+        cars = self.get_compare_queryset()
+        not_modified = self.check_not_modified(request, cars)
+        if not_modified is not None:
+            return not_modified
+        cars = self.setup_eager_loading(cars)
+        serializer = self.get_serializer(cars, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Counts for every CarFilter option (brand, fuel type, transmission, condition, year)
+        plus price and mileage histograms, for the same filter parameters as the list.
+        Cached per normalized filter set until a listing changes.
+        """
+        cache_key = 'cars:facets:{}:{}:{}'.format(
+            generation_token('cars', 'brands'), visibility_scope(request.user), normalize_query_params(request.query_params)
+        )
+        facets = cache.get(cache_key)
+        if facets is None:
+            facets = compute_facets(self.filter_queryset(self.get_queryset()))
+            cache.set(cache_key, facets, getattr(settings, 'CAR_FACETS_CACHE_TIMEOUT', 300))
+        return Response(facets)
+
+    @action(detail=False, methods=['post'], url_path='bulk-import')
+    def bulk_import(self, request):
+        """
+        Import a dealer feed as CSV or JSON Lines, either as the raw request body
+        (Content-Type: text/csv or application/x-ndjson) or as a multipart `file` upload.
+        The body is streamed line by line; per-row errors are reported without aborting.
+        """
+        upload = request.FILES.get('file') if request.content_type.startswith('multipart/') else None
+        if upload is not None:
+            fmt = detect_format(upload.content_type, upload.name)
+            lines = decode_lines(upload)
+        else:
+            fmt = detect_format(request.content_type)
+            lines = decode_lines(request._request) # Read the body as a stream, never as one blob
+        fmt = request.query_params.get('input', fmt)
+        if fmt not in ('csv', 'jsonl'):
+            return Response(
+                {"detail": "Send CSV (text/csv) or JSON Lines (application/x-ndjson), or pass ?input=csv|jsonl."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        importer = CarImporter(seller=request.user, chunk_size=getattr(settings, 'CAR_IMPORT_CHUNK_SIZE', 500))
+        summary = importer.run(iter_rows(lines, fmt))
+        return Response(summary, status=status.HTTP_201_CREATED if summary['created'] else status.HTTP_200_OK)
+
+
+class ModerationQueuePagination(KeysetPagination):
+    """Always keyset: the queue is worked front to back and shrinks as it goes."""
+
+    def is_keyset_request(self, request):
+        return True
+
+
+class ModerationQueueViewSet(viewsets.GenericViewSet):
+    """
+    Staff moderation queue: pending cars (neither approved nor rejected) oldest-first, in
+    keyset pages served by the partial car_pending_created_idx, and `decide` for approving
+    or rejecting thousands of ids per call through cars.moderation.moderate().
+    """
+    queryset = Car.objects.filter(is_approved=False, rejected_at__isnull=True)
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = ModerationQueuePagination
+    ordering_fields = ['created_at']
+    keyset_ordering = 'created_at'
+
+    def get_serializer_class(self):
+        if self.action == 'decide':
+            return ModerationDecisionSerializer
+        return ModerationQueueSerializer
+
+    def get_queryset(self):
+        return ModerationQueueSerializer.setup_eager_loading(super().get_queryset())
+
+    def list(self, request):
+        page = self.paginate_queryset(ModerationQueueSerializer.get_rows(self.get_queryset()))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
 
-        cars = Car.objects.filter(id__in=ids, is_approved=True)
-        serializer = CarDetailSerializer(cars, many=True, context={'request': request})
-        return Response(serializer.data)
\ No newline at end of file
+    @action(detail=False, methods=['post'])
+    def decide(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        summary = moderate(
+            serializer.validated_data['ids'], approve=serializer.validated_data['decision'] == 'approve',
+            chunk_size=getattr(settings, 'CAR_MODERATION_CHUNK_SIZE', 500),
+        )
+        return Response(summary)
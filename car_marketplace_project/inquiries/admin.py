@@ -2,12 +2,19 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
+from cars.changelist import AutocompleteFilter, AutocompleteFilterMixin, EstimatedCountPaginator
 from .models import Inquiry
 
 @admin.register(Inquiry)
-class InquiryAdmin(admin.ModelAdmin):
+class InquiryAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     list_display = ('car', 'buyer', 'seller', 'status', 'created_at', 'updated_at')
-    list_filter = ('status', 'created_at', 'car__brand', 'car__model', 'seller')
+    list_select_related = ('car__brand', 'car__model', 'buyer', 'seller') # Car.__str__ reads brand and model
+    list_filter = (
+        'status', 'created_at',
+        ('car__brand', AutocompleteFilter), ('car__model', AutocompleteFilter), ('seller', AutocompleteFilter),
+    )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     search_fields = ('message', 'buyer__username', 'seller__username', 'car__title')
     readonly_fields = ('buyer', 'seller', 'car', 'created_at', 'updated_at')
     fieldsets = (
@@ -0,0 +1,39 @@
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Inquiry, SellerInquiryCounter
+
+STATUSES = [status for status, _ in Inquiry.STATUS_CHOICES]
+
+
+def adjust_counter(seller_id, status, delta, create=True):
+    """Add `delta` to one seller's count for `status`, creating the counter row on first use."""
+    counters = SellerInquiryCounter.objects.filter(seller_id=seller_id)
+    if not counters.update(**{status: F(status) + delta}) and create:
+        SellerInquiryCounter.objects.bulk_create([SellerInquiryCounter(seller_id=seller_id)], ignore_conflicts=True)
+        counters.update(**{status: F(status) + delta})
+
+
+def counts_from_inquiries(seller_ids=None):
+    """Recount from the Inquiry table: {seller_id: {status: count}}."""
+    inquiries = Inquiry.objects.all()
+    if seller_ids is not None:
+        inquiries = inquiries.filter(seller_id__in=seller_ids)
+    rows = inquiries.order_by().values('seller_id').annotate(
+        **{status: Count('pk', filter=Q(status=status)) for status in STATUSES}
+    )
+    return {row.pop('seller_id'): row for row in rows}
+
+
+def rebuild_counters(seller_ids=None):
+    """Replace the counters of `seller_ids` (or every seller) with a fresh recount."""
+    counts = counts_from_inquiries(seller_ids)
+    with transaction.atomic():
+        stale = SellerInquiryCounter.objects.all()
+        if seller_ids is not None:
+            stale = stale.filter(seller_id__in=seller_ids)
+        stale.delete()
+        SellerInquiryCounter.objects.bulk_create(
+            [SellerInquiryCounter(seller_id=seller_id, **row) for seller_id, row in counts.items()], batch_size=1000,
+        )
+    return counts
@@ -0,0 +1,237 @@
+import asyncio
+import json
+import logging
+import secrets
+import threading
+import weakref
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def user_channel(user_id):
+    return f'inquiries:user:{user_id}'
+
+
+def stream_ticket_key(ticket):
+    return f'inquiries:stream-ticket:{ticket}'
+
+
+def issue_stream_ticket(user_id, expires_at):
+    """
+    A random, single-use ticket that opens the event stream for `user_id` until `expires_at`
+    (the access token's exp). It goes in the stream URL instead of the token, since
+    EventSource cannot send headers and URLs end up in access logs; it lapses after
+    INQUIRY_EVENTS_TICKET_TIMEOUT seconds. Kept in the default cache, which must be shared
+    (Redis) once there are several workers, as the Redis broker already requires.
+    """
+    ticket = secrets.token_urlsafe(32)
+    cache.set(stream_ticket_key(ticket), (user_id, expires_at), getattr(settings, 'INQUIRY_EVENTS_TICKET_TIMEOUT', 30))
+    return ticket
+
+
+async def aredeem_stream_ticket(ticket):
+    """(user id, expires_at) for a ticket from issue_stream_ticket, or None; a ticket works once."""
+    key = stream_ticket_key(ticket)
+    claims = await cache.aget(key)
+    if claims is None or not await cache.adelete(key): # Only one of two concurrent redeemers deletes it
+        return None
+    return claims
+
+
+class InProcessSubscription:
+    def __init__(self, broker, channels, queue, loop):
+        self.broker = broker
+        self.channels = channels
+        self.queue = queue
+        self.loop = loop
+
+    async def get(self, timeout=None):
+        """Next event, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Fan-out to the streams held by this process. Publishing is thread-safe (events are
+    published from on_commit hooks in sync request threads) and never blocks: each
+    subscriber has a bounded queue and events beyond it are dropped for that subscriber.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    async def subscribe(self, channels):
+        subscription = InProcessSubscription(
+            self, tuple(channels), asyncio.Queue(self.queue_size), asyncio.get_running_loop(),
+        )
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(self._offer, subscription.queue, event)
+            except RuntimeError: # Event loop already closed; the stream is going away
+                self.unsubscribe(subscription)
+
+    @staticmethod
+    def _offer(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning("Inquiry event stream is not keeping up; dropped %s", event.get('type'))
+
+
+class RedisSubscription:
+    def __init__(self, local, listener):
+        self.local = local
+        self.listener = listener
+
+    async def get(self, timeout=None):
+        return await self.local.get(timeout)
+
+    async def close(self):
+        await self.local.close()
+        await self.listener.remove(self.local.channels)
+
+
+class RedisListener:
+    """
+    One pub/sub connection and the task reading it, shared by every stream on one event
+    loop. Channels are subscribed while at least one stream wants them; each message is
+    handed to the broker's InProcessBroker, which fans it out to the streams' queues.
+    """
+
+    def __init__(self, url, local):
+        from redis import asyncio as aioredis
+
+        self.pubsub = aioredis.from_url(url).pubsub(ignore_subscribe_messages=True)
+        self.local = local
+        self.counts = Counter()
+        self.lock = asyncio.Lock()
+        self.task = None
+
+    async def add(self, channels):
+        async with self.lock:
+            new = [channel for channel in channels if not self.counts[channel]]
+            self.counts.update(channels)
+            if new:
+                await self.pubsub.subscribe(*new)
+            if self.task is None or self.task.done(): # listen() returns once nothing is subscribed
+                self.task = asyncio.create_task(self.read())
+
+    async def remove(self, channels):
+        async with self.lock:
+            self.counts.subtract(channels)
+            unused = [channel for channel in channels if self.counts[channel] <= 0]
+            for channel in unused:
+                del self.counts[channel]
+            if unused:
+                await self.pubsub.unsubscribe(*unused)
+
+    async def read(self):
+        try:
+            async for message in self.pubsub.listen():
+                if message['type'] == 'message':
+                    self.local.publish(message['channel'].decode(), json.loads(message['data']))
+        except Exception:
+            logger.exception("Inquiry event listener stopped; streams on it get no more events")
+
+
+class RedisBroker:
+    """
+    Same interface over Redis pub/sub, so every worker process sees every event. A process
+    holds one pub/sub connection per event loop however many streams it serves (an idle
+    stream costs a queue, not a Redis connection) and fans messages out in-process.
+    """
+
+    def __init__(self, url=None, queue_size=100):
+        import redis # Optional dependency, already required by the Redis cache backend
+
+        self.redis = redis
+        self.url = url or settings.INQUIRY_EVENTS_REDIS_URL
+        self.local = InProcessBroker(queue_size)
+        self._publisher = None
+        self._listeners = weakref.WeakKeyDictionary() # Event loop -> RedisListener
+
+    async def subscribe(self, channels):
+        loop = asyncio.get_running_loop()
+        listener = self._listeners.get(loop)
+        if listener is None:
+            listener = self._listeners[loop] = RedisListener(self.url, self.local)
+        local = await self.local.subscribe(channels)
+        await listener.add(local.channels)
+        return RedisSubscription(local, listener)
+
+    def publish(self, channel, event):
+        if self._publisher is None:
+            self._publisher = self.redis.Redis.from_url(self.url)
+        self._publisher.publish(channel, json.dumps(event))
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        broker_class = import_string(getattr(settings, 'INQUIRY_EVENTS_BROKER', 'inquiries.events.InProcessBroker'))
+        _broker = broker_class(queue_size=getattr(settings, 'INQUIRY_EVENTS_QUEUE_SIZE', 100))
+    return _broker
+
+
+def inquiry_event(inquiry, event_type):
+    return {
+        'type': event_type,
+        'inquiry': {
+            'id': inquiry.pk,
+            'car': inquiry.car_id,
+            'buyer': inquiry.buyer_id,
+            'seller': inquiry.seller_id,
+            'status': inquiry.status,
+            'updated_at': inquiry.updated_at.isoformat() if inquiry.updated_at else None,
+        },
+    }
+
+
+def publish_inquiry_event_on_commit(inquiry, event_type):
+    """Tell the inquiry's buyer and seller once the change is committed."""
+    event = inquiry_event(inquiry, event_type)
+    channels = {user_channel(inquiry.buyer_id), user_channel(inquiry.seller_id)}
+
+    def publish():
+        broker = get_broker()
+        for channel in channels:
+            try:
+                broker.publish(channel, event)
+            except Exception:
+                logger.exception("Could not publish %s to %s", event_type, channel)
+
+    transaction.on_commit(publish)
@@ -0,0 +1,91 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from cars.models import Brand, CarModel, Car
+from inquiries.models import Inquiry
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds one seller with a large inbox inside a transaction that is rolled back, then "
+        "times the seller inbox queries (first page, status filter, deep keyset page) against "
+        "the previous OR + DISTINCT form."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inquiries', type=int, default=100000, help="Inquiries to seed for the seller.")
+        parser.add_argument('--cars', type=int, default=50, help="Cars the inquiries are spread over.")
+        parser.add_argument('--runs', type=int, default=20, help="Timed runs per query.")
+        parser.add_argument('--explain', action='store_true', help="Print the plan of every query.")
+        parser.add_argument('--keep', action='store_true', help="Commit the seeded rows instead of rolling back.")
+
+    def seed(self, options):
+        seller = User.objects.create_user(username='bench-inbox-seller', is_seller=True)
+        buyer = User.objects.create_user(username='bench-inbox-buyer')
+        brand, _ = Brand.objects.get_or_create(name='Bench')
+        model, _ = CarModel.objects.get_or_create(brand=brand, name='Inbox')
+        cars = [
+            Car.objects.create(
+                seller=seller, brand=brand, model=model, title=f'Bench car {i}', price=10000, fuel_type='petrol',
+                year=2020, transmission='manual', condition='used', mileage=1000, engine_type='I4',
+                description='', is_approved=True,
+            )
+            for i in range(options['cars'])
+        ]
+        statuses = [choice for choice, _ in Inquiry.STATUS_CHOICES]
+        batch = []
+        for i in range(options['inquiries']):
+            batch.append(Inquiry(
+                car=cars[i % len(cars)], buyer=buyer, seller=seller, message='Is it available?',
+                status=statuses[i % len(statuses)],
+            ))
+            if len(batch) == 5000:
+                Inquiry.objects.bulk_create(batch)
+                batch = []
+        Inquiry.objects.bulk_create(batch)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE inquiries_inquiry')
+        return seller
+
+    def queries(self, seller, page_size):
+        inbox = Inquiry.objects.filter(seller=seller)
+        legacy = Inquiry.objects.filter(Q(seller=seller) | Q(car__seller=seller)).distinct()
+        middle = inbox.order_by('-created_at', '-id')[inbox.count() // 2:][:1].get()
+        after_middle = Q(created_at__lt=middle.created_at) | Q(created_at=middle.created_at, pk__lt=middle.pk)
+        newest = ('-created_at', '-id')
+        return [
+            ('first page', inbox.order_by(*newest)[:page_size]),
+            ('status=new', inbox.filter(status='new').order_by(*newest)[:page_size]),
+            ('deep keyset page', inbox.filter(after_middle).order_by(*newest)[:page_size]),
+            ('legacy first page', legacy.order_by(*newest)[:page_size]),
+            ('legacy status=new', legacy.filter(status='new').order_by(*newest)[:page_size]),
+        ]
+
+    def time_query(self, queryset, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+
+    def handle(self, *args, **options):
+        page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 10)
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['inquiries']} inquiries over {options['cars']} cars...")
+            seller = self.seed(options)
+            for label, queryset in self.queries(seller, page_size):
+                median, p95 = self.time_query(queryset, options['runs'])
+                self.stdout.write(f"{label:<20} median {median:8.2f} ms   p95 {p95:8.2f} ms")
+                if options['explain']:
+                    self.stdout.write(queryset.explain() + '\n')
+            if not options['keep']:
+                transaction.set_rollback(True)
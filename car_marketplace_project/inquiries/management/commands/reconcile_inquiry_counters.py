@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from inquiries.counters import STATUSES, counts_from_inquiries, rebuild_counters
+from inquiries.models import SellerInquiryCounter
+
+
+class Command(BaseCommand):
+    help = (
+        "Recounts every seller's inquiries by status from the Inquiry table, reports counters "
+        "that have drifted, and rebuilds the counter table from scratch. Counters follow "
+        "Inquiry.save() and delete() only: queryset update(), bulk_update(), bulk_create() "
+        "and raw SQL leave them behind until this runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Only report drift; do not rebuild.")
+        parser.add_argument('--show', type=int, default=20, help="How many drifted sellers to list.")
+
+    def handle(self, *args, **options):
+        expected = counts_from_inquiries()
+        stored = {row.pop('seller_id'): row for row in SellerInquiryCounter.objects.values('seller_id', *STATUSES)}
+        zero = dict.fromkeys(STATUSES, 0)
+        drift = sorted(
+            seller_id for seller_id in expected.keys() | stored.keys()
+            if expected.get(seller_id, zero) != stored.get(seller_id, zero)
+        )
+        for seller_id in drift[:options['show']]:
+            self.stdout.write(f"Seller {seller_id}: {stored.get(seller_id, zero)} -> {expected.get(seller_id, zero)}")
+        if drift:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} seller counter(s) have drifted."))
+        else:
+            self.stdout.write(self.style.SUCCESS("No drift: every seller counter matches the inquiries."))
+
+        if not options['check']:
+            rebuild_counters()
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {len(expected)} seller(s)."))
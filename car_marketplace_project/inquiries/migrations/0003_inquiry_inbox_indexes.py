@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:48
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+from car_marketplace_project.operations import AddIndexConcurrently
+
+
+def align_sellers(apps, schema_editor):
+    # The seller inbox now filters on Inquiry.seller only; it must match the car's seller.
+    Inquiry = apps.get_model('inquiries', 'Inquiry')
+    Car = apps.get_model('cars', 'Car')
+    Inquiry.objects.update(seller_id=Subquery(Car.objects.filter(pk=OuterRef('car_id')).values('seller_id')[:1]))
+
+
+class Migration(migrations.Migration):
+    atomic = False # AddIndexConcurrently
+
+    dependencies = [
+        ('cars', '0006_car_listing_summary'),
+        ('inquiries', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(align_sellers, migrations.RunPython.noop, atomic=True),
+        AddIndexConcurrently(
+            model_name='inquiry',
+            index=models.Index(fields=['seller', 'created_at', 'id'], name='inquiry_seller_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='inquiry',
+            index=models.Index(fields=['seller', 'status', 'created_at'], name='inquiry_seller_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='inquiry',
+            index=models.Index(fields=['buyer', 'created_at'], name='inquiry_buyer_created_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    Inquiry = apps.get_model('inquiries', 'Inquiry')
+    SellerInquiryCounter = apps.get_model('inquiries', 'SellerInquiryCounter')
+    statuses = ('new', 'read', 'responded', 'closed')
+    rows = Inquiry.objects.order_by().values('seller_id').annotate(
+        **{status: Count('pk', filter=Q(status=status)) for status in statuses}
+    )
+    SellerInquiryCounter.objects.bulk_create(
+        [SellerInquiryCounter(seller_id=row.pop('seller_id'), **row) for row in rows], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0003_inquiry_inbox_indexes'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SellerInquiryCounter',
+            fields=[
+                ('seller', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inquiry_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('new', models.IntegerField(default=0)),
+                ('read', models.IntegerField(default=0)),
+                ('responded', models.IntegerField(default=0)),
+                ('closed', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
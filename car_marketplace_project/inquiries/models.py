@@ -24,6 +24,41 @@ class Inquiry(models.Model):
     class Meta:
         verbose_name_plural = "Inquiries"
         ordering = ['-created_at']
+        indexes = [
+            # Seller inbox: `seller` always mirrors car.seller, so the inbox is one predicate
+            # served newest-first straight from the index, optionally narrowed by status.
+            models.Index(fields=['seller', 'created_at', 'id'], name='inquiry_seller_created_idx'),
+            models.Index(fields=['seller', 'status', 'created_at'], name='inquiry_seller_status_idx'),
+            # Buyer outbox.
+            models.Index(fields=['buyer', 'created_at'], name='inquiry_buyer_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_counted_state()
+        return instance
+
+    def remember_counted_state(self):
+        # What the seller's inquiry counter currently has this row counted as.
+        self._counted_state = (self.__dict__.get('seller_id'), self.__dict__.get('status'))
+
+    def __str__(self):
+        return f"Inquiry for {self.car.title} from {self.buyer.username}"
+
+
+class SellerInquiryCounter(models.Model):
+    """
+    Per-seller inquiry counts by status, maintained alongside Inquiry writes so the
+    dashboard badge never has to scan the inbox. `reconcile_inquiry_counters` rebuilds it.
+    """
+    seller = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='inquiry_counter'
+    )
+    new = models.IntegerField(default=0)
+    read = models.IntegerField(default=0)
+    responded = models.IntegerField(default=0)
+    closed = models.IntegerField(default=0)
 
     def __str__(self):
-        return f"Inquiry for {self.car.title} from {self.buyer.username}"
\ No newline at end of file
+        return f"Inquiry counts for seller {self.seller_id}"
\ No newline at end of file
@@ -3,7 +3,7 @@
 from rest_framework import serializers
 from .models import Inquiry
 from users.serializers import UserProfileSerializer
-from cars.serializers import CarSerializer # Ensure this is CarSerializer (the general one)
+from cars.serializers import CarSerializer, storage_url # Ensure this is CarSerializer (the general one)
 
 class InquirySerializer(serializers.ModelSerializer): # <--- NEW/RE-ADDED GENERIC INQUIRY SERIALIZER
     """
@@ -13,6 +13,7 @@ class InquirySerializer(serializers.ModelSerializer): # <--- NEW/RE-ADDED GENERI
     car_details = CarSerializer(source='car', read_only=True)
     buyer_details = UserProfileSerializer(source='buyer', read_only=True)
     seller_details = UserProfileSerializer(source='seller', read_only=True)
+    inquiry_date = serializers.DateTimeField(source='created_at', read_only=True)
 
     class Meta:
         model = Inquiry
@@ -20,7 +21,13 @@ class InquirySerializer(serializers.ModelSerializer): # <--- NEW/RE-ADDED GENERI
             'id', 'car', 'car_details', 'buyer', 'buyer_details',
             'seller', 'seller_details', 'message', 'inquiry_date', 'status'
         ]
-        read_only_fields = '__all__' # All fields are read-only for this general view
+        read_only_fields = fields # All fields are read-only for this general view
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related(
+            'car__brand', 'car__model__brand', 'car__seller', 'buyer', 'seller'
+        ).prefetch_related('car__images')
 
 class InquiryCreateSerializer(serializers.ModelSerializer):
     """
@@ -38,6 +45,7 @@ class InquiryListSerializer(serializers.ModelSerializer):
     car_details = CarSerializer(source='car', read_only=True)
     buyer_details = UserProfileSerializer(source='buyer', read_only=True)
     seller_details = UserProfileSerializer(source='seller', read_only=True)
+    inquiry_date = serializers.DateTimeField(source='created_at', read_only=True)
 
     class Meta:
         model = Inquiry
@@ -48,4 +56,44 @@ class InquiryListSerializer(serializers.ModelSerializer):
         read_only_fields = [
             'id', 'buyer', 'seller', 'inquiry_date',
             'car_details', 'buyer_details', 'seller_details'
-        ]
\ No newline at end of file
+        ]
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return InquirySerializer.setup_eager_loading(queryset)
+
+
+class InquiryInboxSerializer(serializers.ModelSerializer):
+    """
+    Compact inbox row: a car summary with its thumbnail and the buyer's name and contact.
+    The full nested payload (InquiryListSerializer) is available with ?expand=full.
+    """
+    car_summary = serializers.SerializerMethodField()
+    buyer_details = serializers.SerializerMethodField()
+    inquiry_date = serializers.DateTimeField(source='created_at', read_only=True)
+
+    class Meta:
+        model = Inquiry
+        fields = ['id', 'car', 'car_summary', 'buyer', 'buyer_details', 'seller', 'message', 'inquiry_date', 'status']
+        read_only_fields = fields
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        # Brand/model names and the thumbnail are denormalized onto Car, so no image prefetch is needed.
+        return queryset.select_related('car', 'buyer')
+
+    def get_car_summary(self, obj):
+        car = obj.car
+        return {
+            'id': car.id, 'title': car.title, 'brand_name': car.brand_name, 'model_name': car.model_name,
+            'year': car.year, 'price': serializers.DecimalField(max_digits=10, decimal_places=2).to_representation(car.price),
+            'thumbnail_url': storage_url(self.context.get('request'), car.primary_image) if car.primary_image else None,
+        }
+
+    def get_buyer_details(self, obj):
+        buyer = obj.buyer
+        return {
+            'id': buyer.id, 'username': buyer.username,
+            'name': buyer.get_full_name() or buyer.username,
+            'email': buyer.email, 'phone_number': buyer.phone_number,
+        }
\ No newline at end of file
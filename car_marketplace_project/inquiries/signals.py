@@ -0,0 +1,59 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from cars.models import Car
+from .counters import adjust_counter, rebuild_counters
+from .events import publish_inquiry_event_on_commit
+from .models import Inquiry
+
+
+@receiver(post_save, sender=Car)
+def sync_inquiry_seller(sender, instance, raw=False, update_fields=None, **kwargs):
+    # The seller inbox filters on Inquiry.seller alone; follow the car when it changes hands.
+    if raw or not (update_fields is None or 'seller' in update_fields):
+        return
+    moved = Inquiry.objects.filter(car=instance).exclude(seller_id=instance.seller_id)
+    previous_sellers = set(moved.order_by().values_list('seller_id', flat=True).distinct())
+    if previous_sellers:
+        moved.update(seller_id=instance.seller_id)
+        rebuild_counters(previous_sellers | {instance.seller_id})
+
+
+@receiver(pre_save, sender=Inquiry)
+def read_counted_state(sender, instance, raw=False, **kwargs):
+    # An Inquiry built with the pk of an existing row was never loaded, so nothing records what
+    # the counter has it counted as: read the row this save is about to overwrite.
+    if raw or instance.pk is None or hasattr(instance, '_counted_state'):
+        return
+    row = Inquiry.objects.filter(pk=instance.pk).values_list('seller_id', 'status').first()
+    if row is not None:
+        instance._counted_state = row
+
+
+@receiver(post_save, sender=Inquiry)
+def track_inquiry(sender, instance, created, raw=False, **kwargs):
+    # Runs inside the caller's transaction (the API and admin wrap their saves in one).
+    if raw:
+        return
+    old_state = None if created else getattr(instance, '_counted_state', None)
+    new_state = (instance.seller_id, instance.status)
+    if not created and old_state is None:
+        instance.remember_counted_state()
+        return  # The row was unknown to read_counted_state; reconcile_inquiry_counters recounts it
+    if old_state is not None and None in old_state:
+        return  # seller/status were deferred on load, so this save did not change them
+    if old_state != new_state:
+        if old_state is not None:
+            adjust_counter(*old_state, -1)
+        adjust_counter(*new_state, 1)
+    if created:
+        publish_inquiry_event_on_commit(instance, 'inquiry.created')
+    elif old_state is not None and old_state[1] != instance.status:
+        publish_inquiry_event_on_commit(instance, 'inquiry.status_changed')
+    instance.remember_counted_state()
+
+
+@receiver(post_delete, sender=Inquiry)
+def uncount_inquiry(sender, instance, **kwargs):
+    # Never create here: the seller itself may be part of the same cascade delete.
+    adjust_counter(instance.seller_id, instance.status, -1, create=False)
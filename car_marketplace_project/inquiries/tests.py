@@ -1,3 +1,232 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from cars.tests import CarFixturesMixin
+from users.models import User
+from .events import get_broker, user_channel
+from .models import Inquiry, SellerInquiryCounter
+
+
+class InquiryFixturesMixin(CarFixturesMixin):
+    @classmethod
+    def create_inquiries(cls, count, buyer, car, **overrides):
+        return [
+            Inquiry.objects.create(car=car, buyer=buyer, seller=car.seller, message=f'Is it available? {i}', **overrides)
+            for i in range(count)
+        ]
+
+
+class InquiryKeysetPaginationTests(InquiryFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user(username='buyer', password='pass')
+        cls.car = cls.create_cars(1)[0]
+        cls.inquiries = cls.create_inquiries(15, cls.buyer, cls.car)
+
+    def test_cursor_mode_walks_inbox(self):
+        self.client.force_authenticate(self.buyer)
+        response = self.client.get(reverse('inquiry-list'), {'pagination': 'cursor'})
+        seen = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen.extend(row['id'] for row in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, list(Inquiry.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+
+class InquiryConditionalGetTests(InquiryFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user(username='buyer', password='pass')
+        cls.car = cls.create_cars(1)[0]
+        cls.inquiries = cls.create_inquiries(3, cls.buyer, cls.car)
+
+    def test_inbox_revalidation(self):
+        self.client.force_authenticate(self.buyer)
+        first = self.client.get(reverse('inquiry-list'))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('inquiry-list'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        inquiry = self.inquiries[0]
+        inquiry.status = 'read'
+        inquiry.save()
+        self.assertEqual(self.client.get(reverse('inquiry-list'), HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+
+class InquiryInboxTests(InquiryFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user(username='buyer', password='pass', email='b@example.com', phone_number='555')
+        cls.car = cls.create_cars(1)[0]
+        cls.inquiries = cls.create_inquiries(5, cls.buyer, cls.car)
+
+    def test_compact_rows(self):
+        self.client.force_authenticate(self.car.seller)
+        with self.assertNumQueries(3): # validators, count, one joined page
+            response = self.client.get(reverse('inquiry-list'))
+        self.assertEqual(response.status_code, 200)
+        row = response.data['results'][0]
+        self.assertNotIn('car_details', row)
+        self.assertEqual(row['car_summary']['brand_name'], self.car.brand.name)
+        self.assertEqual(row['buyer_details'], {
+            'id': self.buyer.id, 'username': 'buyer', 'name': 'buyer', 'email': 'b@example.com', 'phone_number': '555',
+        })
+
+    def test_expand_returns_nested_payload(self):
+        self.client.force_authenticate(self.car.seller)
+        response = self.client.get(reverse('inquiry-list'), {'expand': 'full'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('car_details', response.data['results'][0])
+
+
+class SellerInboxQueryTests(InquiryFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user(username='buyer', password='pass')
+        cls.car = cls.create_cars(1)[0]
+        cls.inquiries = cls.create_inquiries(2, cls.buyer, cls.car)
+
+    def test_inbox_is_a_single_seller_predicate(self):
+        self.client.force_authenticate(self.car.seller)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('inquiry-list'))
+        self.assertEqual(response.data['count'], 2)
+        self.assertFalse(any('DISTINCT' in query['sql'] for query in queries.captured_queries))
+
+    def test_inquiries_follow_car_to_new_seller(self):
+        new_seller = User.objects.create_user(username='dealer2', password='pass', is_seller=True)
+        self.car.seller = new_seller
+        self.car.save()
+        self.client.force_authenticate(new_seller)
+        self.assertEqual(self.client.get(reverse('inquiry-list')).data['count'], 2)
+
+
+class InquiryCounterTests(InquiryFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user(username='buyer', password='pass')
+        cls.car = cls.create_cars(1)[0]
+        cls.seller = cls.car.seller
+
+    def summary(self):
+        self.client.force_authenticate(self.seller)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('inquiry-summary'))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_counters_follow_create_update_delete(self):
+        self.client.force_authenticate(self.buyer)
+        for _ in range(3):
+            self.client.post(reverse('inquiry-list'), {'car': self.car.pk, 'message': 'Still available?'})
+        self.assertEqual(self.summary(), {'new': 3, 'read': 0, 'responded': 0, 'closed': 0, 'total': 3})
+
+        inquiry = Inquiry.objects.first()
+        self.client.patch(reverse('inquiry-detail', args=[inquiry.pk]), {'status': 'responded'})
+        Inquiry.objects.last().delete()
+        self.assertEqual(self.summary(), {'new': 1, 'read': 0, 'responded': 1, 'closed': 0, 'total': 2})
+
+    def test_reconcile_rebuilds_drifted_counters(self):
+        self.create_inquiries(2, self.buyer, self.car)
+        SellerInquiryCounter.objects.update(new=99)
+        call_command('reconcile_inquiry_counters', stdout=StringIO())
+        self.assertEqual(self.summary()['new'], 2)
+
+    def test_saves_without_a_loaded_row_and_queryset_updates(self):
+        inquiry = self.create_inquiries(2, self.buyer, self.car)[0]
+        Inquiry(
+            pk=inquiry.pk, car=self.car, buyer=self.buyer, seller=self.seller, message='Hi', status='read',
+            created_at=inquiry.created_at,
+        ).save()
+        self.assertEqual(self.summary(), {'new': 1, 'read': 1, 'responded': 0, 'closed': 0, 'total': 2})
+
+        Inquiry.objects.filter(pk=inquiry.pk).update(status='closed') # No signals: the counters drift
+        self.assertEqual(self.summary()['read'], 1)
+        out = StringIO()
+        call_command('reconcile_inquiry_counters', stdout=out)
+        self.assertIn('1 seller counter(s) have drifted.', out.getvalue())
+        self.assertEqual(self.summary(), {'new': 1, 'read': 0, 'responded': 0, 'closed': 1, 'total': 2})
+
+
+class InquiryEventStreamTests(InquiryFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = User.objects.create_user(username='buyer', password='pass')
+        cls.car = cls.create_cars(1)[0]
+
+    def create_inquiry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.create_inquiries(1, self.buyer, self.car)[0]
+
+    async def test_created_event_reaches_buyer_and_seller(self):
+        broker = get_broker()
+        buyer_stream = await broker.subscribe([user_channel(self.buyer.pk)])
+        seller_stream = await broker.subscribe([user_channel(self.car.seller_id)])
+        try:
+            inquiry = await sync_to_async(self.create_inquiry)()
+            for stream in (buyer_stream, seller_stream):
+                event = await stream.get(timeout=1)
+                self.assertEqual(event['type'], 'inquiry.created')
+                self.assertEqual(event['inquiry']['id'], inquiry.pk)
+        finally:
+            await buyer_stream.close()
+            await seller_stream.close()
+
+    async def test_stream_requires_token_and_delivers_events(self):
+        response = await self.async_client.get(reverse('inquiry-stream'))
+        self.assertEqual(response.status_code, 401)
+
+        token = str(RefreshToken.for_user(self.car.seller).access_token)
+        self.assertEqual((await self.async_client.get(reverse('inquiry-stream'), {'token': token})).status_code, 401)
+        ticket = (await self.async_client.post(
+            reverse('inquiry-stream-ticket'), headers={'Authorization': f'Bearer {token}'},
+        )).json()['ticket']
+        response = await self.async_client.get(reverse('inquiry-stream'), {'ticket': ticket})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual((await self.async_client.get(reverse('inquiry-stream'), {'ticket': ticket})).status_code, 401) # Used
+        chunks = aiter(response.streaming_content)
+        self.assertIn(b': connected', await anext(chunks))
+        inquiry = await sync_to_async(self.create_inquiry)()
+        chunk = await asyncio.wait_for(anext(chunks), 1)
+        self.assertTrue(chunk.startswith(b'event: inquiry.created\n'))
+        self.assertIn(f'"id": {inquiry.pk}'.encode(), chunk)
+        await chunks.aclose()
+
+    async def test_stream_ends_when_the_token_expires(self):
+        token = RefreshToken.for_user(self.car.seller).access_token
+        token.set_exp(lifetime=timedelta(seconds=1))
+        response = await self.async_client.get(reverse('inquiry-stream'), headers={'Authorization': f'Bearer {token}'})
+        chunks = aiter(response.streaming_content)
+        self.assertIn(b': connected', await anext(chunks))
+        self.assertEqual(await asyncio.wait_for(anext(chunks), 3), b'event: auth.expired\ndata: {}\n\n')
+        with self.assertRaises(StopAsyncIteration):
+            await anext(chunks)
+
+
+class InquiryAdminChangelistTests(InquiryFixturesMixin, APITestCase):
+    def test_queries_do_not_grow_with_rows(self):
+        self.client.force_login(User.objects.create_superuser(username='admin', password='pass'))
+        car = self.create_cars(1)[0]
+        self.create_inquiries(2, User.objects.create_user(username='buyer'), car)
+        url = reverse('admin:inquiries_inquiry_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.create_inquiries(3, User.objects.create_user(username='buyer2'), self.create_cars(1)[0])
+        with CaptureQueriesContext(connection) as filtered:
+            response = self.client.get(url, {'seller__id__exact': car.seller_id})
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertEqual(len(filtered), len(queries) + 1) # The selected seller, for the filter widget
@@ -2,12 +2,16 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import InquiryViewSet
+
+from car_marketplace_project.compression import uncompressed
+from .views import InquiryStreamTicketView, InquiryViewSet, inquiry_event_stream
 
 router = DefaultRouter()
 # THIS IS THE CRITICAL CHANGE: Added 'inquiries' as the path prefix and 'basename'
 router.register(r'inquiries', InquiryViewSet, basename='inquiry')
 
 urlpatterns = [
+    path('inquiries/stream/', inquiry_event_stream, name='inquiry-stream'), # Before the router's detail route
+    path('inquiries/stream/ticket/', uncompressed(InquiryStreamTicketView.as_view()), name='inquiry-stream-ticket'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,31 +1,59 @@
+import json
+import time
+
+from django.conf import settings
 from django.shortcuts import render
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
-from .models import Inquiry
-from .serializers import InquirySerializer, InquiryCreateSerializer, InquiryListSerializer
+from rest_framework.exceptions import APIException
+from rest_framework.views import APIView
+from .counters import STATUSES
+from .events import aredeem_stream_ticket, get_broker, issue_stream_ticket, user_channel
+from .models import Inquiry, SellerInquiryCounter
+from .serializers import InquirySerializer, InquiryCreateSerializer, InquiryListSerializer, InquiryInboxSerializer
 from .permissions import IsBuyerOfInquiryOrSellerOfCarOrAdmin
 from users.permissions import IsSeller 
+from car_marketplace_project.authentication import aauthenticate
+from car_marketplace_project.conditional import ConditionalGetMixin
+from car_marketplace_project.pagination import KeysetPagination
 from rest_framework.routers import DefaultRouter
 from rest_framework import serializers
 
 
-class InquiryViewSet(viewsets.ModelViewSet):
+class InquiryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    conditional_actions = ('list',)
+    validator_generations = ('cars', 'car_images', 'brands', 'car_models', 'users') # Embedded car/user details
     serializer_class = InquiryListSerializer
     filterset_fields = ['status', 'car', 'buyer', 'seller']
-    ordering_fields = ['inquiry_date', 'status'] 
+    ordering_fields = ['created_at', 'status'] 
+    pagination_class = KeysetPagination # ?pagination=cursor for constant-cost deep paging
 
     def get_queryset(self):
         user = self.request.user
         if user.is_authenticated:
             if user.is_staff: # Admin sees all inquiries
-                return Inquiry.objects.all()
-            elif hasattr(user, 'is_seller') and user.is_seller: # Seller sees inquiries related to their cars or sent to them
-                return Inquiry.objects.filter(Q(seller=user) | Q(car__seller=user)).distinct()
+                queryset = Inquiry.objects.all()
+            elif hasattr(user, 'is_seller') and user.is_seller: # Seller sees inquiries about their cars
+                # Inquiry.seller is kept equal to car.seller, so no join/OR/DISTINCT is needed.
+                queryset = Inquiry.objects.filter(seller_id=user.pk)
             else: # Regular user (buyer) sees only inquiries they sent
-                return Inquiry.objects.filter(buyer=user)
+                queryset = Inquiry.objects.filter(buyer_id=user.pk)
+            return self.setup_eager_loading(queryset)
         return Inquiry.objects.none() # Guests/unauthenticated users see no inquiries
 
+    def setup_eager_loading(self, queryset):
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'setup_eager_loading'):
+            queryset = serializer_class.setup_eager_loading(queryset)
+        return queryset
+
+    def wants_expanded(self):
+        return self.request.query_params.get('expand', '').lower() in ('full', 'true', '1')
+
     def get_serializer_class(self):
         # Use InquiryCreateSerializer for creation
         if self.action == 'create':
@@ -33,6 +61,9 @@ class InquiryViewSet(viewsets.ModelViewSet):
         # Use InquirySerializer for detailed retrieve (single object)
         elif self.action == 'retrieve':
             return InquirySerializer
+        # Inbox rows are compact unless the client asks for the full nested payload
+        elif self.action == 'list' and not self.wants_expanded():
+            return InquiryInboxSerializer
         return InquiryListSerializer
 
     def get_permissions(self):
@@ -50,7 +81,8 @@ class InquiryViewSet(viewsets.ModelViewSet):
             raise serializers.ValidationError("Cannot send an inquiry for an unapproved car.")
 
         # Set the buyer to the requesting user and the seller to the car's seller
-        serializer.save(buyer=self.request.user, seller=car.seller)
+        with transaction.atomic(): # Inquiry row and seller counter commit together
+            serializer.save(buyer=self.request.user, seller=car.seller)
 
     def perform_update(self, serializer):
         # Only allow status update for sellers/admins, not message or other fields that a buyer might try to change
@@ -61,8 +93,91 @@ class InquiryViewSet(viewsets.ModelViewSet):
             # Prevent them from changing the message field directly through update.
             if 'message' in serializer.validated_data and self.request.method in ['PUT', 'PATCH']:
                 raise serializers.ValidationError({"message": "Message cannot be updated."})
-            serializer.save()
+            with transaction.atomic(): # Status change and seller counter commit together
+                serializer.save()
         else:
             # For buyers, the custom permission already restricts updates (they can't update unless they are seller/admin)
             # This line might be redundant if the permission handles it, but good for explicit clarity.
-            raise permissions.PermissionDenied("You do not have permission to update this inquiry.")
\ No newline at end of file
+            raise permissions.PermissionDenied("You do not have permission to update this inquiry.")
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Inquiry counts by status for the requesting seller, read from the maintained
+        counter row (one primary-key lookup) instead of counting the inbox.
+        """
+        counter = SellerInquiryCounter.objects.filter(seller_id=request.user.pk).values(*STATUSES).first()
+        counts = {status_name: (counter or {}).get(status_name, 0) for status_name in STATUSES}
+        counts['total'] = sum(counts.values())
+        return Response(counts)
+
+
+def format_event(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event['inquiry'])}\n\n"
+
+
+# Sent as a stream's last event when its credentials expire.
+EXPIRED_EVENT = "event: auth.expired\ndata: {}\n\n"
+
+
+class InquiryStreamTicketView(APIView):
+    """
+    POST (with the access token) for a single-use ticket opening the event stream:
+    `/api/inquiries/stream/?ticket=...`. The stream then lasts as long as that token; every
+    reconnection needs a new ticket.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        ticket = issue_stream_ticket(request.user.pk, request.auth['exp'])
+        return Response({'ticket': ticket, 'expires_in': getattr(settings, 'INQUIRY_EVENTS_TICKET_TIMEOUT', 30)})
+
+
+@require_GET
+async def inquiry_event_stream(request):
+    """
+    Server-sent events for the requesting user's inquiries: `inquiry.created` and
+    `inquiry.status_changed`, for inquiries where they are the buyer or the seller.
+    An idle stream is one suspended coroutine plus a keep-alive comment every
+    INQUIRY_EVENTS_HEARTBEAT seconds; clients should refetch the inbox after reconnecting.
+
+    EventSource cannot send an Authorization header, so it opens the stream with a ticket
+    from InquiryStreamTicketView (never the token itself, which would end up in access
+    logs); clients that can send headers use the access token, and a session works too.
+    The stream ends when the access token (or the session) expires, with an `auth.expired`
+    event: the client gets a fresh token and reconnects, since a revoked user would
+    otherwise keep receiving events on a connection authenticated once.
+    """
+    user_id = expires_at = None
+    if 'ticket' in request.GET:
+        user_id, expires_at = await aredeem_stream_ticket(request.GET['ticket']) or (None, None)
+    else:
+        try:
+            user, token = await aauthenticate(request, session=True)
+        except APIException:
+            user = token = None
+        if user is not None and user.is_authenticated:
+            user_id = user.pk
+            expires_at = token['exp'] if token is not None else time.time() + await request.session.aget_expiry_age()
+    if user_id is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    heartbeat = getattr(settings, 'INQUIRY_EVENTS_HEARTBEAT', 15)
+
+    async def events():
+        subscription = await get_broker().subscribe([user_channel(user_id)])
+        try:
+            yield f"retry: {heartbeat * 1000}\n: connected\n\n"
+            while (remaining := expires_at - time.time()) > 0:
+                event = await subscription.get(timeout=min(heartbeat, remaining))
+                if event is not None:
+                    yield format_event(event)
+                elif remaining > heartbeat:
+                    yield ": keep-alive\n\n"
+            yield EXPIRED_EVENT
+        finally:
+            await subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no' # Stop nginx from buffering the stream
+    return response
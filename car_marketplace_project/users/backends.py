@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password
+from rest_framework.request import Request
+
+from . import hashing
+
+UserModel = get_user_model()
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend with the password check done through users.hashing's pool. For API
+    requests a saturated pool raises HashingBusy out of django.contrib.auth.authenticate,
+    which DRF answers with 429. Other callers (the admin login form) have nothing to turn
+    it into a response, so they hash in the request thread instead.
+    """
+
+    def hash_in_pool(self, request, pooled, inline):
+        try:
+            return pooled()
+        except hashing.HashingBusy:
+            if isinstance(request, Request):
+                raise
+            return inline()
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash once anyway so response times do not tell which usernames exist.
+            self.hash_in_pool(request, lambda: hashing.hash_password(password), lambda: make_password(password))
+            return None
+        matches = self.hash_in_pool(
+            request, lambda: hashing.check_password(user, password), lambda: user.check_password(password),
+        )
+        if matches and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,132 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.db import IntegrityError, transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+class CacheBlacklist:
+    """
+    Revoked refresh-token jtis as cache keys that expire with the token, so the store never
+    outgrows the live tokens. Only safe on a shared, non-evicting cache (the Redis backend):
+    on a per-process cache another worker never sees the revocation.
+    """
+
+    def key(self, jti):
+        return f'auth:revoked:{jti}'
+
+    def add(self, jti, expires_at):
+        """Revoke `jti`; False if it already was (cache.add is atomic)."""
+        return cache.add(self.key(jti), True, timeout=max(1, int(expires_at - time.time())))
+
+    def contains(self, jti, expires_at):
+        return cache.has_key(self.key(jti))
+
+
+class DatabaseBlacklist:
+    """Revoked jtis in users.RevokedToken; expired rows are removed by `manage.py purge_revoked_tokens`."""
+
+    def add(self, jti, expires_at):
+        from .models import RevokedToken
+
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(jti=jti, expires_at=datetime.fromtimestamp(expires_at, tz=timezone.utc))
+        except IntegrityError:
+            return False
+        return True
+
+    def contains(self, jti, expires_at):
+        from .models import RevokedToken
+
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+
+class BloomFilter:
+    """
+    In-process Bloom filter of the jtis this process has revoked, one bit array per
+    expiry window so entries age out with their tokens.
+
+    A miss is answered without asking the backend. A worker only knows its own
+    revocations, which is enough because revoking is an atomic insert: a token replayed
+    against another worker passes the lookup but fails when it is rotated.
+    """
+
+    def __init__(self, bits=2 ** 20, hashes=7, window=None):
+        self.bits = bits
+        self.hashes = hashes
+        self.window = window or int(settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'].total_seconds())
+        self._arrays = {}
+        self._lock = threading.Lock()
+
+    def positions(self, jti):
+        digest = hashlib.blake2b(jti.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    def add(self, jti, expires_at):
+        bucket = int(expires_at) // self.window
+        with self._lock:
+            array = self._arrays.get(bucket)
+            if array is None:
+                current = int(time.time()) // self.window
+                for stale in [key for key in self._arrays if key < current]:
+                    del self._arrays[stale]
+                array = self._arrays[bucket] = bytearray(self.bits // 8 + 1)
+            for position in self.positions(jti):
+                array[position >> 3] |= 1 << (position & 7)
+
+    def might_contain(self, jti, expires_at):
+        array = self._arrays.get(int(expires_at) // self.window)
+        if array is None:
+            return False
+        return all(array[position >> 3] & (1 << (position & 7)) for position in self.positions(jti))
+
+
+class BloomFrontedBlacklist:
+    def __init__(self, backend, bloom):
+        self.backend = backend
+        self.bloom = bloom
+
+    def add(self, jti, expires_at):
+        self.bloom.add(jti, expires_at)
+        return self.backend.add(jti, expires_at)
+
+    def contains(self, jti, expires_at):
+        return self.bloom.might_contain(jti, expires_at) and self.backend.contains(jti, expires_at)
+
+
+_blacklist = None
+
+
+def build_blacklist(backend_path, bloom_filter=False):
+    backend = import_string(backend_path)()
+    if bloom_filter:
+        return BloomFrontedBlacklist(backend, BloomFilter(
+            bits=getattr(settings, 'TOKEN_BLACKLIST_BLOOM_BITS', 2 ** 20),
+            hashes=getattr(settings, 'TOKEN_BLACKLIST_BLOOM_HASHES', 7),
+        ))
+    return backend
+
+
+def get_blacklist():
+    global _blacklist
+    if _blacklist is None:
+        _blacklist = build_blacklist(
+            getattr(settings, 'TOKEN_BLACKLIST_BACKEND', 'users.blacklist.DatabaseBlacklist'),
+            getattr(settings, 'TOKEN_BLACKLIST_BLOOM_FILTER', True),
+        )
+    return _blacklist
+
+
+@receiver(setting_changed)
+def reset_blacklist(setting, **kwargs):
+    global _blacklist
+    if setting.startswith('TOKEN_BLACKLIST_'):
+        _blacklist = None
@@ -0,0 +1,133 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, make_password, verify_password
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import Throttled
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2 with its cost taken from ARGON2_TIME_COST / ARGON2_MEMORY_COST / ARGON2_PARALLELISM.
+    Same algorithm name as Django's hasher, so hashes made with other costs still verify and
+    are re-hashed on the next login.
+    """
+
+    @property
+    def time_cost(self):
+        return getattr(settings, 'ARGON2_TIME_COST', 2)
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, 'ARGON2_MEMORY_COST', 19456)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, 'ARGON2_PARALLELISM', 1)
+
+
+def hash_raw_password(raw_password):
+    return make_password(raw_password)
+
+
+def check_raw_password(raw_password, encoded):
+    """(matches, new hash if the stored one uses an outdated hasher or cost, else None)."""
+    matches, must_update = verify_password(raw_password, encoded)
+    return matches, make_password(raw_password) if matches and must_update else None
+
+
+class HashingBusy(Throttled):
+    default_detail = _("Too many sign-ins and sign-ups right now.")
+
+
+class HashingPool:
+    """
+    Runs password hashing in `workers` processes (in the calling thread when 0) and admits
+    at most `workers + queue_size` hashes at a time. Past that, HashingBusy (429 with
+    Retry-After) is raised at once, so a burst of sign-ups cannot hold every request thread
+    while the catalog waits behind it; so is a hash not done within `timeout` seconds.
+    """
+
+    def __init__(self, workers, queue_size, timeout, retry_after):
+        self.workers = workers
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.slots = threading.BoundedSemaphore(max(1, workers) + queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Spawned rather than forked: the parent has threads and open connections.
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup,
+                )
+            return self._executor
+
+    def run(self, function, *args):
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy(wait=self.retry_after)
+        if not self.workers:
+            try:
+                return function(*args)
+            finally:
+                self.slots.release()
+        try:
+            future = self.get_executor().submit(function, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        # The slot is held until the worker is done, even if this request stops waiting.
+        future.add_done_callback(lambda future: self.slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel() # Only a hash still queued can be dropped; a running one finishes
+            raise HashingBusy(wait=self.retry_after)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = HashingPool(
+            workers=getattr(settings, 'PASSWORD_HASHING_WORKERS', 0),
+            queue_size=getattr(settings, 'PASSWORD_HASHING_QUEUE', 8),
+            timeout=getattr(settings, 'PASSWORD_HASHING_TIMEOUT', 10),
+            retry_after=getattr(settings, 'PASSWORD_HASHING_RETRY_AFTER', 1),
+        )
+    return _pool
+
+
+@receiver(setting_changed)
+def reset_pool(setting, **kwargs):
+    global _pool
+    if setting.startswith('PASSWORD_HASHING_') and _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+def hash_password(raw_password):
+    return get_pool().run(hash_raw_password, raw_password)
+
+
+def check_password(user, raw_password):
+    """user.check_password() through the pool, saving the upgraded hash the same way."""
+    matches, new_encoded = get_pool().run(check_raw_password, raw_password, user.password)
+    if new_encoded is not None:
+        user.password = new_encoded
+        user.save(update_fields=['password'])
+    return matches
+
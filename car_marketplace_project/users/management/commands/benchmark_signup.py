@@ -0,0 +1,99 @@
+import itertools
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from users import hashing
+from users.models import User
+
+USERNAME_PREFIX = 'bench-signup-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures catalog latency while sign-ups compete for the same request threads. A thread "
+        "pool of --threads stands in for the server's workers; car list requests are interleaved "
+        "with --signups registrations, once with no sign-ups, once hashing in the request thread "
+        "without admission control, and once through users.hashing's pool. Reports sign-ups/s, "
+        "429s, and catalog p50/p99 with the response cache off. The benchmark users are "
+        "deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Request threads (server workers).")
+        parser.add_argument('--signups', type=int, default=200, help="Registrations per configuration.")
+        parser.add_argument('--reads', type=int, default=400, help="Catalog requests per configuration.")
+
+    def get_configurations(self):
+        pooled = {
+            'PASSWORD_HASHING_WORKERS': settings.PASSWORD_HASHING_WORKERS or 2,
+            'PASSWORD_HASHING_QUEUE': settings.PASSWORD_HASHING_QUEUE,
+        }
+        return [
+            ('catalog only', False, {}),
+            ('inline, unbounded', True, {'PASSWORD_HASHING_WORKERS': 0, 'PASSWORD_HASHING_QUEUE': 10 ** 6}),
+            (f"pool of {pooled['PASSWORD_HASHING_WORKERS']} + queue {pooled['PASSWORD_HASHING_QUEUE']}", True, pooled),
+        ]
+
+    def request(self, kind, number):
+        client = Client(HTTP_HOST='localhost')
+        start = time.perf_counter()
+        try:
+            if kind == 'signup':
+                username = f'{USERNAME_PREFIX}{number}'
+                password = f'Bench-{number}-pass!'
+                status = client.post('/api/register/', {
+                    'username': username, 'email': f'{username}@example.com', 'password': password, 'password2': password,
+                }).status_code
+            else:
+                status = client.get('/api/cars/cars/').status_code
+        finally:
+            connection.close()
+        return kind, status, (time.perf_counter() - start) * 1000
+
+    def run(self, threads, signups, reads):
+        numbers = itertools.count()
+        jobs = [('read', next(numbers)) for _ in range(reads)]
+        if signups:
+            # Spread the sign-ups through the reads so both compete for the whole run.
+            step = max(1, len(jobs) // signups)
+            for index in range(signups):
+                jobs.insert(min(len(jobs), index * (step + 1)), ('signup', next(numbers)))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            results = list(executor.map(lambda job: self.request(*job), jobs))
+        return results, time.perf_counter() - start
+
+    def report(self, label, results, elapsed):
+        reads = sorted(timing for kind, _, timing in results if kind == 'read')
+        p99 = reads[min(len(reads) - 1, int(len(reads) * 0.99))]
+        created = sum(1 for kind, status, _ in results if kind == 'signup' and status == 201)
+        throttled = sum(1 for kind, status, _ in results if kind == 'signup' and status == 429)
+        self.stdout.write(
+            f"{label:<26}{created / elapsed:11.1f}/s{throttled:7}{statistics.median(reads):11.2f}{p99:11.2f}"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{options['threads']} request threads, {options['reads']} catalog requests, "
+                          f"{options['signups']} sign-ups\n")
+        self.stdout.write(f"{'configuration':<26}{'sign-ups':>13}{'429s':>7}{'p50 ms':>11}{'p99 ms':>11}")
+        try:
+            for label, with_signups, overrides in self.get_configurations():
+                # Without the anonymous response cache every catalog request reaches the database.
+                with override_settings(RESPONSE_CACHE_TIMEOUT=0, **overrides):
+                    self.run(options['threads'], 0, 20) # Warm-up
+                    if with_signups:
+                        hashing.hash_password('warm-up') # Starts the pool's processes
+                    results, elapsed = self.run(
+                        options['threads'], options['signups'] if with_signups else 0, options['reads'],
+                    )
+                self.report(label, results, elapsed)
+                User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        finally:
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
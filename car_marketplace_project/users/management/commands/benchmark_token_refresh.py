@@ -0,0 +1,59 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework_simplejwt.exceptions import TokenError
+
+from users.models import User
+from users.serializers import RoleTokenRefreshSerializer
+from users.tokens import RoleRefreshToken
+
+CONFIGURATIONS = [
+    ('cache', 'users.blacklist.CacheBlacklist', False),
+    ('cache + bloom', 'users.blacklist.CacheBlacklist', True),
+    ('database', 'users.blacklist.DatabaseBlacklist', False),
+    ('database + bloom', 'users.blacklist.DatabaseBlacklist', True),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Times /api/auth/token/refresh/ validation (rotation plus revocation) for every "
+        "blacklist configuration, then the rejection of replayed tokens. Database rows are "
+        "rolled back; cache entries expire with their tokens."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, default=2000, help="Refresh tokens rotated per configuration.")
+
+    def refresh(self, raw_token):
+        serializer = RoleTokenRefreshSerializer(data={'refresh': raw_token})
+        start = time.perf_counter()
+        try:
+            serializer.is_valid(raise_exception=True)
+            accepted = True
+        except TokenError:
+            accepted = False
+        return accepted, (time.perf_counter() - start) * 1000
+
+    def report(self, label, results):
+        timings = sorted(timing for _, timing in results)
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        accepted = sum(1 for ok, _ in results if ok)
+        self.stdout.write(
+            f"{label:<28}{len(timings) / (sum(timings) / 1000):10.1f}/s{statistics.median(timings):9.2f} ms"
+            f"{p99:9.2f} ms  accepted {accepted}/{len(results)}"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'configuration':<28}{'throughput':>12}{'p50':>12}{'p99':>12}")
+        with transaction.atomic():
+            user = User.objects.create_user(username='bench-refresh-user')
+            for label, backend, bloom in CONFIGURATIONS:
+                with override_settings(TOKEN_BLACKLIST_BACKEND=backend, TOKEN_BLACKLIST_BLOOM_FILTER=bloom):
+                    tokens = [str(RoleRefreshToken.for_user(user)) for _ in range(options['tokens'])]
+                    self.report(f"{label}: rotate", [self.refresh(token) for token in tokens])
+                    self.report(f"{label}: replay", [self.refresh(token) for token in tokens])
+            transaction.set_rollback(True)
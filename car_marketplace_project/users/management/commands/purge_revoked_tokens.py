@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes users.RevokedToken rows whose refresh token has expired (DatabaseBlacklist). "
+        "An expired token is refused on its signature alone, so its row is no longer needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help="Rows deleted per DELETE statement.")
+        parser.add_argument('--check', action='store_true', help="Only count expired rows; do not delete.")
+
+    def handle(self, *args, **options):
+        expired = RevokedToken.objects.filter(expires_at__lte=timezone.now())
+        if options['check']:
+            self.stdout.write(f"{expired.count()} expired revoked token(s).")
+            return
+
+        deleted = 0
+        while True:
+            # Bounded batches keep each DELETE's locks and WAL short on a large table.
+            batch = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            deleted += RevokedToken.objects.filter(pk__in=batch).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired revoked token(s)."))
@@ -8,4 +8,12 @@ class User(AbstractUser):
     address = models.TextField(blank=True, null=True)
 
     def __str__(self):
-        return self.username
\ No newline at end of file
+        return self.username
+
+class RevokedToken(models.Model):
+    """Refresh-token jtis revoked on rotation, for users.blacklist.DatabaseBlacklist."""
+    jti = models.CharField(max_length=255, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True) # purge_revoked_tokens deletes rows past this
+
+    def __str__(self):
+        return self.jti
@@ -1,5 +1,11 @@
-from rest_framework import serializers
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.models import update_last_login
+from rest_framework import exceptions, serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from . import hashing
 from .models import User
+from .tokens import RoleRefreshToken, set_role_claims
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, style={'input_type': 'password'})
@@ -20,24 +26,81 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop('password2') # Remove password2 before creating user
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
-            password=validated_data['password'],
+        # What create_user() does, with the hash made in users.hashing's pool before touching the database
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data['email']),
             is_seller=validated_data.get('is_seller', False),
             phone_number=validated_data.get('phone_number'),
             address=validated_data.get('address'),
         )
+        user.password = hashing.hash_password(validated_data['password'])
+        user.save()
         return user
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class ProfileUpdateMixin:
+    """
+    Saves only the fields the request changed: the instance is request.user, which may be
+    a cached row, and a full save() would write its stale flags and password back.
+    """
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
+class UserProfileSerializer(ProfileUpdateMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'is_seller', 'phone_number', 'address', 'date_joined', 'last_login')
         read_only_fields = ('id', 'username', 'email', 'is_seller', 'date_joined', 'last_login')
 
-class SellerProfileSerializer(serializers.ModelSerializer):
+class SellerProfileSerializer(ProfileUpdateMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'phone_number', 'address')
-        read_only_fields = ('id', 'username', 'email')
\ No newline at end of file
+        read_only_fields = ('id', 'username', 'email')
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """TokenObtainPairSerializer that checks the password through users.hashing's pool (users.backends)."""
+    token_class = RoleRefreshToken
+
+    def validate(self, attrs):
+        self.user = authenticate(
+            self.context.get('request'), **{self.username_field: attrs[self.username_field], 'password': attrs['password']},
+        )
+        if not jwt_settings.USER_AUTHENTICATION_RULE(self.user):
+            raise exceptions.AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        refresh = self.get_token(self.user)
+        if jwt_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, self.user)
+        return {'refresh': str(refresh), 'access': str(refresh.access_token)}
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Re-reads the role flags on every refresh, so a role change reaches the next access token.
+    Replaces TokenRefreshSerializer.validate, which loads the user without handing it on.
+    """
+    token_class = RoleRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user_id = refresh.payload.get(jwt_settings.USER_ID_CLAIM)
+        user = get_user_model().objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).first() if user_id else None
+        if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise exceptions.AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        set_role_claims(refresh, user)
+        data = {'access': str(refresh.access_token)}
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from car_marketplace_project.authentication import user_active_key, user_cache_key
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def drop_cached_auth_user(sender, instance, **kwargs):
+    cache.delete_many([user_cache_key(instance.pk), user_active_key(instance.pk)])
@@ -1,3 +1,235 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from car_marketplace_project.authentication import is_user_active, user_active_key, user_cache_key
+from cars.tests import CarFixturesMixin
+from inquiries.models import Inquiry
+from . import hashing
+from .blacklist import BloomFilter, reset_blacklist
+from .models import RevokedToken, User
+from .tokens import RoleRefreshToken
+
+
+class ClaimsAuthenticationTests(CarFixturesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.car = cls.create_cars(1)[0]
+        cls.seller = cls.car.seller
+        cls.seller.set_password('pass')
+        cls.seller.save()
+        cls.pending = cls.create_cars(1, seller=cls.seller, is_approved=False)[0]
+
+    def setUp(self):
+        cache.clear()
+
+    def obtain(self, username='seller0', password='pass'):
+        return self.client.post(reverse('token_obtain_pair'), {'username': username, 'password': password}).data
+
+    def authorize(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_issued_tokens_carry_roles(self):
+        access = AccessToken(self.obtain()['access'])
+        self.assertIs(access['is_seller'], True)
+        self.assertIs(access['is_staff'], False)
+
+        response = self.client.post(reverse('register'), {
+            'username': 'buyer', 'email': 'buyer@example.com', 'password': 'Str0ng-pass!', 'password2': 'Str0ng-pass!',
+        })
+        self.assertIs(AccessToken(response.data['access'])['is_seller'], False)
+
+    def test_reads_skip_the_user_query(self):
+        self.authorize(self.obtain()['access'])
+        is_user_active(self.seller.pk) # Cached per user; see test_revoked_users_lose_claims_reads
+        # ETag aggregate, COUNT and the page; no users_user lookup.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('car-list'))
+        self.assertEqual(response.data['count'], 2) # The seller's own pending car is visible
+
+        inquiry = Inquiry.objects.create(car=self.car, buyer=User.objects.create_user(username='buyer'), seller=self.seller, message='Hi')
+        self.assertEqual(self.client.get(reverse('inquiry-detail', args=[inquiry.pk])).status_code, 200)
+        self.assertEqual(self.client.get(reverse('user_profile')).data['username'], self.seller.username)
+
+    def test_revoked_users_lose_claims_reads(self):
+        self.authorize(self.obtain()['access'])
+        url = reverse('inquiry-list')
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        User.objects.filter(pk=self.seller.pk).update(is_active=False) # In another process: no signal here
+        self.assertEqual(self.client.get(url).status_code, 200)
+        cache.delete(user_active_key(self.seller.pk)) # AUTH_USER_ACTIVE_TIMEOUT later
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.seller.is_active = True
+        self.seller.save()
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.seller.is_active = False
+        self.seller.save()
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.seller.is_active = True
+        self.seller.save()
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.seller.delete()
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_writes_load_the_user(self):
+        self.authorize(self.obtain()['access'])
+        url = reverse('car-detail', args=[self.car.pk])
+        self.assertEqual(self.client.patch(url, {'title': 'Renamed'}).status_code, 200)
+        self.assertIsNone(cache.get(user_cache_key(self.seller.pk))) # No shared cache configured
+        User.objects.filter(pk=self.seller.pk).update(is_active=False)
+        self.assertEqual(self.client.patch(url, {'title': 'Again'}).status_code, 401)
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=60)
+    def test_writes_cache_the_user_on_a_shared_cache(self):
+        self.authorize(self.obtain()['access'])
+        url = reverse('car-detail', args=[self.car.pk])
+        self.assertEqual(self.client.patch(url, {'title': 'Renamed'}).status_code, 200)
+        self.assertEqual(cache.get(user_cache_key(self.seller.pk)), self.seller)
+
+        # A stale cached row must not be written back by a profile update.
+        User.objects.filter(pk=self.seller.pk).update(is_staff=True)
+        self.assertEqual(self.client.patch(reverse('user_profile'), {'phone_number': '12345'}).status_code, 200)
+        self.seller.refresh_from_db()
+        self.assertEqual((self.seller.phone_number, self.seller.is_staff), ('12345', True))
+
+        self.seller.is_active = False
+        self.seller.save()
+        self.assertIsNone(cache.get(user_cache_key(self.seller.pk)))
+        self.assertEqual(self.client.patch(url, {'title': 'Again'}).status_code, 401)
+
+    def test_refresh_rereads_roles(self):
+        refresh = self.obtain()['refresh']
+        User.objects.filter(pk=self.seller.pk).update(is_seller=False, is_staff=True)
+        data = self.client.post(reverse('token_refresh'), {'refresh': refresh}).data
+        access = AccessToken(data['access'])
+        self.assertIs(access['is_seller'], False)
+        self.assertIs(access['is_staff'], True)
+        self.assertIs(RefreshToken(data['refresh'])['is_staff'], True)
+
+
+class RefreshBlacklistTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='buyer', password='pass')
+
+    def setUp(self):
+        cache.clear()
+
+    def refresh(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': token})
+
+    def test_rotated_token_cannot_be_replayed(self):
+        for backend in ('users.blacklist.CacheBlacklist', 'users.blacklist.DatabaseBlacklist'):
+            for bloom in (False, True):
+                with self.subTest(backend=backend, bloom=bloom), \
+                        override_settings(TOKEN_BLACKLIST_BACKEND=backend, TOKEN_BLACKLIST_BLOOM_FILTER=bloom):
+                    token = str(RoleRefreshToken.for_user(self.user))
+                    rotated = self.refresh(token)
+                    self.assertEqual(rotated.status_code, 200)
+                    self.assertEqual(self.refresh(token).status_code, 401)
+                    self.assertEqual(self.refresh(rotated.data['refresh']).status_code, 200)
+
+    @override_settings(TOKEN_BLACKLIST_BACKEND='users.blacklist.DatabaseBlacklist', TOKEN_BLACKLIST_BLOOM_FILTER=True)
+    def test_revocation_reaches_other_workers(self):
+        token = str(RoleRefreshToken.for_user(self.user))
+        self.assertEqual(self.refresh(token).status_code, 200)
+        reset_blacklist('TOKEN_BLACKLIST_BACKEND') # Another worker: its Bloom filter is empty
+        cache.clear()
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_bloom_filter_answers_misses(self):
+        bloom = BloomFilter(bits=1024, hashes=3, window=3600)
+        expires_at = time.time() + 60
+        bloom.add('revoked', expires_at)
+        self.assertTrue(bloom.might_contain('revoked', expires_at))
+        self.assertFalse(bloom.might_contain('revoked', expires_at + 7200)) # Another expiry window
+        self.assertFalse(any(bloom.might_contain(f'live-{i}', expires_at) for i in range(20)))
+
+    def test_purge_removes_only_expired_rows(self):
+        now = timezone.now()
+        RevokedToken.objects.create(jti='expired', expires_at=now - timedelta(minutes=1))
+        RevokedToken.objects.create(jti='live', expires_at=now + timedelta(days=1))
+        call_command('purge_revoked_tokens', batch_size=1, stdout=StringIO())
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
+
+
+class PasswordHashingTests(APITestCase):
+    register_data = {'username': 'buyer', 'email': 'buyer@example.com', 'password': 'Str0ng-pass!', 'password2': 'Str0ng-pass!'}
+
+    def obtain(self, password='Str0ng-pass!'):
+        return self.client.post(reverse('token_obtain_pair'), {'username': 'buyer', 'password': password})
+
+    def test_pool_hashes_and_upgrades(self):
+        with override_settings(PASSWORD_HASHING_WORKERS=1):
+            self.assertEqual(self.client.post(reverse('register'), self.register_data).status_code, 201)
+            user = User.objects.get(username='buyer')
+            self.assertTrue(user.check_password('Str0ng-pass!'))
+
+            user.password = make_password('Str0ng-pass!', hasher='pbkdf2_sha1')
+            user.save()
+            self.assertEqual(self.obtain('wrong').status_code, 401)
+            self.assertEqual(self.obtain().status_code, 200)
+            user.refresh_from_db()
+            self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=0, PASSWORD_HASHING_QUEUE=0, PASSWORD_HASHING_RETRY_AFTER=3)
+    def test_saturated_pool_answers_429(self):
+        slots = hashing.get_pool().slots
+        slots.acquire() # The one slot is busy
+        try:
+            response = self.client.post(reverse('register'), self.register_data)
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response['Retry-After'], '3')
+            self.assertFalse(User.objects.exists())
+        finally:
+            slots.release()
+        self.assertEqual(self.client.post(reverse('register'), self.register_data).status_code, 201)
+        self.assertEqual(self.obtain().status_code, 200)
+
+    @override_settings(PASSWORD_HASHING_WORKERS=0, PASSWORD_HASHING_QUEUE=0)
+    def test_saturated_pool_leaves_the_admin_login_working(self):
+        User.objects.create_superuser(username='admin', password='Str0ng-pass!')
+        url = reverse('admin:login')
+        slots = hashing.get_pool().slots
+        slots.acquire()
+        try:
+            self.assertEqual(self.client.post(url, {'username': 'admin', 'password': 'wrong'}).status_code, 200) # The form, with its error
+            self.assertEqual(self.client.post(url, {'username': 'nobody', 'password': 'wrong'}).status_code, 200)
+            self.assertRedirects(
+                self.client.post(url, {'username': 'admin', 'password': 'Str0ng-pass!', 'next': '/admin/'}), '/admin/',
+            )
+            self.assertEqual(self.obtain().status_code, 429) # The API still answers busy
+        finally:
+            slots.release()
+
+    def test_failed_logins_are_signalled(self):
+        self.assertEqual(self.client.post(reverse('register'), self.register_data).status_code, 201)
+        failures = []
+        user_login_failed.connect(receiver := lambda sender, credentials, **kwargs: failures.append(credentials))
+        try:
+            self.assertEqual(self.obtain('wrong').status_code, 401)
+        finally:
+            user_login_failed.disconnect(receiver)
+        self.assertEqual(failures, [{'username': 'buyer', 'password': '********************'}])
+
+    def test_slow_hash_answers_busy(self):
+        pool = hashing.HashingPool(workers=1, queue_size=0, timeout=0, retry_after=2)
+        try:
+            with self.assertRaises(hashing.HashingBusy) as raised:
+                pool.run(time.sleep, 1)
+            self.assertEqual(raised.exception.wait, 2)
+        finally:
+            pool.shutdown()
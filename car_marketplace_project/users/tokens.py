@@ -0,0 +1,43 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .blacklist import get_blacklist
+
+# User flags copied into every token, enough for the read paths to skip loading the user.
+ROLE_CLAIMS = ('is_seller', 'is_staff')
+
+
+def set_role_claims(token, user):
+    for claim in ROLE_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def has_role_claims(token):
+    return all(claim in token for claim in ROLE_CLAIMS)
+
+
+class RoleRefreshToken(RefreshToken):
+    """
+    RefreshToken carrying the user's role flags; its access tokens copy them.
+
+    Revocation goes through users.blacklist instead of simplejwt's token_blacklist tables:
+    TokenRefreshSerializer calls `blacklist()` on the presented token when it rotates, and
+    a token that was already rotated is refused.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        return set_role_claims(super().for_user(user), user)
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if get_blacklist().contains(self[jwt_settings.JTI_CLAIM], self['exp']):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        # The atomic add, not the lookup in verify(), is what stops two concurrent refreshes.
+        if not get_blacklist().add(self[jwt_settings.JTI_CLAIM], self['exp']):
+            raise TokenError(_("Token is blacklisted"))
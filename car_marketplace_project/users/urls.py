@@ -1,8 +1,10 @@
 from django.urls import path
+
+from car_marketplace_project.compression import uncompressed
 from .views import RegisterView, ManageUserProfileView, ManageSellerProfileView
 
 urlpatterns = [
-    path('register/', RegisterView.as_view(), name='register'),
+    path('register/', uncompressed(RegisterView.as_view()), name='register'),
     path('profile/', ManageUserProfileView.as_view(), name='user_profile'),
     path('seller-profile/', ManageSellerProfileView.as_view(), name='seller_profile'),
 ]
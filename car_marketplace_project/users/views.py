@@ -2,11 +2,11 @@ from django.shortcuts import render
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 
 from .models import User
 from .serializers import UserRegistrationSerializer, UserProfileSerializer, SellerProfileSerializer
 from .permissions import IsSeller
+from .tokens import RoleRefreshToken
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -17,7 +17,7 @@ class RegisterView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = RoleRefreshToken.for_user(user)
         return Response({
             "user": UserProfileSerializer(user, context=self.get_serializer_context()).data,
             "refresh": str(refresh),
@@ -27,6 +27,7 @@ class RegisterView(generics.CreateAPIView):
 class ManageUserProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    use_token_claims = False # Renders the user's own row
 
     def get_object(self):
         return self.request.user
@@ -34,6 +35,7 @@ class ManageUserProfileView(generics.RetrieveUpdateAPIView):
 class ManageSellerProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = SellerProfileSerializer
     permission_classes = (permissions.IsAuthenticated, IsSeller)
+    use_token_claims = False
 
     def get_object(self):
         return self.request.user
\ No newline at end of file